@@ -15,6 +15,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+SNAPSHOT_DIR = PROCESSED_DATA_DIR / "partial"
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"
+DEAD_LETTER_DIR = DATA_DIR / "dead_letter"
+MODEL_DIR = DATA_DIR / "models"
+TAXONOMY_DIR = DATA_DIR / "taxonomies"  # Snapshot of every FEEDBACK_CATEGORIES version rows were stamped with
+SCRAPE_STATE_DIR = DATA_DIR / "scrape_state"  # Per-app high-water mark of incremental scrapes
 
 # Ensure directories exist
 RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -33,15 +39,148 @@ SCRAPER_CONFIG = {
     "country": "id",  # Indonesia
     "sort_by": "newest",
     "delay_between_requests": 1.0,  # seconds
+    "host_requests_per_minute": 60,  # Multi-app scraping: total Play Store requests across all apps
+    "host_burst": 2,  # Multi-app scraping: requests allowed back to back before the rate applies
+    "max_workers": 4,  # Multi-app scraping: apps scraped at the same time
+    "incremental": True,  # Fetch only reviews newer than the last scrape (state in SCRAPE_STATE_DIR)
 }
 
 # LLM Processing Configuration
 LLM_CONFIG = {
+    "backend": "gemini",  # "gemini" or "fake" (local stand-in, no network)
     "model": "gemini-2.5-flash",
     "temperature": 0.3,  # Lower for more consistent categorization
     "max_retries": 3,
-    "retry_delay": 2,  # seconds
-    "batch_size": 10,  # Process reviews in batches
+    "retry_delay": 2,  # seconds, base delay doubled on each retry (with jitter)
+    "max_retry_delay": 60,  # seconds, cap on any single backoff
+    "breaker_error_rate": 0.5,  # Recent failure ratio that pauses all workers
+    "breaker_window": 20,  # Number of recent calls the breaker looks at
+    "breaker_cooldown": 30,  # seconds the breaker stays open
+    "batch_size": 10,  # Reviews packed into one prompt (1 = one request per review)
+    "max_batch_tokens": 2000,  # Estimated review tokens per batched prompt; batches close early above it
+    "response_format": "full",  # "compact": enum codes instead of label strings (fewer output tokens)
+    "compact_details": "flagged",  # Compact only: summary/keywords for "all", "flagged" (negative or high) or "none"
+    "static_prefix": True,  # Send instructions + taxonomy once as a system instruction (prepended if unsupported)
+    "context_cache_ttl": 3600,  # seconds; Gemini context cache for the static prefix (system instruction if it fails)
+    "concurrency": 4,  # Parallel LLM requests (1 = serial)
+    "requests_per_minute": 60,  # Shared request budget across workers
+    "tokens_per_minute": 250000,  # Shared (estimated) token budget across workers
+}
+
+# Request Hedging Configuration (duplicate calls that run past a learned latency percentile)
+HEDGING_CONFIG = {
+    "enabled": False,
+    "percentile": 95,  # Recent-call latency percentile after which a duplicate is fired
+    "min_samples": 20,  # Calls observed before hedging starts
+    "window": 200,  # Recent calls the threshold is learned from
+    "max_hedge_rate": 0.05,  # Global cap: at most this share of calls is duplicated
+    "min_delay": 1.0,  # seconds; never hedge sooner than this
+}
+
+# Multi-App Processing Configuration (apps share LLM_CONFIG's RPM/TPM budget via weighted fair queuing)
+MULTI_APP_CONFIG = {
+    # weight: share of the budget while backlogged; deadline_minutes: finish-by time from the start of the run
+    "apps": [
+        {"app_id": "com.whatsapp", "weight": 1.0, "deadline_minutes": None},
+    ],
+}
+
+# Local stand-in backend used for offline throughput benchmarks
+FAKE_BACKEND_CONFIG = {
+    "latency_ms": 800,  # Median latency per call
+    "latency_sigma": 0.5,  # Log-normal spread (p99 ~ 3.2x median at 0.5)
+    "error_rate": 0.02,  # Share of calls failing with a 5xx
+    "rate_limit_burst_rate": 0.01,  # Chance per call that a burst of 429s starts
+    "rate_limit_burst_length": 5,  # Consecutive calls rejected per burst
+    "rate_limit_retry_after": 1.0,  # Retry hint in seconds returned with 429s
+    "malformed_rate": 0.03,  # Share of replies with broken JSON (truncation, prose, quotes)
+    "seed": 42,
+    "system_instruction": True,  # False simulates a backend without system instructions (prefix is prepended)
+    "context_cache": True,  # Simulate a provider context cache for repeated system instructions
+    "context_cache_min_tokens": 0,  # Shorter prefixes are not cached (Gemini requires 1024+ tokens)
+    # Per-model overrides so routing between tiers can be exercised offline
+    "model_profiles": {
+        "gemini-2.5-flash-lite": {"latency_ms": 400, "malformed_rate": 0.08},
+        "gemini-2.5-pro": {"latency_ms": 2500, "malformed_rate": 0.005},
+    },
+}
+
+# Model Routing Configuration (cheapest tier gets first shot, failures escalate)
+ROUTING_CONFIG = {
+    "enabled": False,  # Opt-in: when off, every review goes to LLM_CONFIG["model"]
+    # Ordered cheapest first; prices in USD per 1M tokens (cached: context-cache hits)
+    "tiers": [
+        {"name": "lite", "model": "gemini-2.5-flash-lite", "input_price": 0.10, "cached_input_price": 0.025,
+         "output_price": 0.40},
+        {"name": "flash", "model": "gemini-2.5-flash", "input_price": 0.30, "cached_input_price": 0.075,
+         "output_price": 2.50},
+        {"name": "pro", "model": "gemini-2.5-pro", "input_price": 1.25, "cached_input_price": 0.31,
+         "output_price": 10.00},
+    ],
+    "long_review_chars": 500,  # Longer reviews start one tier up
+    "ambiguous_ratings": [3],  # Ratings whose text is often mixed; start one tier up
+    "uncertain_confidence": 0.5,  # Local predictions below this mark a hard review
+    "max_start_tier": 1,  # Higher tiers are only reached by escalation
+}
+
+# Input Compaction Configuration (applied to review text before it is embedded in a prompt)
+COMPACTION_CONFIG = {
+    "enabled": True,
+    "max_review_tokens": 300,  # Longer reviews keep their head and tail around " … "
+    "head_fraction": 0.7,  # Share of the budget kept from the start of the review
+    "max_repeat": 3,  # "!!!!!!" -> "!!!", "wkwkwkwkwk" -> "wkwkwk"
+}
+
+# Batch Job Configuration (--batch-job: one asynchronous job per model instead of interactive calls)
+BATCH_JOB_CONFIG = {
+    "dir": DATA_DIR / "batch_jobs",  # Request/result JSONL files, one folder per run
+    "poll_interval": 60,  # seconds between status checks
+    "log_interval": 600,  # seconds between "still running" log lines
+    "timeout": 24 * 3600,  # seconds; reviews of unfinished jobs fall back to interactive calls
+    "price_factor": 0.5,  # Batch price relative to interactive (Gemini Batch API bills 50%)
+    "keep_files": False,  # Keep the request/result files after they are ingested
+    "local_poll_interval": 0.2,  # seconds; local stand-in used for non-Gemini backends
+    "local_workers": 8,  # Requests the local stand-in answers in parallel
+}
+
+# Scheduling Configuration (high-impact reviews reach the LLM first)
+SCHEDULING_CONFIG = {
+    "priority_first": True,
+    "rating_weight": 0.5,  # 1-star reviews score highest
+    "thumbs_up_weight": 0.3,  # log-scaled, relative to the most upvoted review
+    "recency_weight": 0.2,
+    "recency_half_life_days": 30,  # Relative to the newest review in the run
+    "snapshot_every": 500,  # Publish partial CSV + dashboard summary every N LLM completions (0 disables)
+}
+
+# Streaming Configuration (--stream: scraper pages are classified while scraping continues)
+STREAMING_CONFIG = {
+    "max_queued_pages": 4,  # Scraped pages waiting for classification; a full queue pauses the scraper
+}
+
+# Sampling Configuration
+SAMPLING_CONFIG = {
+    "margin_of_error": 0.03,  # Default --sample target: CI half-width for any category share
+    "confidence": 0.95,
+    "strata": ["rating", "month"],  # 'month' is derived from the review date
+    "min_per_stratum": 2,  # Needed for a per-stratum variance estimate
+    "seed": 42,  # Fixed so --resume re-draws the same sample
+}
+
+# Classification Cache Configuration
+CACHE_CONFIG = {
+    "enabled": True,
+    "path": DATA_DIR / "cache" / "classifications.sqlite3",
+    "max_entries": 200000,  # Least recently used rows are evicted beyond this
+}
+
+# Near-Duplicate Clustering Configuration
+DEDUP_CONFIG = {
+    "enabled": True,
+    "threshold": 0.8,  # Minimum estimated Jaccard similarity within a rating
+    "num_perm": 64,  # MinHash permutations
+    "bands": 16,  # LSH bands (num_perm / bands rows per band)
+    "shingle_size": 3,  # Character n-grams
 }
 
 # Data Schema
@@ -67,6 +206,9 @@ REVIEW_SCHEMA = {
     ]
 }
 
+# Summary written when classification fails; such rows are never used as training labels
+FALLBACK_SUMMARY = "Klasifikasi otomatis gagal"
+
 # Classification Categories
 FEEDBACK_CATEGORIES = {
     "UI/UX": ["Design", "Navigation", "Accessibility", "Layout"],
@@ -78,6 +220,45 @@ FEEDBACK_CATEGORIES = {
     "Other": ["General Feedback", "Praise", "Question"]
 }
 
+# Local Pre-Classifier Configuration
+PRECLASSIFIER_CONFIG = {
+    "enabled": True,
+    "confidence_threshold": 0.85,  # Rows below this are sent to the LLM
+    "max_words": 8,  # Longer reviews get a confidence penalty
+}
+
+# Local Model Configuration (trained on past LLM labels, see scripts/local_model.py)
+LOCAL_MODEL_CONFIG = {
+    "enabled": True,  # Used as a pre-classifier once a trained artifact exists
+    "confidence_threshold": 0.9,  # Rows below this are sent to the LLM
+    "audit_rate": 0.05,  # Share of confident local predictions still checked by the LLM
+    "num_features": 2 ** 16,  # Hashed word unigram/bigram buckets
+    "alpha": 0.5,  # Naive Bayes smoothing
+    "holdout_fraction": 0.1,  # Rows kept out of training for the agreement report
+    "min_train_rows": 200,
+    "keep_versions": 5,  # Older artifacts are deleted
+}
+
+# Keyword lexicons per subcategory used by the local pre-classifier
+SUBCATEGORY_LEXICONS = {
+    "Design": ["desain", "design", "tampilan", "warna", "jelek"],
+    "Navigation": ["navigasi", "menu", "susah dicari", "membingungkan"],
+    "Layout": ["layout", "tata letak", "dark mode"],
+    "Speed": ["lambat", "lemot", "lelet", "slow"],
+    "Lag": ["lag", "nge-lag", "ngelag", "patah-patah"],
+    "Crash": ["crash", "force close", "keluar sendiri", "tertutup sendiri", "fc"],
+    "Loading": ["loading", "muter terus", "memuat"],
+    "Feature Request": ["tolong tambah", "tambahkan", "mohon tambah", "fitur baru"],
+    "Login": ["login", "log in", "masuk akun", "tidak bisa masuk", "gagal masuk"],
+    "Registration": ["daftar", "registrasi", "register"],
+    "Password Reset": ["reset password", "lupa password", "lupa kata sandi"],
+    "Updates": ["tidak update", "belum update", "tidak diperbarui"],
+    "Bug": ["bug", "ngebug"],
+    "Error": ["error", "eror", "galat"],
+    "Praise": ["mantap", "mantul", "bagus", "keren", "good", "nice", "top", "sempurna",
+               "terima kasih", "makasih", "membantu", "suka", "best", "oke", "ok"],
+}
+
 # Logging Configuration
 LOGGING_CONFIG = {
     "version": 1,
@@ -4,14 +4,21 @@ Runs the complete ETL pipeline from scraping to analysis.
 """
 
 import sys
+import time
+import queue
 import argparse
+import threading
 from pathlib import Path
+from typing import Optional
 from datetime import datetime
 
-from config.config import RAW_DATA_DIR, PROCESSED_DATA_DIR
-from utils import setup_logging, get_logger, DataHandler
-from scripts.scraper import PlayStoreScraper
+from config.config import (RAW_DATA_DIR, PROCESSED_DATA_DIR, CACHE_CONFIG, SAMPLING_CONFIG, MULTI_APP_CONFIG,
+                           STREAMING_CONFIG)
+from utils import setup_logging, get_logger, DataHandler, ClassificationCache, estimate_proportions, is_sampled
+from scripts.scraper import PlayStoreScraper, MultiAppScraper, read_app_ids
 from scripts.process_llm import FeedbackProcessor
+from scripts.multi_app import MultiAppProcessor, parse_app_spec
+from scripts.llm_backends import BACKENDS, create_backend
 from scripts.visualize import DashboardGenerator
 
 logger = get_logger(__name__)
@@ -20,26 +27,38 @@ logger = get_logger(__name__)
 class PIEnginePipeline:
     """Orchestrates the complete Product Intelligence Engine pipeline."""
     
-    def __init__(self, app_id: str = None, max_reviews: int = None):
+    def __init__(self, app_id: str = None, max_reviews: int = None, use_cache: bool = True,
+                 backend: str = None, sample_margin: float = None, batch_job: bool = False,
+                 incremental: bool = None):
         """
         Initialize the pipeline.
         
         Args:
             app_id: Google Play Store app ID
             max_reviews: Maximum number of reviews to process
+            use_cache: Reuse cached LLM classifications from previous runs
+            backend: LLM backend name (default: LLM_CONFIG['backend'])
+            sample_margin: Classify only a stratified sample sized for this margin of error
+            batch_job: Classify through asynchronous batch jobs instead of interactive calls
+            incremental: Scrape only reviews newer than the last scrape (default: SCRAPER_CONFIG)
         """
         self.app_id = app_id
         self.max_reviews = max_reviews
+        self.use_cache = use_cache
+        self.backend = backend
+        self.sample_margin = sample_margin
+        self.batch_job = batch_job
+        self.incremental = incremental
         self.scraper = None
         self.processor = None
         self.visualizer = None
         
-    def run_scraping(self) -> Path:
+    def run_scraping(self) -> Optional[Path]:
         """
         Run the scraping phase.
         
         Returns:
-            Path to the scraped data file
+            Path to the scraped data file (None if an incremental scrape found no new reviews)
         """
         logger.info("=" * 60)
         logger.info(" PHASE 1: DATA COLLECTION")
@@ -48,11 +67,15 @@ class PIEnginePipeline:
         try:
             self.scraper = PlayStoreScraper(
                 app_id=self.app_id,
-                max_reviews=self.max_reviews
+                max_reviews=self.max_reviews,
+                incremental=self.incremental
             )
             
             reviews_data = self.scraper.run(save_file=True)
             
+            if not reviews_data and self.scraper.up_to_date:
+                logger.info(" Phase 1 completed: no new reviews since the last scrape")
+                return None
             if not reviews_data:
                 raise Exception("No reviews collected")
             
@@ -67,12 +90,13 @@ class PIEnginePipeline:
             logger.error(f" Scraping phase failed: {e}")
             raise
     
-    def run_processing(self, input_file: Path) -> Path:
+    def run_processing(self, input_file: Path, resume: bool = False) -> Path:
         """
         Run the LLM processing phase.
         
         Args:
             input_file: Path to raw data file
+            resume: Continue an interrupted run from its checkpoint
             
         Returns:
             Path to processed data file
@@ -82,11 +106,17 @@ class PIEnginePipeline:
         logger.info("=" * 60)
         
         try:
-            self.processor = FeedbackProcessor()
+            self.processor = FeedbackProcessor(
+                use_cache=self.use_cache,
+                backend=create_backend(self.backend),
+                batch_job=self.batch_job
+            )
             
             df_processed = self.processor.run(
                 input_file=input_file.name,
-                output_file=None
+                output_file=None,
+                resume=resume,
+                sample_margin=self.sample_margin
             )
             
             if df_processed.empty:
@@ -103,6 +133,110 @@ class PIEnginePipeline:
             logger.error(f" Processing phase failed: {e}")
             raise
     
+    def run_multi_app_scraping(self, app_ids: list) -> dict:
+        """
+        Run the scraping phase for several apps concurrently.
+        
+        Args:
+            app_ids: Google Play Store app IDs
+            
+        Returns:
+            Per-app scrape report (status, reviews, file)
+        """
+        logger.info("=" * 60)
+        logger.info(" PHASE 1: MULTI-APP DATA COLLECTION")
+        logger.info("=" * 60)
+        
+        report = MultiAppScraper(app_ids, max_reviews=self.max_reviews, incremental=self.incremental).run()
+        if all(result['status'] == 'failed' for result in report.values()):
+            raise Exception("No app could be scraped")
+        return report
+    
+    def run_multi_app_processing(self, apps: list = None) -> dict:
+        """
+        Run the LLM processing phase for several apps sharing one LLM budget.
+        
+        Args:
+            apps: Dicts with 'app_id', 'weight' and 'deadline_minutes' (default: MULTI_APP_CONFIG)
+            
+        Returns:
+            Per-app throughput and queue wait report
+        """
+        logger.info("\n" + "=" * 60)
+        logger.info("🤖 PHASE 2: MULTI-APP LLM PROCESSING")
+        logger.info("=" * 60)
+        
+        try:
+            report = MultiAppProcessor(apps=apps, use_cache=self.use_cache, backend=self.backend).run()
+            if not report:
+                raise Exception("No app was processed")
+            
+            logger.info(f" Phase 2 completed: {sum(r['reviews'] for r in report.values())} reviews "
+                        f"processed across {len(report)} apps")
+            return report
+            
+        except Exception as e:
+            logger.error(f" Multi-app processing failed: {e}")
+            raise
+    
+    def run_reprocessing(self, processed_file: Path):
+        """
+        Re-classify the failed rows of a processed file and patch them in place.
+        
+        Args:
+            processed_file: Path to processed data file
+        """
+        logger.info("\n" + "=" * 60)
+        logger.info("🤖 REPROCESSING FAILED CLASSIFICATIONS")
+        logger.info("=" * 60)
+        
+        try:
+            self.processor = FeedbackProcessor(
+                use_cache=self.use_cache,
+                backend=create_backend(self.backend),
+                batch_job=self.batch_job
+            )
+            
+            df = self.processor.reprocess_failed(processed_file.name)
+            if df.empty:
+                raise Exception("Reprocessing returned empty dataframe")
+            
+            remaining = int((df['status'] == 'failed').sum())
+            logger.info(f" Reprocessing completed: {remaining} reviews still failed")
+            
+        except Exception as e:
+            logger.error(f" Reprocessing failed: {e}")
+            raise
+    
+    def run_taxonomy_migration(self, processed_file: Path):
+        """
+        Re-classify the rows of a processed file affected by a FEEDBACK_CATEGORIES change.
+        
+        Args:
+            processed_file: Path to processed data file
+        """
+        logger.info("\n" + "=" * 60)
+        logger.info("🤖 TAXONOMY MIGRATION")
+        logger.info("=" * 60)
+        
+        try:
+            self.processor = FeedbackProcessor(
+                use_cache=self.use_cache,
+                backend=create_backend(self.backend),
+                batch_job=self.batch_job
+            )
+            
+            df = self.processor.migrate_taxonomy(processed_file.name)
+            if df.empty:
+                raise Exception("Migration returned empty dataframe")
+            
+            logger.info(f" Migration completed: {processed_file.name} is on taxonomy "
+                        f"{self.processor.taxonomy_version}")
+            
+        except Exception as e:
+            logger.error(f" Taxonomy migration failed: {e}")
+            raise
+    
     def run_analysis(self, processed_file: Path):
         """
         Run analysis and generate insights.
@@ -157,6 +291,34 @@ class PIEnginePipeline:
         print(" KEY INSIGHTS")
         print("=" * 60)
         
+        if is_sampled(df):
+            self._print_estimates(df)
+        else:
+            self._print_distributions(df)
+        
+        # Top issues (high priority)
+        if 'priority' in df.columns and 'summary' in df.columns:
+            high_priority = df[df['priority'] == 'high']
+            if not high_priority.empty:
+                print(f"\n Top High-Priority Issues:")
+                for i, row in enumerate(high_priority.head(5).itertuples(), 1):
+                    # Compact responses may omit summaries
+                    summary = row.summary if isinstance(row.summary, str) and row.summary else row.subcategory
+                    print(f"   {i}. [{row.category}] {summary[:70]}...")
+        
+        # Rating distribution
+        print(f"\n Rating Distribution:")
+        rating_counts = df['rating'].value_counts().sort_index(ascending=False)
+        for rating, count in rating_counts.items():
+            pct = (count / len(df)) * 100
+            stars = "" * int(rating)
+            bar = "" * int(pct / 2)
+            print(f"   {stars} ({rating}): {bar} {count} ({pct:.1f}%)")
+        
+        print("\n" + "=" * 60)
+    
+    def _print_distributions(self, df):
+        """Print label distributions of a fully classified review set."""
         # Overall stats
         print(f"\n Overall Statistics:")
         print(f"   Total Reviews: {len(df)}")
@@ -189,25 +351,32 @@ class PIEnginePipeline:
                 pct = (count / len(df)) * 100 if len(df) > 0 else 0
                 emoji = "" if pri == "high" else ("🟡" if pri == "medium" else "🟢")
                 print(f"   {emoji} {pri.title()}: {count} ({pct:.1f}%)")
+    
+    def _print_estimates(self, df):
+        """Print population estimates with confidence intervals for a stratified sample."""
+        confidence = SAMPLING_CONFIG['confidence']
+        population = df['sample_weight'].sum()
         
-        # Top issues (high priority)
-        if 'priority' in df.columns and 'summary' in df.columns:
-            high_priority = df[df['priority'] == 'high']
-            if not high_priority.empty:
-                print(f"\n Top High-Priority Issues:")
-                for i, row in enumerate(high_priority.head(5).itertuples(), 1):
-                    print(f"   {i}. [{row.category}] {row.summary[:70]}...")
-        
-        # Rating distribution
-        print(f"\n Rating Distribution:")
-        rating_counts = df['rating'].value_counts().sort_index(ascending=False)
-        for rating, count in rating_counts.items():
-            pct = (count / len(df)) * 100
-            stars = "" * int(rating)
-            bar = "" * int(pct / 2)
-            print(f"   {stars} ({rating}): {bar} {count} ({pct:.1f}%)")
+        print(f"\n Overall Statistics (stratified sample):")
+        print(f"   Sampled Reviews: {len(df)} of ~{population:.0f} ({df['stratum'].nunique()} strata)")
+        print(f"   Estimated Average Rating: {(df['rating'] * df['sample_weight']).sum() / population:.2f}/5.0")
+        print(f"   Intervals: {confidence:.0%} confidence")
         
-        print("\n" + "=" * 60)
+        sections = [
+            ('category', "  Top Categories (estimated):", None),
+            ('sentiment', " Sentiment Distribution (estimated):", ['positive', 'neutral', 'negative']),
+            ('priority', "  Priority Distribution (estimated):", ['high', 'medium', 'low']),
+        ]
+        for column, title, order in sections:
+            if column not in df.columns:
+                continue
+            estimates = estimate_proportions(df, column, confidence)
+            estimates = estimates.reindex(order).dropna() if order else estimates.head(5)
+            print(f"\n{title}")
+            for i, (value, row) in enumerate(estimates.iterrows(), 1):
+                print(f"   {i}. {str(value).title() if order else value}: {row['proportion'] * 100:.1f}% "
+                      f"({row['ci_low'] * 100:.1f}-{row['ci_high'] * 100:.1f}%), "
+                      f"~{row['estimated_count']:.0f} reviews ({row['sample_count']:.0f} sampled)")
     
     def run_full_pipeline(self):
         """Run the complete end-to-end pipeline."""
@@ -221,6 +390,9 @@ class PIEnginePipeline:
         try:
             # Phase 1: Scraping
             raw_file = self.run_scraping()
+            if raw_file is None:
+                logger.info(" Nothing new to process; pipeline finished early")
+                return
             
             # Phase 2: Processing
             processed_file = self.run_processing(raw_file)
@@ -253,6 +425,105 @@ class PIEnginePipeline:
         except Exception as e:
             logger.error(f"\n Pipeline failed: {e}")
             sys.exit(1)
+    
+    def run_streaming_pipeline(self):
+        """
+        Run the pipeline with scraping and classification overlapped.
+        
+        The scraper runs in a background thread and pushes each page into a
+        bounded queue that the processor classifies from; when classification
+        falls behind, the full queue pauses the scraper (backpressure). A
+        scraping error is passed through the queue and fails the run, and the
+        scrape state only moves once the raw and processed files are saved.
+        """
+        start_time = datetime.now()
+        
+        logger.info("\n" + "=" * 70)
+        logger.info(" PRODUCT INTELLIGENCE ENGINE - STREAMING PIPELINE")
+        logger.info("=" * 70)
+        logger.info(f" Started at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        try:
+            self.scraper = PlayStoreScraper(
+                app_id=self.app_id,
+                max_reviews=self.max_reviews,
+                incremental=self.incremental
+            )
+            self.processor = FeedbackProcessor(
+                use_cache=self.use_cache,
+                backend=create_backend(self.backend)
+            )
+            
+            pages = queue.Queue(maxsize=STREAMING_CONFIG['max_queued_pages'])
+            blocked = {'seconds': 0.0}
+            
+            def push(page):
+                put_start = time.time()
+                pages.put(page)
+                blocked['seconds'] += time.time() - put_start
+            
+            def scrape():
+                # Ends the stream with None, or with the exception that stopped it
+                try:
+                    reviews_data = self.scraper.run(save_file=True, on_page=push, commit_state=False)
+                    if self.scraper.scrape_error:
+                        raise Exception(f"Scraping failed mid-stream: {self.scraper.scrape_error}")
+                    if reviews_data and not self.scraper.saved_file:
+                        raise Exception("Scraped reviews could not be saved")
+                    pages.put(None)
+                except Exception as e:
+                    pages.put(e)
+            
+            def stream():
+                while True:
+                    page = pages.get()
+                    if page is None:
+                        return
+                    if isinstance(page, Exception):
+                        raise page
+                    yield page
+            
+            # Phases 1 + 2: the scraper feeds the classifier page by page
+            producer = threading.Thread(target=scrape, name="scraper", daemon=True)
+            producer.start()
+            output_file = f"processed_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            df_processed = self.processor.run_stream(stream(), output_file=output_file)
+            producer.join()
+            
+            logger.info(f" Backpressure: scraper paused {blocked['seconds']:.1f}s on a full queue, "
+                        f"classifier waited {self.processor.stats.get('idle_seconds', 0.0):.1f}s for pages")
+            if df_processed.empty:
+                if self.scraper.up_to_date:
+                    self.scraper.commit_state()
+                    logger.info(" Nothing new to process; pipeline finished early")
+                    return
+                raise Exception("No reviews were scraped and classified")
+            processed_file = PROCESSED_DATA_DIR / output_file
+            if not processed_file.exists():
+                raise Exception(f"Processed data could not be saved to {processed_file}")
+            
+            # Both files are on disk: the next scrape can start after these reviews
+            self.scraper.commit_state()
+            
+            # Phase 3: Analysis
+            self.run_analysis(processed_file)
+            
+            # Phase 4: Visualization
+            self.run_visualization(processed_file)
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info("\n" + "=" * 70)
+            logger.info(" PIPELINE COMPLETED SUCCESSFULLY!")
+            logger.info("=" * 70)
+            logger.info(f"⏱  Duration: {duration:.1f} seconds")
+            logger.info(f" Raw Data: {self.scraper.saved_file}")
+            logger.info(f" Processed Data: {processed_file}")
+            logger.info(f" Dashboard Exports: dashboard/exports/")
+            logger.info("=" * 70)
+            
+        except Exception as e:
+            logger.error(f"\n Pipeline failed: {e}")
+            sys.exit(1)
 
 
 def main():
@@ -273,6 +544,28 @@ def main():
         help='Maximum number of reviews to process'
     )
     
+    parser.add_argument(
+        '--app-ids',
+        type=str,
+        nargs='+',
+        metavar='APP_ID',
+        help='Scrape several apps concurrently behind one host-level rate limit, then classify '
+             'the apps with new reviews on a shared LLM budget (with --scrape-only: scrape only)'
+    )
+    
+    parser.add_argument(
+        '--app-ids-file',
+        type=Path,
+        metavar='FILE',
+        help='Like --app-ids, reading one app ID per line from FILE'
+    )
+    
+    parser.add_argument(
+        '--full-scrape',
+        action='store_true',
+        help='Scrape from the newest review up to --max-reviews, ignoring the last scrape\'s high-water mark'
+    )
+    
     parser.add_argument(
         '--scrape-only',
         action='store_true',
@@ -291,19 +584,140 @@ def main():
         help='Only run the visualization phase (requires existing processed data)'
     )
     
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Full pipeline with scraping and classification overlapped: each scraped page is '
+             'classified while the next one is fetched'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='With --process-only, continue an interrupted run from its checkpoint'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=list(BACKENDS),
+        help='LLM backend to classify with ("fake" runs offline without API quota)'
+    )
+    
+    parser.add_argument(
+        '--sample',
+        type=float,
+        nargs='?',
+        const=SAMPLING_CONFIG['margin_of_error'],
+        metavar='MARGIN',
+        help='Classify only a stratified sample (rating x month) sized for this margin of error '
+             f"(default: {SAMPLING_CONFIG['margin_of_error']}) and report estimates with confidence intervals"
+    )
+    
+    parser.add_argument(
+        '--batch-job',
+        action='store_true',
+        help='Classify through one asynchronous batch job per model (cheaper, hours of latency) '
+             'instead of interactive calls; for nightly backfills'
+    )
+    
+    parser.add_argument(
+        '--multi-app',
+        type=str,
+        nargs='*',
+        metavar='APP[:WEIGHT[:DEADLINE_MINUTES]]',
+        help='Classify the latest raw file of several apps concurrently (default: MULTI_APP_CONFIG apps), '
+             'splitting the LLM budget among them by weight and reporting per-app throughput and queue waits'
+    )
+    
+    parser.add_argument(
+        '--reprocess-failed',
+        type=str,
+        nargs='?',
+        const='',
+        metavar='FILE',
+        help='Re-classify only the failed rows of a processed file (default: the latest) '
+             'and patch them into it in place'
+    )
+    
+    parser.add_argument(
+        '--migrate-taxonomy',
+        type=str,
+        nargs='?',
+        const='',
+        metavar='FILE',
+        help='After editing FEEDBACK_CATEGORIES, re-classify only the rows of a processed file '
+             '(default: the latest) that the change affects'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the classification cache and re-classify every review'
+    )
+    
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Delete all cached classifications and exit'
+    )
+    
     args = parser.parse_args()
     
+    if args.stream and (args.batch_job or args.sample is not None):
+        parser.error("--stream classifies reviews as they are scraped; it cannot be combined "
+                     "with --batch-job or --sample")
+    
     # Setup logging
     setup_logging()
     
+    if args.clear_cache:
+        cache = ClassificationCache(CACHE_CONFIG['path'], prompt_version='')
+        cache.clear()
+        cache.close()
+        return
+    
     # Initialize pipeline
     pipeline = PIEnginePipeline(
         app_id=args.app_id,
-        max_reviews=args.max_reviews
+        max_reviews=args.max_reviews,
+        use_cache=not args.no_cache,
+        backend=args.backend,
+        sample_margin=args.sample,
+        batch_job=args.batch_job,
+        incremental=False if args.full_scrape else None
     )
     
     # Run requested phases
-    if args.scrape_only:
+    patch_target = args.reprocess_failed if args.reprocess_failed is not None else args.migrate_taxonomy
+    if patch_target is not None:
+        if patch_target:
+            processed_file = PROCESSED_DATA_DIR / Path(patch_target).name
+        else:
+            processed_files = list(PROCESSED_DATA_DIR.glob("*.csv"))
+            if not processed_files:
+                logger.error(" No processed data files found. Run pipeline first.")
+                sys.exit(1)
+            processed_file = max(processed_files, key=lambda x: x.stat().st_ctime)
+        if args.reprocess_failed is not None:
+            pipeline.run_reprocessing(processed_file)
+        else:
+            pipeline.run_taxonomy_migration(processed_file)
+        pipeline.run_analysis(processed_file)
+    elif args.app_ids or args.app_ids_file:
+        app_ids = list(args.app_ids or []) + (read_app_ids(args.app_ids_file) if args.app_ids_file else [])
+        try:
+            report = pipeline.run_multi_app_scraping(list(dict.fromkeys(app_ids)))
+        except Exception as e:
+            logger.error(f" Multi-app scraping failed: {e}")
+            sys.exit(1)
+        scraped = [app_id for app_id, result in report.items() if result['status'] == 'scraped']
+        if not args.scrape_only and scraped:
+            # Weights and deadlines from MULTI_APP_CONFIG where an app has them
+            configured = {app['app_id']: app for app in MULTI_APP_CONFIG['apps']}
+            pipeline.run_multi_app_processing([configured.get(app_id, parse_app_spec(app_id)) for app_id in scraped])
+    elif args.multi_app is not None:
+        pipeline.run_multi_app_processing([parse_app_spec(spec) for spec in args.multi_app] or None)
+    elif args.scrape_only:
         pipeline.run_scraping()
     elif args.process_only:
         raw_files = list(RAW_DATA_DIR.glob("*.csv"))
@@ -311,7 +725,7 @@ def main():
             logger.error(" No raw data files found. Run with --scrape-only first.")
             sys.exit(1)
         latest_file = max(raw_files, key=lambda x: x.stat().st_ctime)
-        pipeline.run_processing(latest_file)
+        pipeline.run_processing(latest_file, resume=args.resume)
         processed_files = list(PROCESSED_DATA_DIR.glob("*.csv"))
         latest_processed = max(processed_files, key=lambda x: x.stat().st_ctime)
         pipeline.run_analysis(latest_processed)
@@ -322,6 +736,8 @@ def main():
             sys.exit(1)
         latest_file = max(processed_files, key=lambda x: x.stat().st_ctime)
         pipeline.run_visualization(latest_file)
+    elif args.stream:
+        pipeline.run_streaming_pipeline()
     else:
         # Run full pipeline
         pipeline.run_full_pipeline()
@@ -0,0 +1,361 @@
+"""
+Batch jobs for Product Intelligence Engine.
+Writes classification prompts to a JSONL request file, submits it as one
+asynchronous job, polls it and reads the JSONL results back by key. Gemini
+jobs go through the Batch API; other backends use a local file-based stand-in.
+"""
+
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from config.config import BATCH_JOB_CONFIG
+from scripts.llm_backends import LLMBackend, GeminiBackend
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# Normalized job states
+PENDING, RUNNING, SUCCEEDED, FAILED = 'pending', 'running', 'succeeded', 'failed'
+FINAL_STATES = (SUCCEEDED, FAILED)
+
+
+def request_line(key: str, prompt: str, temperature: float, prefix: str = None) -> Dict:
+    """
+    One line of a request file, in the Gemini Batch API JSONL format.
+
+    Args:
+        key: Identifier the result line is matched back by
+        prompt: Per-call prompt text
+        temperature: Sampling temperature
+        prefix: Static prompt prefix, sent as the system instruction
+
+    Returns:
+        Request dictionary
+    """
+    request = {
+        'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+        'generation_config': {'temperature': temperature},
+    }
+    if prefix:
+        request['system_instruction'] = {'parts': [{'text': prefix}]}
+    return {'key': key, 'request': request}
+
+
+def write_jsonl(lines: Iterable[Dict], filepath: Path) -> int:
+    """
+    Write request or result lines to a JSONL file.
+
+    Args:
+        lines: Dictionaries, one per line (see request_line)
+        filepath: Destination file
+
+    Returns:
+        Number of lines written
+    """
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(filepath, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_results(filepath: Path) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Read a JSONL result file.
+
+    Args:
+        filepath: Result file downloaded from a finished job
+
+    Returns:
+        Mapping of key to (response text, error message); one of the two is None
+    """
+    results = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                key = str(entry['key'])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.debug(f"Skipping malformed result line in {filepath}")
+                continue
+
+            if entry.get('error'):
+                results[key] = (None, str(entry['error'].get('message', entry['error'])))
+                continue
+            try:
+                parts = entry['response']['candidates'][0]['content']['parts']
+                results[key] = (''.join(part.get('text', '') for part in parts), None)
+            except (KeyError, IndexError, TypeError):
+                results[key] = (None, 'response has no text')
+    return results
+
+
+class BatchJobClient:
+    """Interface for providers that run a JSONL request file as one asynchronous job."""
+
+    name = "base"
+
+    def __init__(self, model_name: str, poll_interval: float = None):
+        """
+        Initialize the client.
+
+        Args:
+            model_name: Model every request in a job is sent to
+            poll_interval: Seconds between status checks (default: BATCH_JOB_CONFIG)
+        """
+        self.model_name = model_name
+        self.poll_interval = poll_interval if poll_interval is not None else BATCH_JOB_CONFIG['poll_interval']
+
+    def submit(self, request_file: Path, display_name: str) -> str:
+        """
+        Submit a request file.
+
+        Args:
+            request_file: JSONL request file (see write_jsonl)
+            display_name: Human-readable job name
+
+        Returns:
+            Job ID
+        """
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """Current state of a job: 'pending', 'running', 'succeeded' or 'failed'."""
+        raise NotImplementedError
+
+    def download(self, job_id: str, result_file: Path) -> Path:
+        """
+        Save the results of a succeeded job.
+
+        Args:
+            job_id: Job ID
+            result_file: Destination JSONL file
+
+        Returns:
+            Path to the result file
+        """
+        raise NotImplementedError
+
+    def cancel(self, job_id: str):
+        """Cancel a job that has not finished; it then reports 'failed'."""
+        raise NotImplementedError
+
+    def wait(self, job_id: str, timeout: float = None) -> str:
+        """
+        Poll a job until it finishes or the timeout passes.
+
+        A job still unfinished at the timeout is cancelled, so it does not
+        run (and bill) alongside the interactive calls that replace it.
+
+        Args:
+            job_id: Job ID
+            timeout: Seconds to wait (default: BATCH_JOB_CONFIG['timeout'])
+
+        Returns:
+            Last observed state
+        """
+        timeout = timeout if timeout is not None else BATCH_JOB_CONFIG['timeout']
+        deadline = time.monotonic() + timeout
+        last_logged = 0.0
+        while True:
+            state = self.status(job_id)
+            if state in FINAL_STATES:
+                return state
+            if time.monotonic() >= deadline:
+                logger.warning(f" Batch job {job_id} ({self.model_name}) still {state} after {timeout:.0f}s; cancelling it")
+                try:
+                    self.cancel(job_id)
+                except Exception as e:
+                    logger.error(f" Could not cancel batch job {job_id}: {e}")
+                return state
+            if time.monotonic() - last_logged >= BATCH_JOB_CONFIG['log_interval']:
+                logger.info(f" Batch job {job_id} ({self.model_name}): {state}")
+                last_logged = time.monotonic()
+            time.sleep(max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+
+
+class GeminiBatchJobClient(BatchJobClient):
+    """Gemini Batch API via the google-genai SDK (optional dependency)."""
+
+    name = "gemini"
+
+    # google-genai JobState names mapped to the normalized states
+    STATES = {
+        'JOB_STATE_QUEUED': PENDING,
+        'JOB_STATE_PENDING': PENDING,
+        'JOB_STATE_RUNNING': RUNNING,
+        'JOB_STATE_SUCCEEDED': SUCCEEDED,
+    }
+
+    def __init__(self, model_name: str, api_key: str):
+        """
+        Configure the Gemini client.
+
+        Args:
+            model_name: Gemini model name
+            api_key: API key
+        """
+        super().__init__(model_name)
+        try:
+            from google import genai
+        except ImportError as e:
+            raise ImportError(" Batch jobs on Gemini need the google-genai package "
+                              "(pip install google-genai)") from e
+        self.client = genai.Client(api_key=api_key)
+
+    def submit(self, request_file: Path, display_name: str) -> str:
+        uploaded = self.client.files.upload(
+            file=str(request_file),
+            config={'display_name': display_name, 'mime_type': 'jsonl'}
+        )
+        job = self.client.batches.create(
+            model=self.model_name,
+            src=uploaded.name,
+            config={'display_name': display_name}
+        )
+        return job.name
+
+    def status(self, job_id: str) -> str:
+        state = self.client.batches.get(name=job_id).state
+        # Failed, cancelled and expired jobs all count as failed
+        return self.STATES.get(getattr(state, 'name', str(state)), FAILED)
+
+    def cancel(self, job_id: str):
+        self.client.batches.cancel(name=job_id)
+
+    def download(self, job_id: str, result_file: Path) -> Path:
+        job = self.client.batches.get(name=job_id)
+        content = self.client.files.download(file=job.dest.file_name)
+        result_file = Path(result_file)
+        result_file.write_bytes(content)
+        return result_file
+
+
+class LocalBatchJobClient(BatchJobClient):
+    """
+    File-based stand-in for a batch API, for offline runs and tests.
+
+    Each job gets a folder with its state file; a background thread answers
+    the requests through an ordinary backend and writes the result file in
+    the Gemini format. Failed requests get an error line, like real jobs.
+    """
+
+    name = "local"
+
+    def __init__(self, backend: LLMBackend, jobs_dir: Path = None, workers: int = None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            backend: Backend that answers the requests
+            jobs_dir: Folder for job state and results (default: BATCH_JOB_CONFIG['dir'] / 'local')
+            workers: Requests answered in parallel (default: BATCH_JOB_CONFIG['local_workers'])
+        """
+        super().__init__(backend.model_name, poll_interval=BATCH_JOB_CONFIG['local_poll_interval'])
+        self.backend = backend
+        self.jobs_dir = Path(jobs_dir or BATCH_JOB_CONFIG['dir'] / 'local')
+        self.workers = workers or BATCH_JOB_CONFIG['local_workers']
+        self._cancelled = set()
+        self._lock = threading.RLock()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def _write_state(self, job_id: str, **fields):
+        with self._lock:
+            state_file = self._job_dir(job_id) / 'job.json'
+            state = json.loads(state_file.read_text(encoding='utf-8')) if state_file.exists() else {}
+            state.update(fields)
+            tmp_file = state_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(state, indent=2), encoding='utf-8')
+            tmp_file.replace(state_file)
+
+    def submit(self, request_file: Path, display_name: str) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(request_file, job_dir / 'requests.jsonl')
+        self._write_state(job_id, name=display_name, model=self.model_name, state=PENDING,
+                          created=datetime.now().isoformat())
+
+        threading.Thread(target=self._run, args=(job_id,), daemon=True).start()
+        return job_id
+
+    def _answer(self, job_id: str, line: str) -> Dict:
+        """Answer one request line, returning its result line."""
+        entry = json.loads(line)
+        if job_id in self._cancelled:
+            return {'key': entry['key'], 'error': {'code': 499, 'message': 'job cancelled'}}
+        request = entry['request']
+        prompt = ''.join(part['text'] for part in request['contents'][0]['parts'])
+        prefix = ''.join(part['text'] for part in request.get('system_instruction', {}).get('parts', [])) or None
+        temperature = request.get('generation_config', {}).get('temperature', 0.0)
+        try:
+            text = self.backend.generate_with_prefix(prompt, temperature, prefix)
+        except Exception as e:
+            return {'key': entry['key'], 'error': {'code': getattr(e, 'code', 500), 'message': str(e)}}
+        return {'key': entry['key'],
+                'response': {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}]}}
+
+    def _run(self, job_id: str):
+        job_dir = self._job_dir(job_id)
+        with self._lock:
+            if job_id in self._cancelled:
+                return
+            self._write_state(job_id, state=RUNNING)
+        try:
+            with open(job_dir / 'requests.jsonl', 'r', encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda line: self._answer(job_id, line), lines))
+            with self._lock:
+                if job_id in self._cancelled:
+                    return
+                write_jsonl(results, job_dir / 'results.jsonl')
+                self._write_state(job_id, state=SUCCEEDED, finished=datetime.now().isoformat())
+        except Exception as e:
+            logger.error(f" Local batch job {job_id} failed: {e}")
+            self._write_state(job_id, state=FAILED, error=str(e))
+
+    def status(self, job_id: str) -> str:
+        state_file = self._job_dir(job_id) / 'job.json'
+        if not state_file.exists():
+            return FAILED
+        return json.loads(state_file.read_text(encoding='utf-8'))['state']
+
+    def cancel(self, job_id: str):
+        with self._lock:
+            if self.status(job_id) in FINAL_STATES:
+                return
+            self._cancelled.add(job_id)
+            self._write_state(job_id, state=FAILED, error='cancelled', finished=datetime.now().isoformat())
+
+    def download(self, job_id: str, result_file: Path) -> Path:
+        shutil.copyfile(self._job_dir(job_id) / 'results.jsonl', result_file)
+        return Path(result_file)
+
+
+def create_batch_client(backend: LLMBackend, jobs_dir: Path = None) -> BatchJobClient:
+    """
+    Batch client for a backend: the Gemini Batch API for Gemini, else the local stand-in.
+
+    Args:
+        backend: Backend the interactive path would use
+        jobs_dir: Folder for the local stand-in's jobs
+
+    Returns:
+        BatchJobClient for the backend's model
+    """
+    if isinstance(backend, GeminiBackend):
+        return GeminiBatchJobClient(backend.model_name, backend.api_key)
+    return LocalBatchJobClient(backend, jobs_dir=jobs_dir)
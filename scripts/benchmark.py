@@ -0,0 +1,164 @@
+"""
+Offline throughput benchmark for Product Intelligence Engine.
+Runs FeedbackProcessor against the local fake Gemini backend so concurrency,
+batching and retry settings can be load-tested without API quota.
+"""
+
+import time
+import argparse
+
+import pandas as pd
+
+from config.config import BASE_DIR, LLM_CONFIG, FAKE_BACKEND_CONFIG, HEDGING_CONFIG, ROUTING_CONFIG
+from utils import RateLimiter, Hedger, setup_logging, get_logger
+from scripts.llm_backends import FakeGeminiBackend
+from scripts.process_llm import FeedbackProcessor
+from scripts.model_router import ModelRouter
+
+logger = get_logger(__name__)
+
+SAMPLE_FILE = BASE_DIR / "data" / "samples" / "sample_reviews.csv"
+
+
+def build_reviews(count: int) -> pd.DataFrame:
+    """
+    Build a synthetic review set by cycling the sample reviews.
+
+    Each copy gets a unique suffix so it is not collapsed by deduplication.
+
+    Args:
+        count: Number of reviews
+
+    Returns:
+        DataFrame with the raw review schema
+    """
+    sample = pd.read_csv(SAMPLE_FILE, encoding='utf-8-sig')
+    repeats = -(-count // len(sample))
+    df = pd.concat([sample] * repeats, ignore_index=True).head(count)
+    suffix = pd.Series(range(len(df))).astype(str)
+    df['review_id'] = 'bench_' + suffix
+    df['content'] = df['content'] + ' #' + suffix
+    return df
+
+
+def run_benchmark(reviews: int, concurrency: int, batch_size: int,
+                  requests_per_minute: float = None, routing: bool = None, response_format: str = None,
+                  static_prefix: bool = True, hedging: bool = None, **backend_overrides) -> dict:
+    """
+    Classify synthetic reviews with the fake backend and measure throughput.
+
+    Args:
+        reviews: Number of reviews
+        concurrency: Parallel LLM requests
+        batch_size: Reviews per prompt
+        requests_per_minute: Rate limit (0 disables it; default: LLM_CONFIG)
+        routing: Route reviews across model tiers (default: ROUTING_CONFIG['enabled'])
+        response_format: "full" or "compact" (default: LLM_CONFIG)
+        static_prefix: Send the static prompt prefix as a system instruction
+        hedging: Hedge slow calls (default: HEDGING_CONFIG['enabled'])
+        **backend_overrides: FAKE_BACKEND_CONFIG overrides (None values are ignored)
+
+    Returns:
+        Dictionary of benchmark results
+    """
+    backend = FakeGeminiBackend(**{k: v for k, v in backend_overrides.items() if v is not None})
+    processor = FeedbackProcessor(use_cache=False, pre_classifiers=[], backend=backend)
+    processor.clusterer = None
+    if routing is not None:
+        processor.router = ModelRouter(backend) if routing else None
+    processor.concurrency = concurrency
+    processor.batch_size = batch_size
+    if response_format:
+        processor.response_format = response_format
+    processor.static_prefix = static_prefix
+    if hedging is not None:
+        processor.hedger = None
+        if hedging:
+            processor.hedger = Hedger(
+                percentile=HEDGING_CONFIG['percentile'],
+                min_samples=HEDGING_CONFIG['min_samples'],
+                window=HEDGING_CONFIG['window'],
+                max_hedge_rate=HEDGING_CONFIG['max_hedge_rate'],
+                min_delay=HEDGING_CONFIG['min_delay'],
+                max_workers=2 * concurrency + 2
+            )
+    if requests_per_minute is not None:
+        processor.rate_limiter = RateLimiter(requests_per_minute, LLM_CONFIG.get('tokens_per_minute'))
+
+    df = build_reviews(reviews)
+    start = time.perf_counter()
+    processor.process_reviews(df)
+    elapsed = time.perf_counter() - start
+    tiers = processor.router.summary()['tiers'].values() if processor.router else []
+
+    return {
+        'reviews': reviews,
+        'concurrency': concurrency,
+        'batch_size': batch_size,
+        'seconds': round(elapsed, 2),
+        'reviews_per_second': round(reviews / elapsed, 2) if elapsed else 0.0,
+        'backend_calls': sum(b.calls for b in processor.router.backends) if processor.router else backend.calls,
+        'response_format': processor.response_format,
+        'output_tokens': sum(t['output_tokens'] for t in tiers) or None,
+        **processor.retry_stats.as_dict(),
+        'parse': dict(processor.response_parser.stats),
+        'compaction': processor.stats.get('compaction'),
+        'prefix': processor.stats.get('prefix'),
+        'hedging': processor.stats.get('hedging'),
+        'routing': processor.stats.get('routing'),
+    }
+
+
+def main():
+    """Main entry point for the benchmark."""
+    parser = argparse.ArgumentParser(description="Offline LLM pipeline throughput benchmark")
+    parser.add_argument('--reviews', type=int, default=200, help='Number of synthetic reviews')
+    parser.add_argument('--concurrency', type=int, default=LLM_CONFIG['concurrency'])
+    parser.add_argument('--batch-size', type=int, default=LLM_CONFIG['batch_size'])
+    parser.add_argument('--rpm', type=float, default=LLM_CONFIG['requests_per_minute'],
+                        help='Requests per minute limit (0 disables it)')
+    parser.add_argument('--routing', action=argparse.BooleanOptionalAction,
+                        help=f"Route reviews across model tiers (default: {ROUTING_CONFIG['enabled']}); "
+                             f"--no-routing sends every review to LLM_CONFIG['model']")
+    parser.add_argument('--response-format', choices=['full', 'compact'],
+                        help=f"default: {LLM_CONFIG.get('response_format', 'full')}")
+    parser.add_argument('--no-static-prefix', action='store_true',
+                        help='Repeat the instructions in every prompt instead of sending a system instruction')
+    parser.add_argument('--hedge', action=argparse.BooleanOptionalAction,
+                        help=f"Hedge slow calls (default: {HEDGING_CONFIG['enabled']})")
+    # Unset fake-backend options fall back to FAKE_BACKEND_CONFIG and its per-model profiles
+    parser.add_argument('--latency-ms', type=float, help=f"default: {FAKE_BACKEND_CONFIG['latency_ms']}")
+    parser.add_argument('--latency-sigma', type=float, help=f"default: {FAKE_BACKEND_CONFIG['latency_sigma']}")
+    parser.add_argument('--error-rate', type=float, help=f"default: {FAKE_BACKEND_CONFIG['error_rate']}")
+    parser.add_argument('--rate-limit-burst-rate', type=float,
+                        help=f"default: {FAKE_BACKEND_CONFIG['rate_limit_burst_rate']}")
+    parser.add_argument('--malformed-rate', type=float, help=f"default: {FAKE_BACKEND_CONFIG['malformed_rate']}")
+    parser.add_argument('--seed', type=int, help=f"default: {FAKE_BACKEND_CONFIG['seed']}")
+    args = parser.parse_args()
+
+    setup_logging()
+
+    results = run_benchmark(
+        args.reviews,
+        args.concurrency,
+        args.batch_size,
+        requests_per_minute=args.rpm,
+        routing=args.routing,
+        response_format=args.response_format,
+        static_prefix=not args.no_static_prefix,
+        hedging=args.hedge,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_burst_rate=args.rate_limit_burst_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+
+    print("\n Benchmark Results:")
+    for key, value in results.items():
+        print(f"   {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
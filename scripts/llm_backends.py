@@ -0,0 +1,415 @@
+"""
+LLM backends for Product Intelligence Engine.
+Abstracts the text-generation call so the processor can run against Gemini
+or a local stand-in that simulates latency, errors and malformed replies.
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Dict, List
+
+from config.config import GEMINI_API_KEY, LLM_CONFIG, FAKE_BACKEND_CONFIG, FEEDBACK_CATEGORIES
+from utils import estimate_tokens, get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMBackend:
+    """
+    Interface for text-generation backends used by FeedbackProcessor.
+
+    Backends that set `supports_system_instruction` accept a static prompt
+    prefix via `generate(..., system_instruction=...)`; for the others
+    generate_with_prefix prepends it to the prompt.
+    """
+
+    name = "base"
+    supports_system_instruction = False
+
+    def __init__(self, model_name: str):
+        """
+        Initialize the backend.
+
+        Args:
+            model_name: Model identifier
+        """
+        self.model_name = model_name
+        self._prefix_lock = threading.Lock()
+        self.prefix_stats = {'calls': 0, 'system_instruction': 0, 'inlined': 0, 'cache_hits': 0,
+                             'cached_tokens': 0, 'prefix_tokens': 0, 'payload_tokens': 0}
+
+    def generate(self, prompt: str, temperature: float) -> str:
+        """
+        Generate a completion for a prompt.
+
+        Args:
+            prompt: Prompt text
+            temperature: Sampling temperature
+
+        Returns:
+            Response text
+        """
+        raise NotImplementedError
+
+    def generate_with_prefix(self, prompt: str, temperature: float, prefix: str = None) -> str:
+        """
+        Generate with a static prompt prefix, as a system instruction where supported.
+
+        Args:
+            prompt: Per-call prompt text
+            temperature: Sampling temperature
+            prefix: Static prefix shared by many calls (None for none)
+
+        Returns:
+            Response text
+        """
+        native = bool(prefix) and self.supports_system_instruction
+        with self._prefix_lock:
+            self.prefix_stats['calls'] += 1
+            self.prefix_stats['payload_tokens'] += estimate_tokens(prompt)
+            if prefix:
+                self.prefix_stats['prefix_tokens'] += estimate_tokens(prefix)
+                self.prefix_stats['system_instruction' if native else 'inlined'] += 1
+
+        if native:
+            return self.generate(prompt, temperature, system_instruction=prefix)
+        return self.generate(f"{prefix}\n\n{prompt}" if prefix else prompt, temperature)
+
+    def _record_cache_hit(self, tokens: int):
+        """Count prefix tokens served from a context cache."""
+        with self._prefix_lock:
+            self.prefix_stats['cache_hits'] += 1
+            self.prefix_stats['cached_tokens'] += tokens
+
+    def for_model(self, model_name: str) -> 'LLMBackend':
+        """
+        Create a backend of the same kind and settings for another model.
+
+        Args:
+            model_name: Model identifier
+
+        Returns:
+            LLMBackend instance
+        """
+        return type(self)(model_name)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini via the google-generativeai SDK.
+
+    The static prompt prefix goes into a context cache when the model and
+    prefix length allow it, else it is sent as a plain system instruction.
+    """
+
+    name = "gemini"
+    supports_system_instruction = True
+
+    def __init__(self, model_name: str, api_key: str = None):
+        """
+        Configure the Gemini client.
+
+        Args:
+            model_name: Gemini model name
+            api_key: API key (default: GEMINI_API_KEY)
+        """
+        super().__init__(model_name)
+        api_key = api_key or GEMINI_API_KEY
+        if not api_key:
+            raise ValueError(" GEMINI_API_KEY not found in environment variables!")
+        self.api_key = api_key
+
+        import google.generativeai as genai
+        self._genai = genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self._prefixed_models = {}
+        self._models_lock = threading.Lock()
+
+    # Errors from a model whose context cache expired or was deleted server-side
+    STALE_CACHE_ERRORS = ('NotFound', 'FailedPrecondition')
+
+    def _model_for(self, system_instruction: str = None) -> Dict:
+        """
+        Model entry for a system instruction, cached as context where possible.
+
+        Created once per prefix; a context-cached model is recreated (with a
+        fresh cache) before its TTL runs out.
+        """
+        if not system_instruction:
+            return {'model': self.model, 'expires': None}
+        with self._models_lock:
+            entry = self._prefixed_models.get(system_instruction)
+            if entry is None or (entry['expires'] is not None and time.monotonic() >= entry['expires']):
+                entry = self._create_prefixed_model(system_instruction)
+                self._prefixed_models[system_instruction] = entry
+            return entry
+
+    def _create_prefixed_model(self, system_instruction: str) -> Dict:
+        """Model entry: {'model', 'expires'}; 'expires' (monotonic) is None unless the model uses a context cache."""
+        ttl = LLM_CONFIG.get('context_cache_ttl')
+        if ttl:
+            try:
+                from datetime import timedelta
+                cache = self._genai.caching.CachedContent.create(
+                    model=f"models/{self.model_name}",
+                    system_instruction=system_instruction,
+                    ttl=timedelta(seconds=ttl),
+                )
+                logger.info(f" Context cache created for {self.model_name} prompt prefix")
+                # Renewed when 10% of the TTL is left, so no call reaches an expired cache
+                return {'model': self._genai.GenerativeModel.from_cached_content(cached_content=cache),
+                        'expires': time.monotonic() + ttl * 0.9}
+            except Exception as e:
+                # e.g. prefix below the model's minimum cacheable size
+                logger.info(f" Context cache unavailable for {self.model_name} ({e}); using a system instruction")
+        return {'model': self._genai.GenerativeModel(self.model_name, system_instruction=system_instruction),
+                'expires': None}
+
+    def _evict(self, system_instruction: str, entry: Dict):
+        """Drop a context-cached model whose cache is gone, so the next call creates a new one."""
+        with self._models_lock:
+            if self._prefixed_models.get(system_instruction) is entry:
+                del self._prefixed_models[system_instruction]
+
+    def _generate_content(self, model, prompt: str, temperature: float):
+        return model.generate_content(
+            prompt,
+            generation_config=self._genai.types.GenerationConfig(
+                temperature=temperature,
+            )
+        )
+
+    def generate(self, prompt: str, temperature: float, system_instruction: str = None) -> str:
+        entry = self._model_for(system_instruction)
+        try:
+            response = self._generate_content(entry['model'], prompt, temperature)
+        except Exception as e:
+            if entry['expires'] is None or type(e).__name__ not in self.STALE_CACHE_ERRORS:
+                raise
+            # The context cache expired or was deleted: retry once without it
+            logger.warning(f" Context cache for {self.model_name} is gone ({e}); retrying with a system instruction")
+            self._evict(system_instruction, entry)
+            plain = self._genai.GenerativeModel(self.model_name, system_instruction=system_instruction)
+            response = self._generate_content(plain, prompt, temperature)
+        usage = getattr(response, 'usage_metadata', None)
+        cached = getattr(usage, 'cached_content_token_count', 0) or 0
+        if cached:
+            self._record_cache_hit(cached)
+        return response.text
+
+    def for_model(self, model_name: str) -> 'GeminiBackend':
+        return GeminiBackend(model_name, api_key=self.api_key)
+
+
+class FakeAPIError(Exception):
+    """Error raised by FakeGeminiBackend, shaped like a google.api_core exception."""
+
+    def __init__(self, code: int, message: str, retry_after: float = None):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.retry_after = retry_after
+
+
+class FakeGeminiBackend(LLMBackend):
+    """
+    In-process stand-in for Gemini used for offline load tests.
+
+    Returns schema-valid classifications for every review found in the
+    prompt, with configurable latency distribution, 5xx error rate, 429
+    bursts and malformed-JSON rate (per model via `model_profiles`). System
+    instructions and a provider context cache for them are simulated and can
+    be switched off. Seeded, so runs are reproducible.
+    """
+
+    name = "fake"
+
+    def __init__(self, model_name: str = None, **overrides):
+        """
+        Initialize the fake backend.
+
+        Args:
+            model_name: Model name to report
+            **overrides: Values overriding FAKE_BACKEND_CONFIG and the model's profile
+        """
+        super().__init__(model_name or LLM_CONFIG['model'])
+        self.overrides = overrides
+        profile = FAKE_BACKEND_CONFIG.get('model_profiles', {}).get(self.model_name, {})
+        config = {**FAKE_BACKEND_CONFIG, **profile, **overrides}
+        self.latency_ms = config['latency_ms']
+        self.latency_sigma = config['latency_sigma']
+        self.error_rate = config['error_rate']
+        self.rate_limit_burst_rate = config['rate_limit_burst_rate']
+        self.rate_limit_burst_length = config['rate_limit_burst_length']
+        self.malformed_rate = config['malformed_rate']
+        self.retry_after = config['rate_limit_retry_after']
+        self.time_scale = config.get('time_scale', 1.0)
+        self.supports_system_instruction = config['system_instruction']
+        self.context_cache = config['context_cache']
+        self.context_cache_min_tokens = config['context_cache_min_tokens']
+        self._cached_prefixes = set()
+
+        self._rng = random.Random(config['seed'])
+        self._lock = threading.Lock()
+        self._burst_remaining = 0
+        self.calls = 0
+
+    def for_model(self, model_name: str) -> 'FakeGeminiBackend':
+        return FakeGeminiBackend(model_name, **self.overrides)
+
+    def _draw(self):
+        """Draw latency and failure mode for one call under the shared RNG."""
+        with self._lock:
+            self.calls += 1
+            latency = self._rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000.0
+
+            if self._burst_remaining == 0 and self._rng.random() < self.rate_limit_burst_rate:
+                self._burst_remaining = self.rate_limit_burst_length
+            if self._burst_remaining > 0:
+                self._burst_remaining -= 1
+                return latency, 'rate_limit'
+
+            roll = self._rng.random()
+            if roll < self.error_rate:
+                return latency, 'error'
+            if roll < self.error_rate + self.malformed_rate:
+                return latency, 'malformed'
+            return latency, 'ok'
+
+    @staticmethod
+    def _extract_reviews(prompt: str) -> List[Dict]:
+        """Recover the reviews embedded in a single or batched prompt."""
+        match = re.search(r'ULASAN:\s*(\[.*?\n\])', prompt, re.S)
+        if match:
+            try:
+                return json.loads(match.group(1))
+            except json.JSONDecodeError:
+                pass
+
+        match = re.search(r'ULASAN: "(.*)"\s*RATING: (\d)', prompt, re.S)
+        if match:
+            return [{'ulasan': match.group(1), 'rating': int(match.group(2))}]
+        return []
+
+    @staticmethod
+    def classify(content: str, rating: int) -> Dict:
+        """Deterministic, schema-valid classification derived from the review."""
+        digest = int(hashlib.md5(str(content).encode('utf-8')).hexdigest(), 16)
+        categories = list(FEEDBACK_CATEGORIES)
+        category = categories[digest % len(categories)]
+        subcategories = FEEDBACK_CATEGORIES[category]
+        rating = int(rating)
+
+        return {
+            'category': category,
+            'subcategory': subcategories[(digest >> 8) % len(subcategories)],
+            'sentiment': "negative" if rating <= 2 else ("neutral" if rating == 3 else "positive"),
+            'priority': "high" if rating == 1 else ("medium" if rating <= 3 else "low"),
+            'summary': f"Ulasan terkait {category}",
+            'keywords': str(content).lower().split()[:3],
+        }
+
+    @staticmethod
+    def encode_compact(result: Dict, details: str) -> Dict:
+        """Encode a classification in the compact response format (1-based codes, short keys)."""
+        categories = list(FEEDBACK_CATEGORIES)
+        category = result['category']
+        encoded = {
+            'c': categories.index(category) + 1,
+            'sc': FEEDBACK_CATEGORIES[category].index(result['subcategory']) + 1,
+            's': {'positive': 1, 'neutral': 0, 'negative': -1}[result['sentiment']],
+            'p': result['priority'][0],
+        }
+        flagged = result['sentiment'] == 'negative' or result['priority'] == 'high'
+        if details == 'all' or (details == 'flagged' and flagged):
+            encoded['m'] = result['summary']
+            encoded['k'] = result['keywords']
+        return encoded
+
+    def _use_context_cache(self, system_instruction: str):
+        """Simulate the provider cache: created on first use of a prefix, hit afterwards."""
+        tokens = estimate_tokens(system_instruction)
+        if not self.context_cache or tokens < self.context_cache_min_tokens:
+            return
+        with self._lock:
+            hit = system_instruction in self._cached_prefixes
+            self._cached_prefixes.add(system_instruction)
+        if hit:
+            self._record_cache_hit(tokens)
+
+    def generate(self, prompt: str, temperature: float, system_instruction: str = None) -> str:
+        if system_instruction:
+            self._use_context_cache(system_instruction)
+        latency, outcome = self._draw()
+        time.sleep(latency * self.time_scale)
+
+        if outcome == 'rate_limit':
+            raise FakeAPIError(429, f"Resource has been exhausted. Please retry in {self.retry_after}s.",
+                               retry_after=self.retry_after)
+        if outcome == 'error':
+            raise FakeAPIError(503, "The service is currently unavailable.")
+
+        reviews = self._extract_reviews(prompt)
+        instructions = system_instruction or prompt
+        compact = 'KODE KATEGORI (c)' in instructions
+        if 'HANYA jika s = -1' in instructions:
+            details = 'flagged'
+        else:
+            details = 'none' if 'Jangan sertakan "m"' in instructions else 'all'
+
+        results = []
+        for review in reviews:
+            result = self.classify(review.get('ulasan', ''), review.get('rating', 3))
+            if compact:
+                result = self.encode_compact(result, details)
+            if 'id' in review:
+                result = {('i' if compact else 'id'): review['id'], **result}
+            results.append(result)
+
+        payload = results if len(reviews) != 1 or 'id' in reviews[0] else results[0]
+        text = json.dumps(payload, ensure_ascii=False)
+
+        if outcome == 'malformed':
+            return self._malform(text)
+        return "```json\n" + text + "\n```"
+
+    def _malform(self, text: str) -> str:
+        """Apply one of the defects real models produce to a JSON reply."""
+        with self._lock:
+            defect = self._rng.choice(['truncated', 'prose', 'trailing_comma', 'single_quotes'])
+
+        if defect == 'truncated':
+            # As when the model hits its output token limit
+            return "```json\n" + text[:max(1, len(text) // 2)]
+        if defect == 'prose':
+            return "Berikut hasil analisisnya:\n" + text + "\nSemoga membantu!"
+        if defect == 'trailing_comma':
+            return text[:-1] + ",\n" + text[-1]
+        return text.replace('"', "'")
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    FakeGeminiBackend.name: FakeGeminiBackend,
+}
+
+
+def create_backend(name: str = None, model_name: str = None) -> LLMBackend:
+    """
+    Create an LLM backend by name.
+
+    Args:
+        name: Backend name (default: LLM_CONFIG['backend'])
+        model_name: Model name (default: LLM_CONFIG['model'])
+
+    Returns:
+        LLMBackend instance
+    """
+    name = name or LLM_CONFIG.get('backend', 'gemini')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_name or LLM_CONFIG['model'])
@@ -0,0 +1,498 @@
+"""
+Local model for Product Intelligence Engine.
+Hashed n-gram Naive Bayes trained incrementally on past LLM labels, so only
+low-confidence reviews (and a small audit sample) need to reach Gemini.
+"""
+
+import re
+import json
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import (
+    LOCAL_MODEL_CONFIG,
+    FEEDBACK_CATEGORIES,
+    FALLBACK_SUMMARY,
+    MODEL_DIR,
+    PROCESSED_DATA_DIR
+)
+from utils import DataHandler, setup_logging, get_logger
+from scripts.taxonomy import TAXONOMY_COLUMN, taxonomy_hash
+
+logger = get_logger(__name__)
+
+TOKEN_PATTERN = r'\w+'
+TARGETS = ['subcategory', 'sentiment', 'priority']
+# Label sources that carry an LLM judgement and are safe to learn from
+TRAINABLE_SOURCES = {'llm', 'cache'}
+REPORT_THRESHOLDS = [0.5, 0.7, 0.8, 0.9, 0.95, 0.99]
+ARTIFACT_PREFIX = "local_classifier_v"
+
+
+def is_holdout(review_ids: pd.Series, fraction: float = None) -> np.ndarray:
+    """
+    Deterministically assign reviews to the evaluation holdout.
+
+    Args:
+        review_ids: Review IDs
+        fraction: Share of reviews held out (default: LOCAL_MODEL_CONFIG)
+
+    Returns:
+        Boolean mask of held-out rows
+    """
+    fraction = LOCAL_MODEL_CONFIG['holdout_fraction'] if fraction is None else fraction
+    hashed = pd.util.hash_array(review_ids.astype(str).to_numpy(dtype=object))
+    return (hashed % 1000) < int(fraction * 1000)
+
+
+def llm_labeled(df: pd.DataFrame) -> np.ndarray:
+    """
+    Mask of processed rows whose labels came from the LLM.
+
+    Files written before the label_source column existed are trusted except
+    for fallback classifications.
+
+    Args:
+        df: Processed reviews
+
+    Returns:
+        Boolean mask
+    """
+    if 'label_source' in df.columns:
+        mask = df['label_source'].isin(TRAINABLE_SOURCES).to_numpy()
+    else:
+        mask = np.ones(len(df), dtype=bool)
+    if 'summary' in df.columns:
+        mask = mask & (df['summary'] != FALLBACK_SUMMARY).to_numpy()
+    return mask & df['content'].fillna('').astype(str).str.strip().ne('').to_numpy()
+
+
+class LocalClassifier:
+    """
+    Multinomial Naive Bayes over hashed word unigrams and bigrams.
+
+    One model per target (subcategory, sentiment, priority); the category is
+    derived from the subcategory. Counts are additive, so new LLM labels are
+    folded in without retraining from scratch.
+    """
+
+    name = "model"
+
+    def __init__(self, num_features: int = None, alpha: float = None,
+                 confidence_threshold: float = None, audit_rate: float = None):
+        """
+        Initialize an untrained model.
+
+        Args:
+            num_features: Hash buckets (default: LOCAL_MODEL_CONFIG)
+            alpha: Additive smoothing (default: LOCAL_MODEL_CONFIG)
+            confidence_threshold: Minimum confidence to skip the LLM (default: LOCAL_MODEL_CONFIG)
+            audit_rate: Share of confident predictions still sent to the LLM (default: LOCAL_MODEL_CONFIG)
+        """
+        self.num_features = num_features or LOCAL_MODEL_CONFIG['num_features']
+        self.alpha = alpha or LOCAL_MODEL_CONFIG['alpha']
+        self.confidence_threshold = confidence_threshold or LOCAL_MODEL_CONFIG['confidence_threshold']
+        self.audit_rate = LOCAL_MODEL_CONFIG['audit_rate'] if audit_rate is None else audit_rate
+
+        self.subcategory_to_category = {
+            sub: cat for cat, subs in FEEDBACK_CATEGORIES.items() for sub in subs
+        }
+        self.classes = {
+            'subcategory': list(self.subcategory_to_category),
+            'sentiment': ['negative', 'neutral', 'positive'],
+            'priority': ['high', 'medium', 'low'],
+        }
+        self.counts = {t: np.zeros((len(c), self.num_features)) for t, c in self.classes.items()}
+        self.class_docs = {t: np.zeros(len(c)) for t, c in self.classes.items()}
+
+        self.version = 0
+        self.trained_rows = 0
+        self.trained_files = {}
+        self.created_at = None
+        self._log_probs = None
+
+    def _featurize(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, List[List[str]]]:
+        """
+        Hash each review into its set of n-gram features.
+
+        Returns:
+            (feature ids of all reviews concatenated, feature count per review,
+            unique unigrams per review, which lead each review's features)
+        """
+        words = df['content'].fillna('').astype(str).str.lower().str.findall(TOKEN_PATTERN).tolist()
+        ratings = df['rating'].fillna(3).astype(int).tolist()
+
+        tokens = []
+        unigrams = []
+        lengths = np.empty(len(words), dtype=np.int64)
+        for i, (doc_words, rating) in enumerate(zip(words, ratings)):
+            # Binary occurrence; the rating is a token so it informs every target
+            unique = list(dict.fromkeys(doc_words))
+            doc = unique + list(dict.fromkeys(f"{a} {b}" for a, b in zip(doc_words, doc_words[1:])))
+            doc.append(f"__rating_{rating}")
+            tokens.extend(doc)
+            unigrams.append(unique)
+            lengths[i] = len(doc)
+
+        hashed = pd.util.hash_array(np.array(tokens, dtype=object)) if tokens else np.zeros(0, dtype=np.uint64)
+        features = (hashed % np.uint64(self.num_features)).astype(np.int64)
+        return features, lengths, unigrams
+
+    def partial_fit(self, df: pd.DataFrame) -> int:
+        """
+        Add labeled reviews to the model counts.
+
+        Args:
+            df: Reviews with content, rating and the target label columns
+
+        Returns:
+            Number of rows learned from
+        """
+        if df.empty:
+            return 0
+
+        features, lengths, _ = self._featurize(df)
+        for target, classes in self.classes.items():
+            codes = pd.Categorical(df[target], categories=classes).codes.astype(np.int64)
+            token_codes = np.repeat(codes, lengths)
+            known = token_codes >= 0
+            np.add.at(self.counts[target], (token_codes[known], features[known]), 1)
+            self.class_docs[target] += np.bincount(codes[codes >= 0], minlength=len(classes))
+
+        self.trained_rows += len(df)
+        self._log_probs = None
+        return len(df)
+
+    def _prepare(self):
+        """Compute smoothed log probabilities from the counts."""
+        self._log_probs = {}
+        for target, counts in self.counts.items():
+            smoothed = counts + self.alpha
+            log_likelihood = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+            docs = self.class_docs[target] + 1
+            self._log_probs[target] = (log_likelihood, np.log(docs / docs.sum()))
+
+    def predict_proba(self, df: pd.DataFrame, chunk_size: int = 4096) -> Tuple[Dict[str, np.ndarray], Tuple]:
+        """
+        Class posteriors for every target.
+
+        Args:
+            df: Reviews with 'content' and 'rating'
+            chunk_size: Reviews scored per vectorized step
+
+        Returns:
+            (posteriors per target with shape (reviews, classes),
+            (feature ids, feature offsets per review, unique unigrams per review))
+        """
+        if self._log_probs is None:
+            self._prepare()
+
+        features, lengths, unigrams = self._featurize(df)
+        starts = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        probabilities = {}
+
+        for target, (log_likelihood, log_prior) in self._log_probs.items():
+            scores = np.empty((len(df), len(log_prior)))
+            for a in range(0, len(df), chunk_size):
+                b = min(a + chunk_size, len(df))
+                gathered = log_likelihood[:, features[starts[a]:starts[b]]]
+                scores[a:b] = np.add.reduceat(gathered, starts[a:b] - starts[a], axis=1).T + log_prior
+            scores -= scores.max(axis=1, keepdims=True)
+            np.exp(scores, out=scores)
+            probabilities[target] = scores / scores.sum(axis=1, keepdims=True)
+
+        return probabilities, (features, starts, unigrams)
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Classify reviews and score the confidence of each prediction.
+
+        Args:
+            df: DataFrame with 'content' and 'rating' columns
+
+        Returns:
+            DataFrame indexed like `df` with classification columns and a
+            'confidence' column in [0, 1] (the least confident target)
+        """
+        probabilities, featurized = self.predict_proba(df)
+
+        labels = {}
+        confidence = np.ones(len(df))
+        for target, proba in probabilities.items():
+            labels[target] = np.array(self.classes[target], dtype=object)[proba.argmax(axis=1)]
+            confidence = np.minimum(confidence, proba.max(axis=1))
+
+        subcategory, sentiment = labels['subcategory'], labels['sentiment']
+        category = np.array([self.subcategory_to_category[s] for s in subcategory], dtype=object)
+        summary = np.array([
+            'Pujian umum untuk aplikasi' if sub == 'Praise'
+            else ('Keluhan terkait ' if sent == 'negative' else 'Ulasan terkait ') + sub
+            for sub, sent in zip(subcategory, sentiment)
+        ], dtype=object)
+
+        return pd.DataFrame({
+            'category': category,
+            'subcategory': subcategory,
+            'sentiment': sentiment,
+            'priority': labels['priority'],
+            'summary': summary,
+            'keywords': self._keywords(featurized, subcategory),
+            'confidence': confidence,
+        }, index=df.index)
+
+    def _keywords(self, featurized: Tuple, subcategory: np.ndarray, limit: int = 3) -> np.ndarray:
+        """Pick the review words most indicative of the predicted subcategory."""
+        features, starts, unigrams = featurized
+        log_likelihood, _ = self._log_probs['subcategory']
+        lift = log_likelihood - log_likelihood.mean(axis=0)
+        codes = pd.Categorical(subcategory, categories=self.classes['subcategory']).codes
+
+        # Unigram features lead each review's slice of `features`
+        counts = np.fromiter(map(len, unigrams), dtype=np.int64, count=len(unigrams))
+        rows = np.repeat(np.arange(len(unigrams)), counts)
+        positions = starts[:-1][rows] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        scores = lift[codes[rows], features[positions]].tolist()
+
+        keywords = np.empty(len(unigrams), dtype=object)
+        offset = 0
+        for i, doc in enumerate(unigrams):
+            ranked = sorted(zip(scores[offset:offset + len(doc)], doc), reverse=True)
+            keywords[i] = [word for score, word in ranked if score > 1.0 and len(word) > 2][:limit]
+            offset += len(doc)
+        return keywords
+
+    @staticmethod
+    def list_versions(model_dir: Path = MODEL_DIR) -> List[Tuple[int, Path]]:
+        """Saved artifacts as (version, path), oldest first."""
+        versions = []
+        for path in Path(model_dir).glob(f"{ARTIFACT_PREFIX}*.npz"):
+            match = re.fullmatch(rf"{ARTIFACT_PREFIX}(\d+)", path.stem)
+            if match:
+                versions.append((int(match.group(1)), path))
+        return sorted(versions)
+
+    def metadata(self) -> Dict:
+        """Artifact metadata."""
+        return {
+            'version': self.version,
+            'created_at': self.created_at,
+            'taxonomy': taxonomy_hash(),
+            'num_features': self.num_features,
+            'alpha': self.alpha,
+            'classes': self.classes,
+            'trained_rows': self.trained_rows,
+            'trained_files': self.trained_files,
+        }
+
+    def save(self, model_dir: Path = MODEL_DIR) -> Path:
+        """
+        Save the model as the next artifact version and prune old versions.
+
+        Args:
+            model_dir: Artifact directory
+
+        Returns:
+            Path of the saved artifact
+        """
+        model_dir = Path(model_dir)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        versions = self.list_versions(model_dir)
+        self.version = (versions[-1][0] if versions else 0) + 1
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+
+        path = model_dir / f"{ARTIFACT_PREFIX}{self.version:03d}.npz"
+        arrays = {f"counts_{t}": c.astype(np.float32) for t, c in self.counts.items()}
+        arrays.update({f"docs_{t}": d for t, d in self.class_docs.items()})
+        np.savez_compressed(path, metadata=np.array(json.dumps(self.metadata())), **arrays)
+        logger.info(f" Saved local model v{self.version} ({self.trained_rows} rows) to {path}")
+
+        for _, old_path in self.list_versions(model_dir)[:-LOCAL_MODEL_CONFIG['keep_versions']]:
+            old_path.unlink()
+            old_path.with_name(old_path.stem + "_report.json").unlink(missing_ok=True)
+        return path
+
+    @classmethod
+    def load(cls, model_dir: Path = MODEL_DIR, version: int = None) -> Optional['LocalClassifier']:
+        """
+        Load a saved artifact.
+
+        Args:
+            model_dir: Artifact directory
+            version: Artifact version (default: latest)
+
+        Returns:
+            LocalClassifier, or None if no compatible artifact exists
+        """
+        versions = dict(cls.list_versions(model_dir))
+        if not versions:
+            return None
+        version = version or max(versions)
+        if version not in versions:
+            logger.warning(f" Local model v{version} not found in {model_dir}")
+            return None
+
+        with np.load(versions[version], allow_pickle=False) as artifact:
+            metadata = json.loads(str(artifact['metadata']))
+            if metadata['taxonomy'] != taxonomy_hash():
+                logger.warning(f" Local model v{version} was trained on a different taxonomy; ignoring it")
+                return None
+
+            model = cls(num_features=metadata['num_features'], alpha=metadata['alpha'])
+            for target in TARGETS:
+                model.counts[target] = artifact[f"counts_{target}"].astype(np.float64)
+                model.class_docs[target] = artifact[f"docs_{target}"]
+
+        model.version = metadata['version']
+        model.created_at = metadata['created_at']
+        model.trained_rows = metadata['trained_rows']
+        model.trained_files = metadata['trained_files']
+        logger.info(f" Loaded local model v{model.version} ({model.trained_rows} training rows)")
+        return model
+
+
+def load_labeled_reviews(files: List[Path], holdout: bool) -> pd.DataFrame:
+    """
+    Collect LLM-labeled rows from processed output files.
+
+    Args:
+        files: Processed CSV files
+        holdout: Return the evaluation holdout instead of the training rows
+
+    Returns:
+        DataFrame of labeled reviews with a 'source_file' column
+    """
+    frames = []
+    for path in files:
+        df = DataHandler.load_from_csv(path, dtype={TAXONOMY_COLUMN: str})
+        if df is None or df.empty or not set(TARGETS + ['content', 'rating']).issubset(df.columns):
+            continue
+        mask = llm_labeled(df) & (is_holdout(df['review_id']) == holdout)
+        frames.append(df.loc[mask].assign(source_file=path.name))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def agreement_report(model: LocalClassifier, files: List[Path] = None, model_dir: Path = MODEL_DIR) -> Dict:
+    """
+    Measure how often the local model agrees with the LLM on held-out rows.
+
+    Args:
+        model: Trained model
+        files: Processed CSV files (default: all in PROCESSED_DATA_DIR)
+        model_dir: Artifact directory the report is saved to
+
+    Returns:
+        Report dictionary (also saved next to the artifact)
+    """
+    files = files if files is not None else sorted(PROCESSED_DATA_DIR.glob("*.csv"))
+    holdout = load_labeled_reviews(files, holdout=True)
+    report = {'version': model.version, 'holdout_rows': len(holdout)}
+    if holdout.empty:
+        logger.warning(" No held-out LLM-labeled rows to evaluate against")
+        return report
+
+    predictions = model.predict(holdout)
+    correct = {
+        field: (predictions[field].to_numpy() == holdout[field].to_numpy())
+        for field in ['category'] + TARGETS
+    }
+    all_correct = np.logical_and.reduce(list(correct.values()))
+    confidence = predictions['confidence'].to_numpy()
+
+    report['agreement'] = {field: round(float(hits.mean()), 4) for field, hits in correct.items()}
+    report['agreement']['all_fields'] = round(float(all_correct.mean()), 4)
+    report['thresholds'] = []
+    for threshold in REPORT_THRESHOLDS:
+        covered = confidence >= threshold
+        report['thresholds'].append({
+            'threshold': threshold,
+            'coverage': round(float(covered.mean()), 4),
+            'agreement': round(float(all_correct[covered].mean()), 4) if covered.any() else None,
+        })
+
+    logger.info(f"\n Local model v{model.version} vs LLM on {len(holdout)} held-out reviews:")
+    for field, value in report['agreement'].items():
+        logger.info(f"   {field}: {value:.1%}")
+    for row in report['thresholds']:
+        agreement = f"{row['agreement']:.1%}" if row['agreement'] is not None else "-"
+        logger.info(f"   confidence >= {row['threshold']:.2f}: {row['coverage']:.1%} of rows local, "
+                    f"{agreement} full agreement")
+
+    versions = dict(LocalClassifier.list_versions(model_dir))
+    if model.version in versions:
+        report_path = versions[model.version].with_name(versions[model.version].stem + "_report.json")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f" Saved agreement report: {report_path}")
+    return report
+
+
+def train(refresh: bool = False, model_dir: Path = MODEL_DIR) -> Optional[LocalClassifier]:
+    """
+    Train the local model on LLM-labeled processed files.
+
+    Args:
+        refresh: Start from the latest artifact and learn only from files it has not seen
+        model_dir: Artifact directory
+
+    Returns:
+        The trained model, or None if there is not enough data
+    """
+    model = LocalClassifier.load(model_dir) if refresh else None
+    if model is None:
+        if refresh:
+            logger.info(" No compatible local model to refresh; training from scratch")
+        model = LocalClassifier()
+
+    files = [f for f in sorted(PROCESSED_DATA_DIR.glob("*.csv")) if f.name not in model.trained_files]
+    if not files:
+        if not model.trained_rows:
+            logger.warning(f" No processed files in {PROCESSED_DATA_DIR} to train on")
+            return None
+        logger.info(" Local model is up to date; no new processed files")
+        return model
+
+    training = load_labeled_reviews(files, holdout=False)
+    for name, rows in (training.groupby('source_file') if not training.empty else []):
+        model.partial_fit(rows)
+        model.trained_files[name] = len(rows)
+    for path in files:
+        model.trained_files.setdefault(path.name, 0)
+
+    if model.trained_rows < LOCAL_MODEL_CONFIG['min_train_rows']:
+        logger.warning(f" Only {model.trained_rows} LLM-labeled rows available "
+                       f"(need {LOCAL_MODEL_CONFIG['min_train_rows']}); model not saved")
+        return None
+
+    logger.info(f" Learned from {len(training)} new rows in {len(files)} files")
+    model.save(model_dir)
+    agreement_report(model, model_dir=model_dir)
+    return model
+
+
+def main():
+    """Command-line entry point for training and evaluating the local model."""
+    parser = argparse.ArgumentParser(description="Train the local review classifier on past LLM labels")
+    parser.add_argument('command', choices=['train', 'refresh', 'report'],
+                        help='train: from scratch | refresh: add new processed files | report: agreement vs LLM')
+    parser.add_argument('--version', type=int, help='Artifact version for report (default: latest)')
+    args = parser.parse_args()
+
+    setup_logging()
+
+    if args.command == 'report':
+        model = LocalClassifier.load(version=args.version)
+        if model is None:
+            logger.error(f" No local model found in {MODEL_DIR}; run the train command first")
+            return
+        agreement_report(model)
+    else:
+        train(refresh=args.command == 'refresh')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Model router for Product Intelligence Engine.
+Sends each review to the cheapest Gemini tier likely to handle it and
+escalates to a stronger tier when an attempt comes back unusable.
+"""
+
+import time
+import threading
+from typing import Dict, List, Tuple
+
+from config.config import ROUTING_CONFIG
+from scripts.llm_backends import LLMBackend
+from utils import estimate_tokens, get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelRouter:
+    """Per-review tier selection, escalation and per-tier latency/cost accounting."""
+
+    def __init__(self, backend: LLMBackend, tiers: List[Dict] = None, config: Dict = None):
+        """
+        Initialize the router.
+
+        Args:
+            backend: Backend for the configured model; other tiers use the same kind
+            tiers: Model tiers, cheapest first (default: ROUTING_CONFIG['tiers'])
+            config: Routing rules (default: ROUTING_CONFIG)
+        """
+        self.config = {**ROUTING_CONFIG, **(config or {})}
+        self.tiers = tiers or self.config['tiers']
+        self.backends = [
+            backend if backend.model_name == tier['model'] else backend.for_model(tier['model'])
+            for tier in self.tiers
+        ]
+        self.max_start_tier = min(self.config['max_start_tier'], len(self.tiers) - 1)
+
+        self._lock = threading.Lock()
+        self.routed = {tier['name']: 0 for tier in self.tiers}
+        self.reasons = {}
+        self.escalations = {}
+        self.tier_stats = {
+            tier['name']: {'calls': 0, 'failures': 0, 'latency_seconds': 0.0,
+                           'input_tokens': 0, 'output_tokens': 0, 'cost': 0.0}
+            for tier in self.tiers
+        }
+
+    def name(self, tier: int) -> str:
+        return self.tiers[tier]['name']
+
+    def initial_tier(self, content: str, rating: int, local_confidence: float = 0.0) -> Tuple[int, List[str]]:
+        """
+        Choose the starting tier for one review.
+
+        Each difficulty signal moves the review one tier up, capped at
+        `max_start_tier`.
+
+        Args:
+            content: Review text
+            rating: Star rating
+            local_confidence: Best pre-classifier confidence (0 if none had an opinion)
+
+        Returns:
+            (tier index, reasons)
+        """
+        reasons = []
+        if len(content) > self.config['long_review_chars']:
+            reasons.append('long')
+        if rating in self.config['ambiguous_ratings']:
+            reasons.append('ambiguous_rating')
+        if 0 < local_confidence < self.config['uncertain_confidence']:
+            reasons.append('uncertain_local')
+        return min(len(reasons), self.max_start_tier), reasons
+
+    def record_routed(self, tier: int, reasons: List[str]):
+        """Count a routing decision for one review."""
+        with self._lock:
+            self.routed[self.name(tier)] += 1
+            for reason in reasons or ['default']:
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def escalate(self, tier: int, reviews: int = 1) -> int:
+        """
+        Move to the next stronger tier after an unusable reply.
+
+        Args:
+            tier: Current tier index
+            reviews: Number of reviews being escalated
+
+        Returns:
+            Tier index for the next attempt (unchanged at the top tier)
+        """
+        if tier >= len(self.tiers) - 1:
+            return tier
+
+        key = f"{self.name(tier)}->{self.name(tier + 1)}"
+        with self._lock:
+            self.escalations[key] = self.escalations.get(key, 0) + reviews
+        logger.debug(f"Escalating {reviews} reviews {key}")
+        return tier + 1
+
+    def generate(self, tier: int, prompt: str, temperature: float, prefix: str = None) -> str:
+        """
+        Call the backend for a tier and account for its latency and cost.
+
+        Token counts come from the local estimate_tokens heuristic.
+
+        Args:
+            tier: Tier index
+            prompt: Per-call prompt text
+            temperature: Sampling temperature
+            prefix: Static prompt prefix (see LLMBackend.generate_with_prefix)
+
+        Returns:
+            Response text
+        """
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.backends[tier].generate_with_prefix(prompt, temperature, prefix)
+            return response
+        finally:
+            self._record_call(tier, time.perf_counter() - start, estimate_tokens(prompt) + estimate_tokens(prefix),
+                              estimate_tokens(response), response is not None)
+
+    def record_batch_request(self, tier: int, prompt: str, prefix: str, response: str, price_factor: float):
+        """
+        Account for one request answered by a batch job.
+
+        Args:
+            tier: Tier index of the job's model
+            prompt: Per-call prompt text
+            prefix: Static prompt prefix (None if inlined)
+            response: Response text (None if the request failed)
+            price_factor: Batch price relative to interactive calls
+        """
+        self._record_call(tier, 0.0, estimate_tokens(prompt) + estimate_tokens(prefix),
+                          estimate_tokens(response), response is not None, price_factor)
+
+    def _record_call(self, tier: int, seconds: float, input_tokens: int, output_tokens: int, ok: bool,
+                     price_factor: float = 1.0):
+        spec = self.tiers[tier]
+        cost = (input_tokens * spec.get('input_price', 0) + output_tokens * spec.get('output_price', 0)) / 1e6
+        cost *= price_factor
+        with self._lock:
+            stats = self.tier_stats[spec['name']]
+            stats['calls'] += 1
+            stats['failures'] += not ok
+            stats['latency_seconds'] += seconds
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost'] += cost
+
+    def summary(self) -> Dict:
+        """
+        Snapshot of routing decisions and per-tier latency and cost.
+
+        Prefix tokens served from a context cache are charged at the tier's
+        `cached_input_price` instead of `input_price`.
+        """
+        with self._lock:
+            tiers = {}
+            for spec, backend in zip(self.tiers, self.backends):
+                stats = self.tier_stats[spec['name']]
+                cached = backend.prefix_stats['cached_tokens']
+                discount = cached * (spec.get('input_price', 0) - spec.get('cached_input_price', spec.get('input_price', 0))) / 1e6
+                tiers[spec['name']] = {
+                    **stats,
+                    'cached_tokens': cached,
+                    'reviews_routed': self.routed[spec['name']],
+                    'mean_latency_seconds': round(stats['latency_seconds'] / stats['calls'], 3) if stats['calls'] else 0.0,
+                    'latency_seconds': round(stats['latency_seconds'], 2),
+                    'cost': round(stats['cost'] - discount, 6),
+                }
+            return {
+                'tiers': tiers,
+                'reasons': dict(self.reasons),
+                'escalations': dict(self.escalations),
+                'total_cost': round(sum(t['cost'] for t in tiers.values()), 6),
+            }
+
+    def log_summary(self):
+        """Log routing decisions and per-tier latency and cost."""
+        summary = self.summary()
+        routed = ", ".join(f"{name}: {t['reviews_routed']}" for name, t in summary['tiers'].items())
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in summary['reasons'].items()) or "none"
+        logger.info(f" Routing: {routed} (reasons: {reasons})")
+        if summary['escalations']:
+            escalations = ", ".join(f"{key}: {count}" for key, count in summary['escalations'].items())
+            logger.info(f" Escalations: {escalations}")
+        models = {tier['name']: tier['model'] for tier in self.tiers}
+        for name, t in summary['tiers'].items():
+            if t['calls']:
+                logger.info(f"   {name} ({models[name]}): "
+                            f"{t['calls']} calls, {t['failures']} failed, mean {t['mean_latency_seconds']:.2f}s, "
+                            f"~{t['input_tokens'] + t['output_tokens']} tokens ({t['cached_tokens']} cached), "
+                            f"${t['cost']:.4f}")
+        logger.info(f" Estimated LLM cost: ${summary['total_cost']:.4f}")
@@ -0,0 +1,140 @@
+"""
+Multi-app processing for Product Intelligence Engine.
+Classifies the latest raw file of several apps concurrently, with one
+FairShareScheduler splitting the global LLM budget among per-app queues.
+"""
+
+import time
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config.config import RAW_DATA_DIR, LLM_CONFIG, MULTI_APP_CONFIG
+from scripts.process_llm import FeedbackProcessor
+from scripts.llm_backends import create_backend
+from utils import get_logger, FairShareScheduler
+
+logger = get_logger(__name__)
+
+
+def parse_app_spec(spec: str) -> Dict:
+    """
+    Parse an app given on the command line.
+
+    Args:
+        spec: "APP_ID[:WEIGHT[:DEADLINE_MINUTES]]", e.g. "com.whatsapp:3:90"
+
+    Returns:
+        App dictionary as in MULTI_APP_CONFIG['apps']
+    """
+    parts = spec.split(':')
+    return {
+        'app_id': parts[0],
+        'weight': float(parts[1]) if len(parts) > 1 and parts[1] else 1.0,
+        'deadline_minutes': float(parts[2]) if len(parts) > 2 and parts[2] else None,
+    }
+
+
+def latest_raw_file(app_id: str) -> Optional[Path]:
+    """Most recent scraped file of an app (None if it was never scraped)."""
+    raw_files = list(RAW_DATA_DIR.glob(f"reviews_{app_id}_*.csv"))
+    return max(raw_files, key=lambda x: x.stat().st_ctime) if raw_files else None
+
+
+class MultiAppProcessor:
+    """Runs one FeedbackProcessor per app against a shared fair-share scheduler."""
+
+    def __init__(self, apps: List[Dict] = None, use_cache: bool = True, backend: str = None,
+                 requests_per_minute: float = None, tokens_per_minute: float = None):
+        """
+        Initialize the multi-app run.
+
+        Args:
+            apps: Dicts with 'app_id', 'weight' and 'deadline_minutes' (default: MULTI_APP_CONFIG)
+            use_cache: Reuse cached LLM classifications from previous runs
+            backend: LLM backend name (default: LLM_CONFIG['backend'])
+            requests_per_minute: Global request budget (default: LLM_CONFIG)
+            tokens_per_minute: Global token budget (default: LLM_CONFIG)
+        """
+        self.apps = apps or MULTI_APP_CONFIG['apps']
+        self.use_cache = use_cache
+        self.backend = backend
+        self.scheduler = FairShareScheduler(
+            requests_per_minute=requests_per_minute if requests_per_minute is not None else LLM_CONFIG.get('requests_per_minute'),
+            tokens_per_minute=tokens_per_minute if tokens_per_minute is not None else LLM_CONFIG.get('tokens_per_minute')
+        )
+        self.report: Dict[str, Dict] = {}
+
+    def _run_app(self, processor: FeedbackProcessor, input_file: Path, output_file: str) -> Dict:
+        start = time.time()
+        df = processor.run(input_file=input_file.name, output_file=output_file, publish_progress=False)
+        seconds = time.time() - start
+        return {
+            'reviews': len(df),
+            'seconds': round(seconds, 1),
+            'reviews_per_minute': round(len(df) / seconds * 60, 1) if seconds > 0 else 0.0,
+            'output_file': output_file if not df.empty else None,
+        }
+
+    def run(self) -> Dict[str, Dict]:
+        """
+        Classify every app's latest raw file concurrently.
+
+        Returns:
+            Per-app report: reviews, reviews_per_minute, output_file and the
+            scheduler's share, requests_per_minute and queue wait statistics
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        jobs = {}
+        cache = None
+        for app in self.apps:
+            input_file = latest_raw_file(app['app_id'])
+            if input_file is None:
+                logger.warning(f" No raw data for {app['app_id']}; skipping it")
+                continue
+            # One cache connection for all apps (same prompt version, thread-safe)
+            processor = FeedbackProcessor(use_cache=False, backend=create_backend(self.backend))
+            if self.use_cache:
+                cache = cache or processor.open_cache()
+                processor.cache = cache
+            deadline = app.get('deadline_minutes')
+            processor.rate_limiter = self.scheduler.register(
+                app['app_id'], weight=app.get('weight', 1.0),
+                deadline_seconds=deadline * 60 if deadline else None
+            )
+            jobs[app['app_id']] = (processor, input_file, f"processed_reviews_{app['app_id']}_{timestamp}.csv")
+
+        if not jobs:
+            logger.error(" No raw data files found for any app. Scrape them first.")
+            return {}
+
+        logger.info(f" Processing {len(jobs)} apps with a shared budget of "
+                    f"{self.scheduler.requests_per_minute or 'unlimited'} requests/min")
+        try:
+            with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="app") as executor:
+                futures = {app_id: executor.submit(self._run_app, *job) for app_id, job in jobs.items()}
+                for app_id, future in futures.items():
+                    try:
+                        self.report[app_id] = future.result()
+                    except Exception as e:
+                        logger.error(f" Processing {app_id} failed: {e}")
+                        self.report[app_id] = {'reviews': 0, 'error': str(e)}
+        finally:
+            if cache:
+                cache.close()
+
+        for app_id, stats in self.scheduler.summary().items():
+            self.report[app_id].update(stats)
+        self.log_report()
+        return self.report
+
+    def log_report(self):
+        """Log per-app throughput and queue waits."""
+        report = pd.DataFrame.from_dict(self.report, orient='index')
+        columns = [col for col in ['weight', 'reviews', 'reviews_per_minute', 'requests', 'hedges', 'share',
+                                   'requests_per_minute', 'mean_wait_seconds', 'p95_wait_seconds',
+                                   'deadline_met'] if col in report.columns]
+        logger.info(" Per-app throughput and queue wait:\n" + report[columns].to_string())
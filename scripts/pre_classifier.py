@@ -0,0 +1,163 @@
+"""
+Local pre-classifier for Product Intelligence Engine.
+Resolves obvious reviews with keyword lexicons before they reach the LLM.
+"""
+
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config.config import PRECLASSIFIER_CONFIG, SUBCATEGORY_LEXICONS, FEEDBACK_CATEGORIES
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+# Subcategories that count as critical when the rating is low
+HIGH_PRIORITY_SUBCATEGORIES = {'Crash', 'Error', 'Bug', 'Login'}
+
+SENTIMENT_LABELS = np.array(['negative', 'neutral', 'positive'], dtype=object)
+PRIORITY_LABELS = np.array(['high', 'medium', 'low'], dtype=object)
+
+
+class LexiconPreClassifier:
+    """Rule/lexicon classifier applied vectorized over a DataFrame of reviews."""
+
+    name = "lexicon"
+
+    def __init__(self, lexicons: Dict[str, List[str]] = None, max_words: int = None):
+        """
+        Initialize the pre-classifier.
+
+        Args:
+            lexicons: Keywords per FEEDBACK_CATEGORIES subcategory
+            max_words: Reviews longer than this get a confidence penalty
+        """
+        self.lexicons = lexicons or SUBCATEGORY_LEXICONS
+        self.max_words = max_words or PRECLASSIFIER_CONFIG['max_words']
+        self.subcategory_to_category = {
+            sub: cat for cat, subs in FEEDBACK_CATEGORIES.items() for sub in subs
+        }
+        self.patterns = {
+            sub: re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b')
+            for sub, keywords in self.lexicons.items()
+            if keywords and sub in self.subcategory_to_category
+        }
+        # One combined pass finds every keyword; hits are then counted per subcategory
+        self.all_keywords = re.compile('|'.join(p.pattern for p in self.patterns.values())) \
+            if self.patterns else None
+        self.keyword_subcategories = {}
+        for index, sub in enumerate(self.patterns):
+            for keyword in self.lexicons[sub]:
+                self.keyword_subcategories.setdefault(keyword.lower(), []).append(index)
+
+    def _count_hits(self, matches: pd.Series, num_subcategories: int) -> np.ndarray:
+        """
+        Count keyword matches per subcategory.
+
+        Args:
+            matches: Matched keywords per review
+            num_subcategories: Number of lexicon subcategories
+
+        Returns:
+            Array of shape (reviews, subcategories) with hit counts
+        """
+        hits = np.zeros((len(matches), num_subcategories), dtype=int)
+        rows, columns = [], []
+        for row, found in enumerate(matches.tolist()):
+            for keyword in found:
+                for column in self.keyword_subcategories.get(keyword, ()):
+                    rows.append(row)
+                    columns.append(column)
+        np.add.at(hits, (np.asarray(rows, dtype=np.int64), np.asarray(columns, dtype=np.int64)), 1)
+        return hits
+
+    def predict(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Classify reviews and score the confidence of each prediction.
+
+        Args:
+            df: DataFrame with 'content' and 'rating' columns
+
+        Returns:
+            DataFrame indexed like `df` with classification columns and a
+            'confidence' column in [0, 1]
+        """
+        text = df['content'].fillna('').astype(str).str.lower()
+        rating = df['rating'].fillna(3).astype(int).to_numpy()
+        words = text.str.count(r'\S+').to_numpy()
+        has_letters = text.str.contains(r'[^\W\d_]', regex=True).to_numpy()
+
+        subcategories = list(self.patterns)
+        matches = text.str.findall(self.all_keywords) if subcategories \
+            else pd.Series([[]] * len(df), index=df.index)
+        hits = self._count_hits(matches, len(subcategories))
+
+        # Praise is handled separately from issue subcategories
+        praise_idx = subcategories.index('Praise') if 'Praise' in subcategories else None
+        issue_hits = hits.copy()
+        if praise_idx is not None:
+            issue_hits[:, praise_idx] = 0
+            praise_hits = hits[:, praise_idx]
+        else:
+            praise_hits = np.zeros(len(df), dtype=int)
+
+        sorted_hits = np.sort(issue_hits, axis=1)
+        top_hits = sorted_hits[:, -1] if subcategories else np.zeros(len(df), dtype=int)
+        second_hits = sorted_hits[:, -2] if len(subcategories) > 1 else np.zeros(len(df), dtype=int)
+        # Labels are chosen by code so every row shares the same string objects
+        labels = list(dict.fromkeys(subcategories + ['Praise', 'General Feedback']))
+        praise_code, general_code = labels.index('Praise'), labels.index('General Feedback')
+        top_code = issue_hits.argmax(axis=1) if subcategories else np.full(len(df), general_code)
+
+        sentiment = SENTIMENT_LABELS[np.where(rating <= 2, 0, np.where(rating == 3, 1, 2))]
+        long_penalty = np.where(words > self.max_words, 0.2, 0.0)
+        short_bonus = np.where(words <= 3, 0.1, 0.0)
+
+        # Issue rule: keyword hits, more confident when the rating agrees
+        issue_conf = 0.55 + 0.15 * np.minimum(top_hits, 2) + np.where(rating <= 2, 0.1, 0.0)
+        issue_conf += short_bonus - np.where(second_hits > 0, 0.25, 0.0) - long_penalty
+        issue_conf = np.where(top_hits > 0, issue_conf, 0.0)
+
+        # Praise rule: short positive review with no issue keywords
+        praise_conf = 0.7 + 0.1 * np.minimum(praise_hits, 2) + np.where(rating == 5, 0.05, 0.0)
+        praise_conf -= long_penalty
+        praise_conf = np.where((praise_hits > 0) & (top_hits == 0) & (rating >= 4), praise_conf, 0.0)
+
+        # Emoji/punctuation-only reviews carry nothing beyond the rating
+        no_text_conf = np.where(~has_letters & ((rating >= 4) | (rating <= 2)), 0.9, 0.0)
+
+        is_praise = (praise_conf >= issue_conf) & (praise_conf > 0)
+        is_no_text = no_text_conf > np.maximum(issue_conf, praise_conf)
+
+        sub_code = np.where(is_praise, praise_code, top_code)
+        sub_code = np.where(is_no_text, np.where(rating >= 4, praise_code, general_code), sub_code)
+        subcategory = np.array(labels, dtype=object)[sub_code]
+        category = np.array([self.subcategory_to_category.get(s, 'Other') for s in labels], dtype=object)[sub_code]
+
+        is_high = np.array([s in HIGH_PRIORITY_SUBCATEGORIES for s in labels])[sub_code]
+        priority = PRIORITY_LABELS[np.where(
+            is_high & (rating <= 2), 0,
+            np.where((rating <= 3) & (sub_code != praise_code), 1, 2)
+        )]
+
+        summaries = np.array(
+            ['Pujian umum untuk aplikasi' if s == 'Praise' else f'Keluhan terkait {s}' for s in labels]
+            + ['Ulasan negatif tanpa teks'], dtype=object
+        )
+        summary = summaries[np.where(is_no_text & (rating <= 2), len(labels), sub_code)]
+
+        keywords = matches.map(lambda k: list(dict.fromkeys(k))[:5])
+
+        confidence = np.clip(np.maximum.reduce([issue_conf, praise_conf, no_text_conf]), 0.0, 0.99)
+
+        return pd.DataFrame({
+            'category': category,
+            'subcategory': subcategory,
+            'sentiment': sentiment,
+            'priority': priority,
+            'summary': summary,
+            'keywords': keywords.to_numpy(),
+            'confidence': confidence,
+        }, index=df.index)
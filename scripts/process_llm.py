@@ -5,64 +5,96 @@ Uses Google Gemini API to classify and analyze user feedback.
 
 import time
 import json
+import shutil
+import hashlib
 import logging
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional, Tuple
 from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-import google.generativeai as genai
 from tqdm import tqdm
 
 from config.config import (
-    GEMINI_API_KEY, 
     LLM_CONFIG, 
+    CACHE_CONFIG,
+    DEDUP_CONFIG,
+    PRECLASSIFIER_CONFIG,
+    LOCAL_MODEL_CONFIG,
+    ROUTING_CONFIG,
+    SCHEDULING_CONFIG,
+    SAMPLING_CONFIG,
+    COMPACTION_CONFIG,
+    BATCH_JOB_CONFIG,
+    HEDGING_CONFIG,
+    FALLBACK_SUMMARY,
     FEEDBACK_CATEGORIES,
     RAW_DATA_DIR,
     PROCESSED_DATA_DIR,
+    SNAPSHOT_DIR,
+    CHECKPOINT_DIR,
+    DEAD_LETTER_DIR,
     REVIEW_SCHEMA
 )
-from utils import DataHandler, get_logger
+from utils import (
+    DataHandler,
+    RateLimiter,
+    ClassificationCache,
+    NearDuplicateClusterer,
+    RunJournal,
+    DeadLetterQueue,
+    ErrorKind,
+    RetryPolicy,
+    RetryStats,
+    CircuitBreaker,
+    classify_error,
+    retry_after_seconds,
+    required_sample_size,
+    stratified_sample,
+    TextCompactor,
+    Hedger,
+    AppLimiter,
+    estimate_tokens,
+    get_logger
+)
+from scripts.pre_classifier import LexiconPreClassifier
+from scripts.local_model import LocalClassifier
+from scripts.llm_backends import LLMBackend, create_backend
+from scripts.model_router import ModelRouter
+from scripts.batch_jobs import SUCCEEDED, request_line, write_jsonl, read_results, create_batch_client
+from scripts.scheduler import ProgressPublisher, impact_scores, order_units
+from scripts.response_parser import ResponseParser
+from scripts.taxonomy import (
+    TAXONOMY_COLUMN,
+    CATCH_ALL_CATEGORY,
+    taxonomy_hash,
+    save_taxonomy,
+    load_taxonomy,
+    diff_taxonomies,
+    describe_diff,
+    affected_rows
+)
 
 logger = get_logger(__name__)
 
+RESULT_FIELDS = ['category', 'subcategory', 'sentiment', 'priority', 'summary', 'keywords']
+AUDIT_FIELDS = ['category', 'subcategory', 'sentiment', 'priority']
+OUTPUT_COLUMNS = REVIEW_SCHEMA['processed_columns'] + ['keywords', 'cluster_id', 'label_source', 'status',
+                                                      'taxonomy_version', 'stratum', 'sample_weight']
+# 'failed': every LLM attempt failed and the row holds the fallback labels (see DeadLetterQueue)
+STATUS_OK, STATUS_FAILED = 'ok', 'failed'
 
-class FeedbackProcessor:
-    """Processes user feedback using LLM for classification and analysis."""
-    
-    def __init__(self):
-        """Initialize the LLM processor."""
-        if not GEMINI_API_KEY:
-            raise ValueError(" GEMINI_API_KEY not found in environment variables!")
-        
-        # Configure Gemini API
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(LLM_CONFIG['model'])
-        self.temperature = LLM_CONFIG['temperature']
-        self.max_retries = LLM_CONFIG['max_retries']
-        self.retry_delay = LLM_CONFIG['retry_delay']
-        
-        logger.info(f" Initialized Gemini model: {LLM_CONFIG['model']}")
-    
-    def create_classification_prompt(self, review_content: str, rating: int) -> str:
-        """
-        Create a structured prompt for review classification.
-        
-        Args:
-            review_content: The review text
-            rating: Star rating (1-5)
-            
-        Returns:
-            Formatted prompt string
-        """
-        categories_str = json.dumps(FEEDBACK_CATEGORIES, indent=2, ensure_ascii=False)
-        
-        prompt = f"""Analisis ulasan pengguna berikut dan klasifikasikan dengan detail:
-
-ULASAN: "{review_content}"
-RATING: {rating}/5 
+# Prompts are a static prefix (instructions and taxonomy, built once) followed by the
+# reviews; the prefix can be sent once as a system instruction / cached context
+CATEGORY_NAMES = list(FEEDBACK_CATEGORIES.keys())
+CATEGORIES_JSON = json.dumps(FEEDBACK_CATEGORIES, indent=2, ensure_ascii=False)
+SINGLE_PROMPT_PREFIX = f"""Analisis ulasan pengguna yang diberikan dan klasifikasikan dengan detail.
 
 Berikan analisis dalam format JSON berikut:
 {{
-    "category": "kategori utama dari {list(FEEDBACK_CATEGORIES.keys())}",
+    "category": "kategori utama dari {CATEGORY_NAMES}",
     "subcategory": "sub-kategori yang spesifik",
     "sentiment": "positive/neutral/negative",
     "priority": "high/medium/low (berdasarkan severity dan impact)",
@@ -71,7 +103,7 @@ Berikan analisis dalam format JSON berikut:
 }}
 
 KATEGORI YANG TERSEDIA:
-{categories_str}
+{CATEGORIES_JSON}
 
 ATURAN:
 1. Pilih kategori yang paling sesuai
@@ -81,123 +113,1007 @@ ATURAN:
 5. Keywords maksimal 5 kata yang relevan
 
 Jawab HANYA dengan JSON, tanpa penjelasan tambahan."""
+BATCH_PROMPT_PREFIX = f"""Analisis setiap ulasan pengguna yang diberikan dan klasifikasikan masing-masing dengan detail.
+
+Berikan analisis dalam format JSON array, satu objek per ulasan:
+[
+    {{
+        "id": "id ulasan persis seperti pada input",
+        "category": "kategori utama dari {CATEGORY_NAMES}",
+        "subcategory": "sub-kategori yang spesifik",
+        "sentiment": "positive/neutral/negative",
+        "priority": "high/medium/low (berdasarkan severity dan impact)",
+        "summary": "ringkasan singkat masalah/feedback dalam 1-2 kalimat",
+        "keywords": ["kata kunci 1", "kata kunci 2", "kata kunci 3"]
+    }}
+]
 
-        return prompt
+KATEGORI YANG TERSEDIA:
+{CATEGORIES_JSON}
+
+ATURAN:
+1. Pilih kategori yang paling sesuai
+2. Sentiment harus konsisten dengan rating
+3. Priority HIGH untuk bug kritis, crash, atau masalah keamanan
+4. Summary harus dalam Bahasa Indonesia dan jelas
+5. Keywords maksimal 5 kata yang relevan
+6. Setiap ulasan harus memiliki tepat satu objek dengan "id" yang sama
+
+Jawab HANYA dengan JSON array, tanpa penjelasan tambahan."""
+
+# Compact response mode: the model answers with 1-based taxonomy codes (decoded by ResponseParser)
+CATEGORY_CODES = "\n".join(
+    f"{i} {category}: " + ", ".join(f"{j} {sub}" for j, sub in enumerate(subs, 1))
+    for i, (category, subs) in enumerate(FEEDBACK_CATEGORIES.items(), 1)
+)
+COMPACT_DETAILS = {
+    'all': ('"m": "ringkasan 1 kalimat", "k": ["kata kunci"]',
+            'Sertakan "m" (ringkasan singkat dalam Bahasa Indonesia) dan "k" (maksimal 5 kata kunci)'),
+    'flagged': ('"m": "ringkasan 1 kalimat", "k": ["kata kunci"]',
+                'Sertakan "m" (ringkasan singkat dalam Bahasa Indonesia) dan "k" (maksimal 5 kata kunci) '
+                'HANYA jika s = -1 atau p = "h"; selain itu hilangkan keduanya'),
+    'none': ('', 'Jangan sertakan "m" dan "k"'),
+}
+
+
+@lru_cache(maxsize=None)
+def compact_prompt_prefix(batch: bool, details: str) -> str:
+    """
+    Static prefix for the compact response format (built once per combination).
+    
+    Args:
+        batch: Batched prompt (array answer with "i" ids) instead of a single review
+        details: Which rows get a summary and keywords ('all', 'flagged' or 'none')
+        
+    Returns:
+        Prompt text preceding the review(s)
+    """
+    fields, rule = COMPACT_DETAILS[details]
+    schema = '"c": kode kategori, "sc": kode sub-kategori, "s": 1/0/-1, "p": "h/m/l"'
+    if fields:
+        schema += ", " + fields
+    if batch:
+        answer = f'JSON array, satu objek per ulasan:\n[{{"i": "id ulasan", {schema}}}]'
+    else:
+        answer = f'JSON:\n{{{schema}}}'
+    rules = [
+        "Pilih kategori yang paling sesuai",
+        "Sentiment harus konsisten dengan rating (s: 1 positive, 0 neutral, -1 negative)",
+        'Priority HIGH untuk bug kritis, crash, atau masalah keamanan (p: "h" high, "m" medium, "l" low)',
+        rule,
+        "Gunakan kode angka/huruf, bukan nama label",
+    ]
+    if batch:
+        rules.append('Setiap ulasan harus memiliki tepat satu objek dengan "i" yang sama')
+    rules_str = "\n".join(f"{i}. {r}" for i, r in enumerate(rules, 1))
     
-    def classify_review(self, review_content: str, rating: int) -> Optional[Dict]:
+    intro = ("Analisis setiap ulasan pengguna yang diberikan dan klasifikasikan masing-masing dengan detail."
+             if batch else "Analisis ulasan pengguna yang diberikan dan klasifikasikan dengan detail.")
+    return (f"{intro}\n\nBerikan analisis dalam format {answer}\n\nKODE KATEGORI (c) DAN SUB-KATEGORI (sc):\n"
+            f"{CATEGORY_CODES}\n\nATURAN:\n{rules_str}\n\n"
+            f"Jawab HANYA dengan JSON{' array' if batch else ''}, tanpa penjelasan tambahan.")
+
+
+def llm_source(classification: Dict) -> str:
+    """Label source for a classification returned by the LLM path ('default' if it fell back)."""
+    return 'default' if classification.get('summary') == FALLBACK_SUMMARY else 'llm'
+
+
+class ClassificationColumns:
+    """
+    Per-field result arrays filled in place as reviews are classified.
+    
+    Keeps results column-wise so local predictions, cluster propagation and
+    the final DataFrame assignment never round-trip through per-row dicts.
+    """
+    
+    def __init__(self, size: int):
+        """
+        Initialize empty result columns.
+        
+        Args:
+            size: Number of reviews
+        """
+        self.columns = {field: np.full(size, '', dtype=object) for field in RESULT_FIELDS}
+        self.sources = np.full(size, '', dtype=object)
+        self.errors = np.full(size, '', dtype=object)
+        self.filled = np.zeros(size, dtype=bool)
+    
+    def set(self, position: int, classification: Dict, source: str):
+        """Store one classification dict at a row position."""
+        for field, column in self.columns.items():
+            column[position] = classification.get(field, '')
+        self.sources[position] = source
+        self.errors[position] = classification.get('error', '')
+        self.filled[position] = True
+    
+    def set_many(self, positions: np.ndarray, predictions: pd.DataFrame, source: str):
+        """Store a frame of predictions (one row per position) column by column."""
+        for field, column in self.columns.items():
+            if field in predictions.columns:
+                column[positions] = predictions[field].to_numpy()
+        self.sources[positions] = source
+        self.filled[positions] = True
+    
+    def propagate(self, sources: np.ndarray):
+        """Fill unfilled rows from the row given by `sources` (e.g. their cluster representative)."""
+        missing = np.flatnonzero(~self.filled)
+        if missing.size == 0:
+            return
+        for column in list(self.columns.values()) + [self.sources, self.errors]:
+            column[missing] = column[sources[missing]]
+        self.filled[missing] = self.filled[sources[missing]]
+    
+    def partial_frame(self, df: pd.DataFrame, sources: np.ndarray) -> pd.DataFrame:
+        """
+        Rows of `df` whose source row is already classified, with their results.
+        
+        Args:
+            df: Reviews aligned by position
+            sources: Row each row takes its labels from (e.g. its cluster representative)
+            
+        Returns:
+            DataFrame of classified rows
+        """
+        done = self.filled[sources]
+        frame = df[done].copy()
+        for field, column in self.columns.items():
+            frame[field] = column[sources[done]]
+        frame['label_source'] = self.sources[sources[done]]
+        frame['status'] = np.where(self.errors[sources[done]] != '', STATUS_FAILED, STATUS_OK)
+        return frame
+    
+    def assign_to(self, df: pd.DataFrame):
+        """
+        Add the result columns to a DataFrame aligned by position, with where each
+        label came from, its status and (for failed rows) the error reason.
+        """
+        for field, column in self.columns.items():
+            df[field] = column
+        df['label_source'] = self.sources
+        df['status'] = np.where(self.errors != '', STATUS_FAILED, STATUS_OK)
+        df['error'] = self.errors
+
+
+class FeedbackProcessor:
+    """Processes user feedback using LLM for classification and analysis."""
+    
+    def __init__(self, use_cache: bool = None, pre_classifiers: List = None, backend: LLMBackend = None,
+                 batch_job: bool = False):
+        """
+        Initialize the LLM processor.
+        
+        Args:
+            use_cache: Use the persistent classification cache (default: CACHE_CONFIG['enabled'])
+            pre_classifiers: Local classifiers tried before the LLM, in order. Each must
+                provide `name` and `predict(df)` returning classification columns plus
+                'confidence', and may set `confidence_threshold` and `audit_rate`
+                (default: LexiconPreClassifier and the trained LocalClassifier, if enabled)
+            backend: LLM backend (default: created from LLM_CONFIG['backend'])
+            batch_job: Send LLM work as asynchronous batch jobs (BATCH_JOB_CONFIG)
+                instead of interactive calls
+        """
+        self.backend = backend or create_backend()
+        self.batch_job = batch_job
+        self.router = ModelRouter(self.backend) if ROUTING_CONFIG['enabled'] else None
+        self.temperature = LLM_CONFIG['temperature']
+        # Total attempts per request; at least one, or nothing would ever be sent
+        self.max_retries = max(1, int(LLM_CONFIG['max_retries']))
+        self.retry_delay = LLM_CONFIG['retry_delay']
+        self.batch_size = max(1, int(LLM_CONFIG.get('batch_size', 1)))
+        self.max_batch_tokens = LLM_CONFIG.get('max_batch_tokens')
+        self.response_format = LLM_CONFIG.get('response_format', 'full')
+        self.compact_details = LLM_CONFIG.get('compact_details', 'flagged')
+        self.static_prefix = LLM_CONFIG.get('static_prefix', True)
+        self.concurrency = max(1, int(LLM_CONFIG.get('concurrency', 1)))
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=LLM_CONFIG.get('requests_per_minute'),
+            tokens_per_minute=LLM_CONFIG.get('tokens_per_minute')
+        )
+        self.retry_policy = RetryPolicy(
+            max_retries=self.max_retries,
+            base_delay=self.retry_delay,
+            max_delay=LLM_CONFIG.get('max_retry_delay', 60)
+        )
+        self.retry_stats = RetryStats()
+        self.response_parser = ResponseParser(FEEDBACK_CATEGORIES)
+        self.taxonomy_version = taxonomy_hash()
+        self.compactor = None
+        if COMPACTION_CONFIG['enabled']:
+            self.compactor = TextCompactor(
+                max_tokens=COMPACTION_CONFIG['max_review_tokens'],
+                head_fraction=COMPACTION_CONFIG['head_fraction'],
+                max_repeat=COMPACTION_CONFIG['max_repeat']
+            )
+        self.hedger = None
+        if HEDGING_CONFIG['enabled']:
+            self.hedger = Hedger(
+                percentile=HEDGING_CONFIG['percentile'],
+                min_samples=HEDGING_CONFIG['min_samples'],
+                window=HEDGING_CONFIG['window'],
+                max_hedge_rate=HEDGING_CONFIG['max_hedge_rate'],
+                min_delay=HEDGING_CONFIG['min_delay'],
+                max_workers=2 * self.concurrency + 2
+            )
+        self.circuit_breaker = CircuitBreaker(
+            error_rate=LLM_CONFIG.get('breaker_error_rate', 0.5),
+            window=LLM_CONFIG.get('breaker_window', 20),
+            cooldown=LLM_CONFIG.get('breaker_cooldown', 30),
+            stats=self.retry_stats
+        )
+        
+        if use_cache is None:
+            use_cache = CACHE_CONFIG['enabled']
+        self.cache = self.open_cache() if use_cache else None
+        
+        if pre_classifiers is None:
+            pre_classifiers = [LexiconPreClassifier()] if PRECLASSIFIER_CONFIG['enabled'] else []
+            local_model = LocalClassifier.load() if LOCAL_MODEL_CONFIG['enabled'] else None
+            if local_model is not None:
+                pre_classifiers.append(local_model)
+        self.pre_classifiers = pre_classifiers
+        self.confidence_threshold = PRECLASSIFIER_CONFIG['confidence_threshold']
+        self.audits = []
+        self._audit_rng = np.random.default_rng()
+        self.stats = {}
+        
+        self.clusterer = None
+        if DEDUP_CONFIG['enabled']:
+            self.clusterer = NearDuplicateClusterer(
+                threshold=DEDUP_CONFIG['threshold'],
+                num_perm=DEDUP_CONFIG['num_perm'],
+                bands=DEDUP_CONFIG['bands'],
+                shingle_size=DEDUP_CONFIG['shingle_size']
+            )
+        
+        logger.info(f" Initialized {self.backend.name} backend with model: {self.backend.model_name}")
+        if self.router:
+            logger.info(f" Model routing across tiers: {', '.join(t['model'] for t in self.router.tiers)}")
+    
+    def prompt_version(self) -> str:
+        """
+        Hash of the prompt templates, input compaction, taxonomy, backend and model.
+        
+        Any change to these invalidates cached classifications.
+        
+        Returns:
+            Short hex digest
+        """
+        sentinel = {'id': '{id}', 'content': '{content}', 'rating': 0}
+        parts = [
+            self.prompt_prefix(),
+            self.prompt_prefix(batch=True),
+            self.create_classification_prompt(sentinel['content'], sentinel['rating']),
+            self.create_batch_classification_prompt([sentinel]),
+            json.dumps(FEEDBACK_CATEGORIES, sort_keys=True, ensure_ascii=False),
+            json.dumps(COMPACTION_CONFIG if self.compactor else None, sort_keys=True),
+            self.backend.name,
+            self.backend.model_name,
+        ]
+        return hashlib.sha256("\x1e".join(parts).encode('utf-8')).hexdigest()[:16]
+    
+    def open_cache(self) -> ClassificationCache:
+        """Open the persistent classification cache for the current prompt version."""
+        return ClassificationCache(
+            CACHE_CONFIG['path'],
+            prompt_version=self.prompt_version(),
+            max_entries=CACHE_CONFIG['max_entries']
+        )
+    
+    def prompt_prefix(self, batch: bool = False) -> str:
+        """
+        Static part of the prompt: instructions, answer format and taxonomy.
+        
+        Args:
+            batch: Prefix for batched prompts
+            
+        Returns:
+            Prefix text, identical on every call
+        """
+        if self.response_format == 'compact':
+            return compact_prompt_prefix(batch, self.compact_details)
+        return BATCH_PROMPT_PREFIX if batch else SINGLE_PROMPT_PREFIX
+    
+    def create_classification_prompt(self, review_content: str, rating: int) -> str:
+        """
+        Create the per-review part of a classification prompt (see prompt_prefix).
+        
+        Args:
+            review_content: The review text
+            rating: Star rating (1-5)
+            
+        Returns:
+            Formatted prompt string
+        """
+        return f'ULASAN: "{review_content}"\nRATING: {rating}/5'
+    
+    def create_batch_classification_prompt(self, batch: List[Dict]) -> str:
+        """
+        Create the per-call part of a prompt that classifies several reviews at once.
+        
+        Args:
+            batch: List of dicts with 'id', 'content' and 'rating' keys
+            
+        Returns:
+            Formatted prompt string
+        """
+        # One review object per line: valid JSON without indentation whitespace
+        reviews_str = "[\n" + ",\n".join(
+            json.dumps({'id': item['id'], 'rating': item['rating'], 'ulasan': item['content']}, ensure_ascii=False)
+            for item in batch
+        ) + "\n]"
+        
+        return f"ULASAN:\n{reviews_str}"
+    
+    def _generate(self, prompt: str, tier: int = 0, prefix: str = None):
+        """
+        Send a prompt to the backend, waiting for the circuit breaker and the
+        shared rate limiter first.
+        
+        With hedging on, a call slower than the learned latency percentile is
+        duplicated once if the rate limiter has room right now; the first
+        reply wins.
+        
+        Args:
+            prompt: Per-call prompt text
+            tier: Model tier index (ignored when routing is disabled)
+            prefix: Static prompt prefix, sent as a system instruction when
+                `static_prefix` is on and the backend supports it, else prepended
+            
+        Returns:
+            Response text
+        """
+        if prefix and not self.static_prefix:
+            prompt, prefix = f"{prefix}\n\n{prompt}", None
+        
+        tokens = estimate_tokens(prompt) + estimate_tokens(prefix)
+        self.circuit_breaker.before_call()
+        self.rate_limiter.acquire(tokens=tokens)
+        self.retry_stats.record_call()
+        
+        def call():
+            if self.router:
+                return self.router.generate(tier, prompt, self.temperature, prefix)
+            return self.backend.generate_with_prefix(prompt, self.temperature, prefix)
+        
+        try:
+            if self.hedger:
+                response = self.hedger.call(call, key=tier, allow=lambda: self.rate_limiter.try_acquire(tokens))
+            else:
+                response = call()
+        except Exception as e:
+            self.circuit_breaker.record_failure(classify_error(e))
+            raise
+        
+        self.circuit_breaker.record_success()
+        return response
+    
+    def _handle_failure(self, kind: str, attempt: int, error: Exception = None) -> bool:
+        """
+        Record a failed attempt and back off before the next one.
+        
+        Args:
+            kind: ErrorKind of the failure
+            attempt: 0-based attempt number that failed
+            error: Exception raised, if any (used for retry-after hints)
+            
+        Returns:
+            True if the caller should retry, False to give up
+        """
+        self.retry_stats.record_failure(kind)
+        
+        if not self.retry_policy.should_retry(kind, attempt):
+            return False
+        
+        retry_after = retry_after_seconds(error) if error is not None else None
+        delay = self.retry_policy.delay(kind, attempt, retry_after)
+        self.retry_stats.record_backoff(delay)
+        time.sleep(delay)
+        return True
+    
+    def classify_review(self, review_content: str, rating: int, tier: int = 0) -> Optional[Dict]:
         """
         Classify a single review using LLM.
         
         Args:
             review_content: The review text
             rating: Star rating
+            tier: Starting model tier; unusable replies escalate to the next tier
             
         Returns:
             Classification results or None if failed
         """
+        prompt = self.create_classification_prompt(review_content, rating)
+        
         for attempt in range(self.max_retries):
+            error = None
             try:
-                prompt = self.create_classification_prompt(review_content, rating)
+                response = self._generate(prompt, tier, self.prompt_prefix())
+                
+                # Parse, repair and validate the JSON response
+                result = self.response_parser.parse_single(response)
+                if result is not None:
+                    if self.cache:
+                        self.cache.put(review_content, rating, result)
+                    return result
                 
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=self.temperature,
-                    )
-                )
+                kind, reason = ErrorKind.PARSE, "unusable response"
+                logger.warning(f" Unusable response (attempt {attempt + 1}/{self.max_retries})")
+                logger.debug(f"Response text: {response[:200]}")
+                if self.router:
+                    tier = self.router.escalate(tier)
                 
-                # Parse JSON response
-                result_text = response.text.strip()
+            except Exception as e:
+                error, kind, reason = e, classify_error(e), str(e)
+                logger.warning(f" Classification error [{kind}] (attempt {attempt + 1}/{self.max_retries}): {e}")
+            
+            if not self._handle_failure(kind, attempt, error):
+                break
+        
+        # Return default classification if all retries failed
+        logger.error(f" Failed to classify review after {attempt + 1} attempts")
+        return self._get_default_classification(rating, error=f"{kind}: {reason}")
+    
+    def classify_batch(self, batch: List[Dict], tier: int = 0) -> Dict[str, Dict]:
+        """
+        Classify several reviews with one LLM call per attempt.
+        
+        Reviews whose ID is missing or invalid in the response are re-queued
+        on the next attempt (on the next model tier when routing); the rest are kept.
+        
+        Args:
+            batch: List of dicts with 'id', 'content' and 'rating' keys
+            tier: Starting model tier
+            
+        Returns:
+            Mapping of review ID to classification results
+        """
+        results = {}
+        pending = list(batch)
+        prompt = self.create_batch_classification_prompt(pending)
+        
+        for attempt in range(self.max_retries):
+            error = None
+            try:
+                response = self._generate(prompt, tier, self.prompt_prefix(batch=True))
                 
-                # Remove markdown code blocks if present
-                if result_text.startswith('```json'):
-                    result_text = result_text[7:]
-                if result_text.startswith('```'):
-                    result_text = result_text[3:]
-                if result_text.endswith('```'):
-                    result_text = result_text[:-3]
+                # Valid items are kept even if the rest of the reply is broken
+                parsed = self.response_parser.parse_batch(response)
                 
-                result = json.loads(result_text.strip())
+                pending_ids = {item['id'] for item in pending}
+                for result in parsed:
+                    review_id = str(result['id'])
+                    if review_id in pending_ids:
+                        results[review_id] = {k: v for k, v in result.items() if k != 'id'}
+                        if self.cache:
+                            item = next(item for item in pending if item['id'] == review_id)
+                            self.cache.put(item['content'], item['rating'], results[review_id])
                 
-                # Validate required fields
-                required_fields = ['category', 'subcategory', 'sentiment', 'priority', 'summary']
-                if all(field in result for field in required_fields):
-                    return result
-                else:
-                    logger.warning(f" Missing fields in response: {result}")
-                    
-            except json.JSONDecodeError as e:
-                logger.warning(f" JSON parse error (attempt {attempt + 1}/{self.max_retries}): {e}")
-                logger.debug(f"Response text: {response.text[:200]}")
+                pending = [item for item in pending if item['id'] not in results]
+                if not pending:
+                    return results
+                
+                # Only the missing reviews are re-sent
+                prompt = self.create_batch_classification_prompt(pending)
+                kind, reason = ErrorKind.PARSE, "missing or invalid in batch response"
+                logger.warning(f" Batch response missing {len(pending)}/{len(batch)} reviews (attempt {attempt + 1}/{self.max_retries})")
+                if self.router:
+                    tier = self.router.escalate(tier, len(pending))
                 
             except Exception as e:
-                logger.warning(f" Classification error (attempt {attempt + 1}/{self.max_retries}): {e}")
+                error, kind, reason = e, classify_error(e), str(e)
+                logger.warning(f" Batch classification error [{kind}] (attempt {attempt + 1}/{self.max_retries}): {e}")
             
-            # Wait before retry
-            if attempt < self.max_retries - 1:
-                time.sleep(self.retry_delay)
+            if not self._handle_failure(kind, attempt, error):
+                break
         
-        # Return default classification if all retries failed
-        logger.error(f" Failed to classify review after {self.max_retries} attempts")
-        return self._get_default_classification(rating)
+        logger.error(f" Failed to classify {len(pending)} reviews in batch after {attempt + 1} attempts")
+        for item in pending:
+            results[item['id']] = self._get_default_classification(item['rating'], error=f"{kind}: {reason}")
+        
+        return results
     
-    def _get_default_classification(self, rating: int) -> Dict:
+    def _get_default_classification(self, rating: int, error: str = None) -> Dict:
         """
         Get default classification for failed cases.
         
         Args:
             rating: Star rating
+            error: Why classification failed; marks the row 'failed' for the dead-letter store
             
         Returns:
             Default classification dictionary
         """
         sentiment = "negative" if rating <= 2 else ("neutral" if rating == 3 else "positive")
         
-        return {
+        classification = {
             'category': 'Other',
             'subcategory': 'General Feedback',
             'sentiment': sentiment,
             'priority': 'low',
-            'summary': 'Klasifikasi otomatis gagal',
+            'summary': FALLBACK_SUMMARY,
             'keywords': []
         }
+        if error:
+            classification['error'] = error
+        return classification
     
-    def process_reviews(self, reviews_df: pd.DataFrame) -> pd.DataFrame:
+    def process_reviews(self, reviews_df: pd.DataFrame, journal: RunJournal = None,
+                        completed: Dict[str, Dict] = None, publisher: ProgressPublisher = None,
+                        new_run: bool = True) -> pd.DataFrame:
         """
         Process multiple reviews in batch.
         
+        With SCHEDULING_CONFIG['priority_first'], LLM work is ordered by impact
+        score (low rating, thumbs-up, recency) so critical reviews finish first.
+        
         Args:
             reviews_df: DataFrame with review data
+            journal: Checkpoint journal that receives each completed LLM classification
+            completed: Classifications from a previous run, keyed by review_id
+            publisher: Receives partial results every few completions
+            new_run: Reset the run-wide compaction and hedging counters (False for later pages of a stream)
             
         Returns:
             DataFrame with classification results added
         """
         logger.info(f"🤖 Processing {len(reviews_df)} reviews with LLM...")
         
-        classifications = []
+        results = ClassificationColumns(len(reviews_df))
+        pending = []
+        self.stats = {'total': len(reviews_df), 'local': 0, 'cache': 0, 'llm': 0}
+        self.audits = []
+        if new_run:
+            self._reset_run_counters()
+        
+        contents = reviews_df['content'].fillna('').astype(str).tolist()
+        ratings = reviews_df['rating'].fillna(3).astype(int).tolist()
+        review_ids = reviews_df['review_id'].astype(str).tolist()
+        
+        # Reuse classifications checkpointed by an interrupted run; failed ones are retried
+        if completed:
+            for position, review_id in enumerate(review_ids):
+                if review_id in completed and not completed[review_id].get('error'):
+                    results.set(position, completed[review_id], llm_source(completed[review_id]))
+            self.stats['resumed'] = int(results.filled.sum())
+            logger.info(f" Resuming: {self.stats['resumed']} reviews already classified")
         
-        for idx, row in tqdm(reviews_df.iterrows(), total=len(reviews_df), desc="Classifying reviews"):
-            review_content = str(row.get('content', ''))
-            rating = int(row.get('rating', 3))
+        # Group near-duplicates so only one representative per cluster is classified
+        if self.clusterer:
+            cluster_ids = np.asarray(self.clusterer.cluster(contents, ratings), dtype=np.int64)
+        else:
+            cluster_ids = np.arange(len(reviews_df), dtype=np.int64)
+        _, first_positions, cluster_index = np.unique(cluster_ids, return_index=True, return_inverse=True)
+        representative_of = first_positions[cluster_index]
+        representatives = np.sort(first_positions)
+        
+        # Resolve obvious reviews locally before spending LLM calls on them
+        local_start = time.time()
+        local_confidence = self._apply_pre_classifiers(
+            reviews_df, representatives[~results.filled[representatives]], results
+        )
+        local_seconds = time.time() - local_start
+        
+        impact = impact_scores(reviews_df) if SCHEDULING_CONFIG['priority_first'] else np.zeros(len(reviews_df))
+        
+        # Row position is used as the review ID so it is stable across retries
+        for position in representatives[~results.filled[representatives]].tolist():
+            review_content, rating = contents[position], ratings[position]
             
             # Skip empty reviews
             if not review_content or review_content.strip() == '':
-                classification = self._get_default_classification(rating)
-            else:
-                classification = self.classify_review(review_content, rating)
+                results.set(position, self._get_default_classification(rating), 'default')
+                continue
+            
+            # Only the compacted text reaches the prompt, so it is also the cache key
+            prompt_content = self.compactor.compact(review_content) if self.compactor else review_content
             
-            classifications.append(classification)
+            # Cache hits never reach the router or a worker slot
+            if self.cache:
+                cached = self.cache.get(prompt_content, rating)
+                if cached is not None:
+                    results.set(position, cached, 'cache')
+                    self.stats['cache'] += 1
+                    continue
             
-            # Small delay to avoid rate limiting
-            time.sleep(0.5)
+            item = {'id': f"R{position}", 'content': prompt_content, 'rating': rating, 'tier': 0,
+                    'impact': float(impact[position]), 'tokens': estimate_tokens(prompt_content)}
+            if self.router:
+                item['tier'], reasons = self.router.initial_tier(review_content, rating, local_confidence[position])
+                self.router.record_routed(item['tier'], reasons)
+            pending.append(item)
+        
+        self.stats['llm'] = len(pending)
+        llm_start = time.time()
+        
+        # Batches never mix tiers; the highest-impact reviews are batched and sent first
+        pending.sort(key=lambda item: -item['impact'])
+        units = []
+        for tier in sorted({item['tier'] for item in pending}):
+            units.extend(self._pack_units([item for item in pending if item['tier'] == tier]))
+        units = order_units(units)
+        if isinstance(self.rate_limiter, AppLimiter) and not self.batch_job:
+            # The fair-share scheduler needs the app's remaining work to judge its deadline
+            self.rate_limiter.expect(len(units))
+        
+        # Locally resolved reviews are visible before the first LLM call returns
+        if publisher and pending and results.filled.any():
+            publisher.publish(results.partial_frame(reviews_df, representative_of), len(reviews_df))
+        
+        with tqdm(total=len(representatives), desc="Classifying reviews") as pbar:
+            pbar.update(len(representatives) - len(pending))
+            
+            run_units = self._run_batch_job if self.batch_job else self._run_units
+            for unit, unit_results in run_units(units):
+                for item in unit:
+                    results.set(int(item['id'][1:]), unit_results[item['id']], llm_source(unit_results[item['id']]))
+                if journal:
+                    journal.append((review_ids[int(item['id'][1:])], unit_results[item['id']]) for item in unit)
+                pbar.update(len(unit))
+                if publisher and publisher.due(len(unit)):
+                    publisher.publish(results.partial_frame(reviews_df, representative_of), len(reviews_df))
+        
+        llm_seconds = time.time() - llm_start
+        self._record_audits(results)
+        
+        # Copy each representative's labels to the rest of its cluster
+        results.propagate(representative_of)
+        
+        if self.clusterer:
+            logger.info(f" Near-duplicate clustering: {len(reviews_df)} reviews -> {len(representatives)} clusters")
+        if self.pre_classifiers:
+            by_classifier = ", ".join(f"{pc.name}: {self.stats.get(f'local_{pc.name}', 0)}" for pc in self.pre_classifiers)
+            logger.info(f" Resolved locally: {self.stats['local']} reviews ({by_classifier}) in {local_seconds:.2f}s | "
+                        f"via LLM: {self.stats['llm']} reviews in {llm_seconds:.1f}s")
+        if self.batch_size > 1:
+            logger.info(f" Sent {len(pending)} reviews in {len(units)} batched requests")
+        if self.compactor and self.compactor.stats['reviews']:
+            compaction = self.compactor.summary()
+            self.stats['compaction'] = compaction
+            logger.info(f" Input compaction: {compaction['normalized']} reviews normalized, "
+                        f"{compaction['truncated']} truncated, ~{compaction['tokens_before']} -> "
+                        f"~{compaction['tokens_after']} review tokens ({compaction['saved_pct']:.1f}% saved)")
+        if self.cache:
+            stats = self.cache.stats()
+            logger.info(f" Cache: {stats['hits']} hits, {stats['misses']} misses "
+                        f"({stats['hit_rate']:.0%} hit rate, {stats['size']} entries)")
+        if self.rate_limiter.total_wait > 0:
+            logger.info(f" Rate limiter wait: {self.rate_limiter.total_wait:.1f}s total")
+        if pending:
+            self._log_prefix_usage()
+        if self.hedger and self.hedger.calls:
+            hedging = self.hedger.summary()
+            self.stats['hedging'] = hedging
+            logger.info(f" Hedging: {hedging['hedged']}/{hedging['calls']} calls hedged "
+                        f"({hedging['hedge_wins']} won, {hedging['capped']} held back by the cap) | "
+                        f"p99 {hedging['p99_seconds_unhedged']:.2f}s -> {hedging['p99_seconds']:.2f}s "
+                        f"({hedging['p99_reduction_pct']:.0f}% lower)")
+        if self.router and pending:
+            self.router.log_summary()
+            self.stats['routing'] = self.router.summary()
+        self.stats['retry'] = self.retry_stats.as_dict()
+        self.stats['parse'] = dict(self.response_parser.stats)
         
         # Add classifications to dataframe
-        for key in ['category', 'subcategory', 'sentiment', 'priority', 'summary', 'keywords']:
-            reviews_df[key] = [c.get(key, '') for c in classifications]
+        results.assign_to(reviews_df)
+        reviews_df['cluster_id'] = cluster_ids
+        reviews_df[TAXONOMY_COLUMN] = self.taxonomy_version
+        
+        self.stats['failed'] = int((reviews_df['status'] == STATUS_FAILED).sum())
+        if self.stats['failed']:
+            logger.warning(f" {self.stats['failed']} reviews failed classification and carry fallback labels")
         
         logger.info(" Classification completed!")
         return reviews_df
     
+    def _reset_run_counters(self):
+        """Clear the counters that span a whole run (compaction savings, hedging latencies)."""
+        if self.compactor:
+            self.compactor.reset()
+        if self.hedger:
+            self.hedger.reset()
+    
+    @staticmethod
+    def _merge_page_stats(totals: Dict, page: Dict) -> Dict:
+        """
+        Fold one page's stats into the totals of a streamed run.
+        
+        Counts are summed and audit agreement is re-weighted by audited rows.
+        The other nested stats (routing, retry, parse, prefix, compaction,
+        hedging) come from counters that live for the whole run, so the
+        latest page's snapshot already covers every page.
+        
+        Args:
+            totals: Stats of the pages so far (updated in place)
+            page: self.stats after process_reviews on one page
+            
+        Returns:
+            The updated totals
+        """
+        for key, value in page.items():
+            if key == 'audit':
+                audits = totals.setdefault('audit', {})
+                for name, audit in value.items():
+                    previous = audits.get(name)
+                    if previous is None:
+                        audits[name] = dict(audit)
+                        continue
+                    rows = previous['rows'] + audit['rows']
+                    audits[name] = {
+                        field: rows if field == 'rows' else
+                        round((previous[field] * previous['rows'] + audit[field] * audit['rows']) / rows, 4)
+                        for field in audit
+                    }
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+            else:
+                totals[key] = value
+        return totals
+    
+    def _apply_pre_classifiers(self, reviews_df: pd.DataFrame, positions: np.ndarray,
+                               results: 'ClassificationColumns') -> np.ndarray:
+        """
+        Run the local pre-classifiers and keep predictions above the threshold.
+        
+        Each pre-classifier only sees rows that earlier ones left unresolved.
+        
+        Args:
+            reviews_df: DataFrame with review data
+            positions: Row positions eligible for local classification
+            results: Per-row result columns, filled in place
+            
+        Returns:
+            Best local confidence per row (0 where no pre-classifier ran)
+        """
+        remaining = np.asarray(positions, dtype=np.int64)
+        local_confidence = np.zeros(len(reviews_df))
+        
+        for pre_classifier in self.pre_classifiers:
+            if remaining.size == 0:
+                break
+            
+            predictions = pre_classifier.predict(reviews_df.iloc[remaining])
+            threshold = getattr(pre_classifier, 'confidence_threshold', None) or self.confidence_threshold
+            confidence = predictions['confidence'].to_numpy()
+            local_confidence[remaining] = np.maximum(local_confidence[remaining], confidence)
+            confident = confidence >= threshold
+            
+            # A random share of confident rows still goes to the LLM to track agreement
+            audited = np.zeros(len(remaining), dtype=bool)
+            if getattr(pre_classifier, 'audit_rate', 0):
+                audited = confident & (self._audit_rng.random(len(remaining)) < pre_classifier.audit_rate)
+                self.audits.append((pre_classifier.name, remaining[audited], predictions[audited]))
+                confident &= ~audited
+            
+            results.set_many(remaining[confident], predictions[confident], pre_classifier.name)
+            
+            self.stats['local'] += int(confident.sum())
+            self.stats[f"local_{pre_classifier.name}"] = int(confident.sum())
+            remaining = remaining[~confident & ~audited]
+        
+        return local_confidence
+    
+    def _record_audits(self, results: ClassificationColumns):
+        """
+        Compare audited local predictions with the LLM labels for the same rows.
+        
+        Args:
+            results: Per-row result columns after the LLM pass
+        """
+        for name, positions, predictions in self.audits:
+            judged = np.isin(results.sources[positions], ['llm', 'cache'])
+            positions, predictions = positions[judged], predictions[judged]
+            if positions.size == 0:
+                continue
+            
+            agree = {
+                field: results.columns[field][positions] == predictions[field].to_numpy()
+                for field in AUDIT_FIELDS
+            }
+            all_fields = np.logical_and.reduce(list(agree.values()))
+            self.stats.setdefault('audit', {})[name] = {
+                'rows': int(positions.size),
+                **{field: round(float(hits.mean()), 4) for field, hits in agree.items()},
+                'all_fields': round(float(all_fields.mean()), 4),
+            }
+            logger.info(f" Audit ({name}): {all_fields.mean():.0%} full agreement with LLM "
+                        f"on {positions.size} sampled confident predictions")
+    
+    def _log_prefix_usage(self):
+        """Log how the static prompt prefix was sent and how much of it was served from a context cache."""
+        backends = self.router.backends if self.router else [self.backend]
+        usage = {key: sum(b.prefix_stats[key] for b in backends) for key in backends[0].prefix_stats}
+        input_tokens = usage['prefix_tokens'] + usage['payload_tokens']
+        usage['cached_pct'] = round(usage['cached_tokens'] / input_tokens * 100, 1) if input_tokens else 0.0
+        self.stats['prefix'] = usage
+        
+        if usage['system_instruction'] or usage['inlined']:
+            logger.info(f" Static prefix: {usage['system_instruction']} calls as system instruction, "
+                        f"{usage['inlined']} prepended | context cache: {usage['cache_hits']} hits, "
+                        f"~{usage['cached_tokens']} of ~{input_tokens} input tokens cached ({usage['cached_pct']:.0f}%)")
+    
+    def _pack_units(self, items: List[Dict]) -> List[List[Dict]]:
+        """
+        Split reviews into work units of at most `batch_size` reviews and,
+        when set, `max_batch_tokens` estimated review tokens.
+        
+        Args:
+            items: Pending review dicts with a 'tokens' estimate, in send order
+            
+        Returns:
+            List of work units, order preserved
+        """
+        units, unit, unit_tokens = [], [], 0
+        for item in items:
+            over_budget = self.max_batch_tokens and unit_tokens + item['tokens'] > self.max_batch_tokens
+            if unit and (len(unit) >= self.batch_size or over_budget):
+                units.append(unit)
+                unit, unit_tokens = [], 0
+            unit.append(item)
+            unit_tokens += item['tokens']
+        if unit:
+            units.append(unit)
+        return units
+    
+    def _classify_unit(self, unit: List[Dict]) -> Dict[str, Dict]:
+        """
+        Classify one work unit (a single review or a batch of reviews).
+        
+        Args:
+            unit: List of dicts with 'id', 'content' and 'rating' keys
+            
+        Returns:
+            Mapping of review ID to classification results
+        """
+        tier = unit[0].get('tier', 0)
+        if self.batch_size == 1:
+            item = unit[0]
+            return {item['id']: self.classify_review(item['content'], item['rating'], tier)}
+        return self.classify_batch(unit, tier)
+    
+    def _run_units(self, units: List[List[Dict]]):
+        """
+        Classify work units, concurrently when `concurrency` > 1.
+        
+        Args:
+            units: Work units to classify
+            
+        Yields:
+            (unit, results) tuples in completion order
+        """
+        if self.concurrency == 1:
+            for unit in units:
+                yield unit, self._classify_unit(unit)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self._classify_unit, unit): unit for unit in units}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def _unit_prompt(self, unit: List[Dict]) -> Tuple[str, Optional[str]]:
+        """
+        Prompt and static prefix for one work unit, as _classify_unit would send them.
+        
+        Args:
+            unit: List of dicts with 'id', 'content' and 'rating' keys
+            
+        Returns:
+            (prompt, prefix); the prefix is inlined and None when `static_prefix` is off
+        """
+        if self.batch_size == 1:
+            prompt = self.create_classification_prompt(unit[0]['content'], unit[0]['rating'])
+            prefix = self.prompt_prefix()
+        else:
+            prompt = self.create_batch_classification_prompt(unit)
+            prefix = self.prompt_prefix(batch=True)
+        if not self.static_prefix:
+            return f"{prefix}\n\n{prompt}", None
+        return prompt, prefix
+    
+    def _parse_unit_response(self, unit: List[Dict], response: str) -> Dict[str, Dict]:
+        """
+        Usable classifications in a reply to a work unit's prompt, cached as they are read.
+        
+        Args:
+            unit: List of dicts with 'id', 'content' and 'rating' keys
+            response: Response text
+            
+        Returns:
+            Mapping of review ID to classification results (reviews missing from the reply are left out)
+        """
+        if self.batch_size == 1:
+            result = self.response_parser.parse_single(response)
+            parsed = [{**result, 'id': unit[0]['id']}] if result is not None else []
+        else:
+            parsed = self.response_parser.parse_batch(response)
+        
+        items = {item['id']: item for item in unit}
+        results = {}
+        for result in parsed:
+            review_id = str(result['id'])
+            if review_id in items and review_id not in results:
+                results[review_id] = {k: v for k, v in result.items() if k != 'id'}
+                if self.cache:
+                    self.cache.put(items[review_id]['content'], items[review_id]['rating'], results[review_id])
+        return results
+    
+    def _run_batch_job(self, units: List[List[Dict]]):
+        """
+        Classify work units through one asynchronous batch job per model tier.
+        
+        Each unit becomes one line of a JSONL request file keyed by unit; the
+        jobs are submitted together, polled until they finish and their results
+        ingested by review ID. Reviews without a usable result (failed requests,
+        broken replies, failed or timed-out jobs) then go through the
+        interactive path.
+        
+        Args:
+            units: Work units to classify
+            
+        Yields:
+            (unit, results) tuples; a unit split by fallback is yielded in parts
+        """
+        run_dir = BATCH_JOB_CONFIG['dir'] / datetime.now().strftime("%Y%m%d_%H%M%S")
+        stats = {'jobs': 0, 'requests': 0, 'reviews': sum(len(unit) for unit in units), 'ingested': 0,
+                 'fallback': 0, 'wait_seconds': 0.0}
+        self.stats['batch_job'] = stats
+        jobs = []
+        
+        # Every tier's job is submitted before waiting on any, so they run side by side
+        for tier in sorted({unit[0].get('tier', 0) for unit in units}):
+            backend = self.router.backends[tier] if self.router else self.backend
+            keyed = {f"U{n}": unit for n, unit in enumerate(units) if unit[0].get('tier', 0) == tier}
+            prompts = {key: self._unit_prompt(unit) for key, unit in keyed.items()}
+            
+            request_file = run_dir / f"{backend.model_name}_requests.jsonl"
+            count = write_jsonl((request_line(key, prompt, self.temperature, prefix)
+                                 for key, (prompt, prefix) in prompts.items()), request_file)
+            client = create_batch_client(backend, jobs_dir=run_dir)
+            job_id = client.submit(request_file, f"pi-engine-{run_dir.name}-{backend.model_name}")
+            logger.info(f" Submitted batch job {job_id}: {count} requests "
+                        f"({sum(len(unit) for unit in keyed.values())} reviews) to {backend.model_name}")
+            jobs.append((tier, client, job_id, keyed, prompts))
+            stats['jobs'] += 1
+            stats['requests'] += count
+        
+        wait_start = time.time()
+        fallback = []
+        for tier, client, job_id, keyed, prompts in jobs:
+            state = client.wait(job_id)
+            stats['wait_seconds'] = round(time.time() - wait_start, 1)
+            if state != SUCCEEDED:
+                logger.error(f" Batch job {job_id} ended {state}; its {len(keyed)} requests fall back to interactive calls")
+                fallback.extend(keyed.values())
+                continue
+            
+            responses = read_results(client.download(job_id, run_dir / f"{client.model_name}_results.jsonl"))
+            logger.info(f" Batch job {job_id} succeeded after {stats['wait_seconds']:.0f}s: "
+                        f"{len(responses)}/{len(keyed)} results")
+            for key, unit in keyed.items():
+                response, error = responses.get(key, (None, 'missing from results'))
+                if self.router:
+                    self.router.record_batch_request(tier, *prompts[key], response, BATCH_JOB_CONFIG['price_factor'])
+                if error:
+                    logger.debug(f"Batch request {key} failed: {error}")
+                
+                results = self._parse_unit_response(unit, response) if response is not None else {}
+                done = [item for item in unit if item['id'] in results]
+                missing = [item for item in unit if item['id'] not in results]
+                if done:
+                    stats['ingested'] += len(done)
+                    yield done, results
+                if missing:
+                    fallback.append(missing)
+        
+        stats['fallback'] = sum(len(unit) for unit in fallback)
+        if fallback:
+            logger.warning(f" {stats['fallback']} reviews without a usable batch result; classifying them interactively")
+            yield from self._run_units(fallback)
+        
+        if not BATCH_JOB_CONFIG['keep_files']:
+            shutil.rmtree(run_dir, ignore_errors=True)
+    
     def save_processed_data(self, df: pd.DataFrame, filename: str = None) -> bool:
         """
         Save processed reviews to CSV.
@@ -217,13 +1133,12 @@ Jawab HANYA dengan JSON, tanpa penjelasan tambahan."""
             filepath = PROCESSED_DATA_DIR / filename
             
             # Select only relevant columns
-            output_columns = REVIEW_SCHEMA['processed_columns'] + ['keywords']
-            available_columns = [col for col in output_columns if col in df.columns]
+            available_columns = [col for col in OUTPUT_COLUMNS if col in df.columns]
             
-            df_output = df[available_columns]
-            success = DataHandler.save_to_csv(df_output.to_dict('records'), filepath)
+            success = DataHandler.save_to_csv(df, filepath, columns=available_columns)
             
             if success:
+                save_taxonomy()
                 logger.info(f" Processed data saved to: {filepath}")
             
             return success
@@ -232,13 +1147,21 @@ Jawab HANYA dengan JSON, tanpa penjelasan tambahan."""
             logger.error(f" Error saving processed data: {e}")
             return False
     
-    def run(self, input_file: str, output_file: str = None) -> pd.DataFrame:
+    def run(self, input_file: str, output_file: str = None, resume: bool = False,
+            sample_margin: float = None, publish_progress: bool = True) -> pd.DataFrame:
         """
         Run the complete processing pipeline.
         
+        Completed LLM classifications are checkpointed to a journal in
+        CHECKPOINT_DIR, and partial results are published to SNAPSHOT_DIR and
+        the dashboard summary; both are cleaned up once the output is saved.
+        
         Args:
             input_file: Path to raw reviews CSV
             output_file: Path for output file (optional)
+            resume: Skip reviews already classified by an interrupted run on the same input
+            sample_margin: Classify only a stratified sample sized for this margin of error
+            publish_progress: Publish partial results (off when several runs share the dashboard)
             
         Returns:
             Processed DataFrame
@@ -263,11 +1186,33 @@ Jawab HANYA dengan JSON, tanpa penjelasan tambahan."""
         # Clean data
         df = DataHandler.clean_reviews(df)
         
-        # Process with LLM
-        df_processed = self.process_reviews(df)
+        if sample_margin:
+            df = self.sample_reviews(df, sample_margin)
+        
+        # Process with LLM, checkpointing as we go
+        journal = RunJournal(CHECKPOINT_DIR / f"{Path(input_file).stem}.jsonl")
+        completed = journal.load() if resume else {}
+        if not resume and journal.filepath.exists():
+            logger.info(f" Discarding previous checkpoint: {journal.filepath}")
+            journal.remove()
+        
+        if not output_file:
+            output_file = f"processed_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        publisher = None
+        if publish_progress and SCHEDULING_CONFIG['snapshot_every']:
+            publisher = ProgressPublisher(SNAPSHOT_DIR / output_file, columns=OUTPUT_COLUMNS)
+        
+        try:
+            df_processed = self.process_reviews(df, journal=journal, completed=completed, publisher=publisher)
+        finally:
+            journal.close()
         
         # Save results
-        self.save_processed_data(df_processed, output_file)
+        if self.save_processed_data(df_processed, output_file):
+            journal.remove()
+            self.record_dead_letters(df_processed, output_file)
+            if publisher:
+                publisher.finish(df_processed, PROCESSED_DATA_DIR / output_file)
         
         # Display summary
         self._display_summary(df_processed)
@@ -278,11 +1223,326 @@ Jawab HANYA dengan JSON, tanpa penjelasan tambahan."""
         
         return df_processed
     
+    def run_stream(self, pages: Iterable[List[Dict]], output_file: str = None,
+                   publish_progress: bool = True) -> pd.DataFrame:
+        """
+        Classify reviews page by page as they arrive, then save them like run().
+        
+        Each page is validated, cleaned and classified as soon as it is taken
+        from `pages`, so producing pages (scraping) overlaps with the LLM
+        calls. Duplicate contents are dropped across pages, as cleaning the
+        whole file would; near-duplicate clusters are formed within a page.
+        
+        Args:
+            pages: Lists of raw review dicts, e.g. scraper pages from a bounded queue
+            output_file: Path for output file (optional)
+            publish_progress: Publish the reviews classified so far (every SCHEDULING_CONFIG['snapshot_every'])
+            
+        Returns:
+            Processed DataFrame
+        """
+        logger.info("=" * 60)
+        logger.info("🤖 Starting Streaming LLM Processing")
+        logger.info("=" * 60)
+        
+        if not output_file:
+            output_file = f"processed_reviews_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        journal = RunJournal(CHECKPOINT_DIR / f"{Path(output_file).stem}.jsonl")
+        publisher = None
+        if publish_progress and SCHEDULING_CONFIG['snapshot_every']:
+            publisher = ProgressPublisher(SNAPSHOT_DIR / output_file, columns=OUTPUT_COLUMNS)
+        
+        processed = []
+        totals = {}
+        seen_contents = set()
+        self._reset_run_counters()
+        rows = 0
+        idle_seconds = 0.0
+        try:
+            waiting = time.time()
+            for page in pages:
+                idle_seconds += time.time() - waiting
+                df = pd.DataFrame(page)
+                if df.empty or not DataHandler.validate_reviews(df, REVIEW_SCHEMA['required_columns']):
+                    logger.error(f" Skipping a page of {len(df)} reviews that failed validation")
+                    waiting = time.time()
+                    continue
+                
+                df = df[~df['content'].isin(seen_contents)]
+                seen_contents.update(df['content'].dropna())
+                df = DataHandler.clean_reviews(df)
+                if not df.empty:
+                    df = self.process_reviews(df, journal=journal, new_run=False)
+                    # Cluster IDs are per page; offset them so they stay unique in the output
+                    df['cluster_id'] = df['cluster_id'] + rows
+                    rows += len(df)
+                    processed.append(df)
+                    self._merge_page_stats(totals, self.stats)
+                    if publisher and publisher.due(len(df)):
+                        publisher.publish(pd.concat(processed, ignore_index=True), rows)
+                waiting = time.time()
+        finally:
+            journal.close()
+        
+        self.stats = totals
+        self.stats['pages'] = len(processed)
+        self.stats['idle_seconds'] = round(idle_seconds, 1)
+        if not processed:
+            logger.warning(" No reviews arrived to classify")
+            journal.remove()
+            return pd.DataFrame()
+        
+        df_processed = pd.concat(processed, ignore_index=True)
+        logger.info(f" Streamed {rows} reviews in {len(processed)} pages; "
+                    f"classifier waited {idle_seconds:.1f}s for pages")
+        
+        # Save results
+        if self.save_processed_data(df_processed, output_file):
+            journal.remove()
+            self.record_dead_letters(df_processed, output_file)
+            if publisher:
+                publisher.finish(df_processed, PROCESSED_DATA_DIR / output_file)
+        
+        self._display_summary(df_processed)
+        
+        logger.info("=" * 60)
+        logger.info(" Streaming processing completed!")
+        logger.info("=" * 60)
+        
+        return df_processed
+    
+    @staticmethod
+    def dead_letter_queue(output_file: str) -> DeadLetterQueue:
+        """Dead-letter store belonging to a processed output file."""
+        return DeadLetterQueue(DEAD_LETTER_DIR / f"{Path(output_file).stem}.jsonl")
+    
+    def record_dead_letters(self, df: pd.DataFrame, output_file: str) -> int:
+        """
+        Write the failed rows of a processed output to its dead-letter store.
+        
+        Args:
+            df: Processed reviews with 'status' and 'error' columns
+            output_file: Processed CSV the rows belong to
+            
+        Returns:
+            Number of failed reviews stored
+        """
+        failed = df[df['status'] == STATUS_FAILED] if 'status' in df.columns else df.iloc[0:0]
+        columns = [col for col in ['review_id', 'content', 'rating', 'error'] if col in failed.columns]
+        dead_letters = self.dead_letter_queue(output_file)
+        count = dead_letters.save(failed[columns].to_dict('records'))
+        if count:
+            logger.warning(f" {count} failed reviews written to {dead_letters.filepath}; "
+                           f"repair them with --reprocess-failed")
+        return count
+    
+    def _load_processed(self, output_file: str) -> Optional[pd.DataFrame]:
+        """Load a processed CSV, marking failed rows in outputs written before the status column existed."""
+        filepath = PROCESSED_DATA_DIR / output_file
+        # Versions are hex hashes; inferred types would turn e.g. '0123456789e1' into a number
+        df = DataHandler.load_from_csv(filepath, dtype={TAXONOMY_COLUMN: str})
+        if df is None or df.empty:
+            logger.error(f" Failed to load processed data: {filepath}")
+            return None
+        
+        if 'status' not in df.columns:
+            content = df['content'].fillna('').astype(str).str.strip()
+            failed = (df['summary'] == FALLBACK_SUMMARY) & (content != '')
+            df['status'] = np.where(failed, STATUS_FAILED, STATUS_OK)
+        return df
+    
+    def _reclassify_rows(self, df: pd.DataFrame, rows: np.ndarray, output_file: str) -> Optional[pd.DataFrame]:
+        """
+        Re-classify some rows of a processed output and patch them into the file in place.
+        
+        Only the labels, label source, status and taxonomy version are patched;
+        cluster IDs and sampling columns keep their values. The dead-letter
+        store is rewritten from the re-classified rows, so `rows` must include
+        every failed row.
+        
+        Args:
+            df: Processed output, patched in place
+            rows: Boolean mask of rows to re-classify
+            output_file: Processed CSV in PROCESSED_DATA_DIR
+            
+        Returns:
+            The re-classified rows, or None if the patched file could not be saved
+        """
+        retry_df = df.loc[rows].drop(columns=RESULT_FIELDS + ['label_source', 'status', 'cluster_id', TAXONOMY_COLUMN],
+                                     errors='ignore').reset_index(drop=True)
+        processed = self.process_reviews(retry_df)
+        
+        for column in RESULT_FIELDS + ['label_source', 'status', TAXONOMY_COLUMN]:
+            df[column] = df[column].astype(object) if column in df.columns else ''
+            df.loc[rows, column] = processed[column].to_numpy()
+        
+        if not self._save_in_place(df, output_file):
+            return None
+        self.record_dead_letters(processed, output_file)
+        return processed
+    
+    def _save_in_place(self, df: pd.DataFrame, output_file: str) -> bool:
+        """Overwrite a processed output; written aside and swapped in, so an interruption never truncates it."""
+        filepath = PROCESSED_DATA_DIR / output_file
+        tmp_path = filepath.with_suffix('.tmp')
+        columns = [col for col in OUTPUT_COLUMNS if col in df.columns]
+        if not DataHandler.save_to_csv(df, tmp_path, columns=columns):
+            logger.error(f" Could not save the patched output; {filepath.name} is unchanged")
+            return False
+        tmp_path.replace(filepath)
+        save_taxonomy()
+        return True
+    
+    def reprocess_failed(self, output_file: str) -> pd.DataFrame:
+        """
+        Re-classify only the failed rows of a processed output and patch them in place.
+        
+        Failed rows are those with status 'failed' (in outputs written before the
+        status column existed: non-empty reviews carrying the fallback summary).
+        Rows that fail again stay in the dead-letter store with their attempt count.
+        
+        Args:
+            output_file: Processed CSV in PROCESSED_DATA_DIR
+            
+        Returns:
+            Patched DataFrame (empty if the file could not be loaded)
+        """
+        df = self._load_processed(output_file)
+        if df is None:
+            return pd.DataFrame()
+        
+        failed = (df['status'] == STATUS_FAILED).to_numpy()
+        if not failed.any():
+            logger.info(f" No failed reviews in {output_file}")
+            self.dead_letter_queue(output_file).remove()
+            return df
+        
+        logger.info(f" Re-processing {int(failed.sum())} failed reviews of {len(df)} in {output_file}")
+        processed = self._reclassify_rows(df, failed, output_file)
+        if processed is not None:
+            repaired = int((processed['status'] == STATUS_OK).sum())
+            logger.info(f" Patched {repaired}/{len(processed)} failed reviews in place: {output_file}")
+        return df
+    
+    def migrate_taxonomy(self, output_file: str) -> pd.DataFrame:
+        """
+        Bring a processed output up to the current taxonomy (FEEDBACK_CATEGORIES).
+        
+        For each taxonomy version found in the file, the old snapshot is diffed
+        against the current taxonomy and only the affected rows are
+        re-classified (see taxonomy.affected_rows), together with any failed
+        rows. Every other row keeps its labels and is re-stamped with the
+        current version.
+        
+        Args:
+            output_file: Processed CSV in PROCESSED_DATA_DIR
+            
+        Returns:
+            Migrated DataFrame (empty if the file could not be loaded)
+        """
+        df = self._load_processed(output_file)
+        if df is None:
+            return pd.DataFrame()
+        
+        if TAXONOMY_COLUMN not in df.columns:
+            df[TAXONOMY_COLUMN] = ''
+        versions = df[TAXONOMY_COLUMN].fillna('').astype(str)
+        rows = (df['status'] == STATUS_FAILED).to_numpy()
+        
+        for version in versions.unique():
+            if version == self.taxonomy_version:
+                continue
+            in_version = (versions == version).to_numpy()
+            old = load_taxonomy(version) if version else None
+            if old is None:
+                logger.warning(f" No snapshot of taxonomy version '{version or 'unversioned'}'; re-checking "
+                               f"{CATCH_ALL_CATEGORY} and labels outside the current taxonomy")
+            else:
+                logger.info(f" Taxonomy {version} -> {self.taxonomy_version}: "
+                            f"{describe_diff(diff_taxonomies(old, FEEDBACK_CATEGORIES))}")
+            rows = rows | (in_version & affected_rows(df, FEEDBACK_CATEGORIES, old))
+        
+        stale = (versions != self.taxonomy_version).to_numpy()
+        logger.info(f" Taxonomy migration of {output_file}: {int(stale.sum())} rows on older versions, "
+                    f"re-classifying {int(rows.sum())} of {len(df)} ({rows.mean():.1%})")
+        
+        # Rows unaffected by the change carry forward under the current version
+        df[TAXONOMY_COLUMN] = df[TAXONOMY_COLUMN].astype(object)
+        df.loc[stale & ~rows, TAXONOMY_COLUMN] = self.taxonomy_version
+        if rows.any():
+            self._reclassify_rows(df, rows, output_file)
+        elif stale.any():
+            self._save_in_place(df, output_file)
+        return df
+    
+    def sample_reviews(self, df: pd.DataFrame, margin_of_error: float) -> pd.DataFrame:
+        """
+        Draw a stratified sample (SAMPLING_CONFIG['strata']) large enough for a margin of error.
+        
+        Args:
+            df: Cleaned reviews
+            margin_of_error: Target CI half-width for any proportion (e.g. 0.03)
+            
+        Returns:
+            Sampled reviews with 'stratum' and 'sample_weight' columns
+        """
+        confidence = SAMPLING_CONFIG['confidence']
+        size = required_sample_size(len(df), margin_of_error, confidence)
+        sample = stratified_sample(df, size, SAMPLING_CONFIG['strata'],
+                                   min_per_stratum=SAMPLING_CONFIG['min_per_stratum'],
+                                   seed=SAMPLING_CONFIG['seed'])
+        logger.info(f" Sampling {len(sample)} of {len(df)} reviews across {sample['stratum'].nunique()} strata "
+                    f"(±{margin_of_error:.1%} at {confidence:.0%} confidence)")
+        return sample
+    
     def _display_summary(self, df: pd.DataFrame):
         """Display processing summary statistics."""
         logger.info("\n PROCESSING SUMMARY:")
         logger.info(f"   Total reviews processed: {len(df)}")
         
+        retry = self.retry_stats.as_dict()
+        if retry['calls']:
+            failures = ", ".join(f"{kind}: {count}" for kind, count in retry['failures'].items()) or "none"
+            logger.info(f"\n   LLM calls: {retry['calls']} | Failures: {failures}")
+            logger.info(f"   Retries: {retry['retries']} | Backoff: {retry['backoff_seconds']:.1f}s | "
+                        f"Breaker trips: {retry['breaker_trips']} ({retry['breaker_wait_seconds']:.1f}s paused)")
+        
+        routing = self.stats.get('routing')
+        if routing:
+            routed = ", ".join(f"{name}: {t['reviews_routed']}" for name, t in routing['tiers'].items())
+            logger.info(f"   Routing: {routed} | Escalations: {sum(routing['escalations'].values())} | "
+                        f"Estimated cost: ${routing['total_cost']:.4f}")
+        
+        batch_job = self.stats.get('batch_job')
+        if batch_job:
+            logger.info(f"   Batch jobs: {batch_job['jobs']} ({batch_job['requests']} requests) | "
+                        f"Ingested: {batch_job['ingested']}/{batch_job['reviews']} reviews | "
+                        f"Interactive fallback: {batch_job['fallback']} | Waited: {batch_job['wait_seconds']:.0f}s")
+        
+        hedging = self.stats.get('hedging')
+        if hedging:
+            logger.info(f"   Hedged calls: {hedging['hedged']} ({hedging['hedge_rate']:.1%}) | "
+                        f"p50 {hedging['p50_seconds']:.2f}s | p99 {hedging['p99_seconds']:.2f}s "
+                        f"(unhedged {hedging['p99_seconds_unhedged']:.2f}s)")
+        
+        compaction = self.stats.get('compaction')
+        if compaction:
+            logger.info(f"   Input compaction: {compaction['truncated']} truncated, "
+                        f"~{compaction['tokens_saved']} review tokens saved ({compaction['saved_pct']:.1f}%)")
+        
+        parse = self.response_parser.stats
+        if parse['responses']:
+            logger.info(f"   Parse: {parse['repaired']}/{parse['responses']} replies repaired "
+                        f"({parse['repaired'] / parse['responses']:.0%}), {parse['salvaged_items']} items salvaged, "
+                        f"{parse['coerced_fields']} labels coerced, {parse['failed']} unusable")
+        
+        if self.stats.get('failed'):
+            logger.info(f"   Failed (fallback labels, in dead-letter store): {self.stats['failed']}")
+        
+        if 'label_source' in df.columns:
+            sources = ", ".join(f"{source}: {count}" for source, count in df['label_source'].value_counts().items())
+            logger.info(f"   Label sources: {sources}")
+        
         if 'category' in df.columns:
             logger.info("\n   Category Distribution:")
             for cat, count in df['category'].value_counts().head(5).items():
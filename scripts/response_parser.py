@@ -0,0 +1,398 @@
+"""
+LLM response parser for Product Intelligence Engine.
+Extracts, repairs and validates JSON classifications from free-form model
+output so malformed replies can be salvaged instead of retried.
+"""
+
+import re
+import json
+import difflib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config.config import FEEDBACK_CATEGORIES
+from scripts.taxonomy import CATCH_ALL_CATEGORY
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+REQUIRED_FIELDS = ['category', 'subcategory', 'sentiment', 'priority', 'summary']
+
+SENTIMENT_ALIASES = {
+    'positive': 'positive', 'positif': 'positive', 'pos': 'positive',
+    'neutral': 'neutral', 'netral': 'neutral', 'mixed': 'neutral', 'campuran': 'neutral',
+    'negative': 'negative', 'negatif': 'negative', 'neg': 'negative',
+}
+
+PRIORITY_ALIASES = {
+    'high': 'high', 'tinggi': 'high', 'critical': 'high', 'kritis': 'high', 'urgent': 'high',
+    'medium': 'medium', 'sedang': 'medium', 'med': 'medium', 'moderate': 'medium',
+    'low': 'low', 'rendah': 'low', 'minor': 'low',
+}
+
+# Compact response mode: short keys and enum codes (see create_*_prompt in process_llm)
+COMPACT_KEYS = {'i': 'id', 'c': 'category', 'sc': 'subcategory', 's': 'sentiment', 'p': 'priority',
+                'm': 'summary', 'k': 'keywords'}
+SENTIMENT_CODES = {1: 'positive', 0: 'neutral', -1: 'negative'}
+PRIORITY_CODES = {'h': 'high', 'm': 'medium', 'l': 'low'}
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_PYTHON_LITERALS = re.compile(r'\b(True|False|None)\b')
+
+
+def _key(label: str) -> str:
+    """Normalize a label for loose comparison ('UI / UX' -> 'uiux')."""
+    return re.sub(r'[^a-z0-9]', '', str(label).lower())
+
+
+def _scan(text: str, start: int) -> Tuple[int, List[str], Optional[str]]:
+    """
+    Scan a JSON-like value from `start`, tracking brackets and strings.
+
+    Returns:
+        (end index or -1 if truncated, open bracket stack, open quote char)
+    """
+    stack = []
+    quote = None
+    escaped = False
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in '"\'':
+            quote = ch
+        elif ch in '{[':
+            stack.append(ch)
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                return i, stack, None
+
+    return -1, stack, quote
+
+
+def _normalize_quotes(text: str) -> str:
+    """Convert single-quoted strings to double-quoted JSON strings."""
+    out = []
+    quote = None
+    escaped = False
+
+    for ch in text:
+        if quote:
+            if escaped:
+                escaped = False
+                out.append(ch)
+            elif ch == '\\':
+                escaped = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif ch == '"' and quote == "'":
+                out.append('\\"')
+            else:
+                out.append(ch)
+        elif ch in '"\'':
+            quote = ch
+            out.append('"')
+        else:
+            out.append(ch)
+
+    return ''.join(out)
+
+
+def _close_truncated(text: str) -> str:
+    """Close an unterminated string and any open brackets."""
+    _, stack, quote = _scan(text, 0)
+    if quote:
+        text += quote
+    # Drop a dangling separator or key left by the truncation
+    text = re.sub(r'(,|:)\s*$', '', text.rstrip())
+    text = re.sub(r',\s*"[^"]*"\s*$', '', text)
+    closers = {'{': '}', '[': ']'}
+    return text + ''.join(closers[b] for b in reversed(stack))
+
+
+def _loads_lenient(text: str) -> Tuple[object, bool]:
+    """
+    Parse JSON, repairing common defects if the strict parse fails.
+
+    Returns:
+        (parsed value, whether a repair was needed)
+
+    Raises:
+        json.JSONDecodeError: If the text cannot be repaired
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    repaired = _TRAILING_COMMA.sub(r'\1', text)
+    repaired = _PYTHON_LITERALS.sub(lambda m: {'True': 'true', 'False': 'false', 'None': 'null'}[m.group(1)], repaired)
+    if "'" in repaired:
+        repaired = _normalize_quotes(repaired)
+    repaired = _close_truncated(repaired)
+    repaired = _TRAILING_COMMA.sub(r'\1', repaired)
+    return json.loads(repaired), True
+
+
+def _top_level_items(array_text: str) -> List[str]:
+    """Split the text of a (possibly truncated) JSON array into its object items."""
+    items = []
+    i = array_text.find('{')
+    while i != -1:
+        end, _, _ = _scan(array_text, i)
+        if end == -1:
+            items.append(array_text[i:])
+            break
+        items.append(array_text[i:end + 1])
+        i = array_text.find('{', end + 1)
+    return items
+
+
+class ResponseParser:
+    """Tolerant parser for single and batched classification replies."""
+
+    def __init__(self, categories: Dict[str, List[str]] = None):
+        """
+        Initialize the parser.
+
+        Args:
+            categories: Taxonomy to validate against (default: FEEDBACK_CATEGORIES)
+        """
+        self.categories = categories or FEEDBACK_CATEGORIES
+        # Where unrecognizable categories go: the catch-all if the taxonomy has one, else its last category
+        self.fallback_category = (CATCH_ALL_CATEGORY if CATCH_ALL_CATEGORY in self.categories
+                                  else list(self.categories)[-1])
+        self._category_keys = {_key(c): c for c in self.categories}
+        self._subcategory_keys = {
+            _key(sub): (cat, sub) for cat, subs in self.categories.items() for sub in subs
+        }
+        self._lock = threading.Lock()
+        self.stats = {
+            'responses': 0,
+            'repaired': 0,
+            'coerced_fields': 0,
+            'salvaged_items': 0,
+            'dropped_items': 0,
+            'failed': 0,
+        }
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _extract(self, text: str) -> Tuple[Optional[object], bool]:
+        """Find and parse the first JSON object or array in `text`."""
+        match = re.search(r'[\[{]', text or '')
+        if not match:
+            return None, False
+
+        start = match.start()
+        end, _, _ = _scan(text, start)
+        candidate = text[start:] if end == -1 else text[start:end + 1]
+        # Drop a closing code fence caught in a truncated candidate
+        candidate = re.sub(r'\s*```\s*$', '', candidate)
+
+        try:
+            value, repaired = _loads_lenient(candidate)
+            return value, repaired or end == -1
+        except json.JSONDecodeError:
+            if candidate.startswith('['):
+                # Keep whatever items can be parsed on their own
+                return self._salvage_items(candidate), True
+            return None, False
+
+    def _salvage_items(self, array_text: str) -> List[Dict]:
+        items = []
+        for item_text in _top_level_items(array_text):
+            try:
+                value, _ = _loads_lenient(item_text)
+                if isinstance(value, dict):
+                    items.append(value)
+            except json.JSONDecodeError:
+                continue
+        return items
+
+    def _match_category(self, value) -> Tuple[Optional[str], bool]:
+        if not isinstance(value, str):
+            # Lists and objects are not labels (and are unhashable)
+            return None, True
+        if value in self.categories:
+            return value, False
+        key = _key(value)
+        if key in self._category_keys:
+            return self._category_keys[key], True
+        close = difflib.get_close_matches(key, list(self._category_keys), n=1, cutoff=0.75)
+        if close:
+            return self._category_keys[close[0]], True
+        return None, True
+
+    def _match_subcategory(self, category: str, value) -> Tuple[Optional[str], bool]:
+        subcategories = self.categories.get(category, [])
+        if not isinstance(value, str):
+            return None, True
+        if value in subcategories:
+            return value, False
+        keys = {_key(s): s for s in subcategories}
+        key = _key(value)
+        if key in keys:
+            return keys[key], True
+        close = difflib.get_close_matches(key, list(keys), n=1, cutoff=0.75)
+        if close:
+            return keys[close[0]], True
+        return None, True
+
+    def _code(self, value, labels: List[str]):
+        """Resolve a 1-based numeric code to its label; anything else is returned unchanged."""
+        try:
+            index = int(value)
+        except (TypeError, ValueError):
+            return value
+        return labels[index - 1] if 1 <= index <= len(labels) else value
+
+    def decode_compact(self, item: Dict) -> Dict:
+        """
+        Expand a compact-mode item to the full schema.
+
+        Category and subcategory codes are 1-based positions in the
+        taxonomy; sentiment is 1/0/-1 and priority h/m/l. Summary and
+        keywords are optional and default to empty.
+
+        Args:
+            item: Parsed item with short keys
+
+        Returns:
+            Item with full field names and labels
+        """
+        result = {COMPACT_KEYS.get(key, key): value for key, value in item.items()}
+        category = self._code(result.get('category'), list(self.categories))
+        result['category'] = category
+        if isinstance(category, str) and category in self.categories:
+            result['subcategory'] = self._code(result.get('subcategory'), self.categories[category])
+        try:
+            result['sentiment'] = SENTIMENT_CODES.get(int(result.get('sentiment')), result.get('sentiment'))
+        except (TypeError, ValueError):
+            pass
+        priority = str(result.get('priority', '')).strip().lower()
+        result['priority'] = PRIORITY_CODES.get(priority, result.get('priority'))
+        result.setdefault('summary', '')
+        result.setdefault('keywords', [])
+        return result
+
+    def validate(self, item: Dict) -> Optional[Dict]:
+        """
+        Validate one classification and coerce near-miss labels.
+
+        Compact-mode items (short keys, enum codes) are decoded first.
+
+        Args:
+            item: Parsed classification
+
+        Returns:
+            Cleaned classification, or None if it cannot be used
+        """
+        if isinstance(item, dict) and 'c' in item and 'category' not in item:
+            item = self.decode_compact(item)
+        if not isinstance(item, dict) or not all(field in item for field in REQUIRED_FIELDS):
+            return None
+
+        result = dict(item)
+        coerced = 0
+
+        category, changed = self._match_category(result['category'])
+        coerced += changed
+        if category is None:
+            # An unknown category with a known subcategory is still recoverable
+            subcategory = result['subcategory']
+            category, _ = self._subcategory_keys.get(
+                _key(subcategory) if isinstance(subcategory, str) else None, (self.fallback_category, None)
+            )
+        result['category'] = category
+
+        subcategory, changed = self._match_subcategory(category, result['subcategory'])
+        coerced += changed
+        result['subcategory'] = subcategory or self.categories[category][0]
+
+        for field, aliases in (('sentiment', SENTIMENT_ALIASES), ('priority', PRIORITY_ALIASES)):
+            raw = str(result[field]).strip().lower()
+            value = aliases.get(raw) or aliases.get(raw.split('/')[0].strip())
+            if value is None:
+                return None
+            coerced += value != result[field]
+            result[field] = value
+
+        result['summary'] = str(result['summary'])
+        keywords = result.get('keywords', [])
+        if isinstance(keywords, str):
+            keywords = [k.strip() for k in keywords.split(',') if k.strip()]
+        result['keywords'] = [str(k) for k in keywords][:5] if isinstance(keywords, list) else []
+
+        if coerced:
+            self._count('coerced_fields', coerced)
+        return result
+
+    def parse_single(self, text: str) -> Optional[Dict]:
+        """
+        Parse a reply to a single-review prompt.
+
+        Args:
+            text: Raw model output
+
+        Returns:
+            Validated classification or None
+        """
+        self._count('responses')
+        value, repaired = self._extract(text)
+        if isinstance(value, list) and value:
+            value = value[0]
+
+        result = self.validate(value) if isinstance(value, dict) else None
+        if result is None:
+            self._count('failed')
+            return None
+        if repaired:
+            self._count('repaired')
+        return result
+
+    def parse_batch(self, text: str) -> List[Dict]:
+        """
+        Parse a reply to a batched prompt, keeping every valid item.
+
+        Args:
+            text: Raw model output
+
+        Returns:
+            Validated classifications (each still carrying its 'id')
+        """
+        self._count('responses')
+        value, repaired = self._extract(text)
+        if isinstance(value, dict):
+            value = [value]
+        if not isinstance(value, list):
+            self._count('failed')
+            return []
+
+        results = []
+        for item in value:
+            result = self.validate(item)
+            if result is None or 'id' not in result:
+                self._count('dropped_items')
+                continue
+            results.append(result)
+
+        if repaired:
+            self._count('repaired')
+            self._count('salvaged_items', len(results))
+        if not results:
+            self._count('failed')
+        return results
@@ -0,0 +1,151 @@
+"""
+Work scheduling for Product Intelligence Engine.
+Orders LLM work by review impact and publishes partial results while a
+long run is still in progress.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config.config import SCHEDULING_CONFIG
+from utils import DataHandler, get_logger
+
+logger = get_logger(__name__)
+
+
+def impact_scores(df: pd.DataFrame, config: Dict = None) -> np.ndarray:
+    """
+    Score how much each review matters to the product team, in [0, 1].
+
+    Low ratings, many thumbs-up and recent dates score high. Recency is
+    measured from the newest review in `df`, so older exports still spread.
+
+    Args:
+        df: Reviews with 'rating' and optionally 'thumbs_up' and 'date'
+        config: Weights (default: SCHEDULING_CONFIG)
+
+    Returns:
+        Impact score per row
+    """
+    config = config or SCHEDULING_CONFIG
+    rating = df['rating'].fillna(3).clip(1, 5).to_numpy(dtype=float)
+    rating_score = (5 - rating) / 4
+
+    thumbs_score = np.zeros(len(df))
+    if 'thumbs_up' in df.columns:
+        thumbs = np.log1p(pd.to_numeric(df['thumbs_up'], errors='coerce').fillna(0).clip(lower=0).to_numpy(dtype=float))
+        if thumbs.max(initial=0) > 0:
+            thumbs_score = thumbs / thumbs.max()
+
+    recency_score = np.zeros(len(df))
+    if 'date' in df.columns:
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        age_days = ((dates.max() - dates).dt.total_seconds() / 86400).to_numpy(dtype=float)
+        recency_score = np.nan_to_num(0.5 ** (age_days / config['recency_half_life_days']), nan=0.0)
+
+    return (config['rating_weight'] * rating_score
+            + config['thumbs_up_weight'] * thumbs_score
+            + config['recency_weight'] * recency_score)
+
+
+def order_units(units: List[List[Dict]]) -> List[List[Dict]]:
+    """
+    Sort work units so the one holding the highest-impact review runs first.
+
+    Args:
+        units: Work units whose items carry an 'impact' score
+
+    Returns:
+        Units in scheduling order (stable for equal scores)
+    """
+    return sorted(units, key=lambda unit: -max(item.get('impact', 0.0) for item in unit))
+
+
+class ProgressPublisher:
+    """Writes partial results of a running job for dashboards to pick up."""
+
+    def __init__(self, snapshot_path: Path, columns: List[str] = None, every: int = None):
+        """
+        Initialize the publisher.
+
+        Args:
+            snapshot_path: Partial processed CSV to (over)write
+            columns: Columns written to the CSV (default: all)
+            every: Publish after this many LLM completions (default: SCHEDULING_CONFIG)
+        """
+        self.snapshot_path = Path(snapshot_path)
+        self.columns = columns
+        self.every = SCHEDULING_CONFIG['snapshot_every'] if every is None else every
+        self.published = 0
+        self._since_last = 0
+        self._dashboard = None
+
+    def due(self, completed: int) -> bool:
+        """
+        Count completions and report whether a snapshot is due.
+
+        Args:
+            completed: Reviews completed since the last call
+        """
+        self._since_last += completed
+        return self.every > 0 and self._since_last >= self.every
+
+    def publish(self, df: pd.DataFrame, total: int):
+        """
+        Write the partial CSV and an updated dashboard summary.
+
+        Args:
+            df: Reviews classified so far
+            total: Reviews in the whole run
+        """
+        self._since_last = 0
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix('.csv.tmp')
+        columns = [c for c in self.columns if c in df.columns] if self.columns else None
+        if not DataHandler.save_to_csv(df, tmp_path, columns=columns):
+            return
+        tmp_path.replace(self.snapshot_path)
+
+        if self._dashboard is None:
+            # Imported lazily: pulls in matplotlib
+            from scripts.visualize import DashboardGenerator
+            self._dashboard = DashboardGenerator()
+        summary = self._dashboard.build_summary(df)
+        summary['progress'] = {
+            'classified': len(df),
+            'total': total,
+            'complete': False,
+            'snapshot': str(self.snapshot_path),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._dashboard.save_summary(summary)
+        self.published += 1
+        logger.info(f" Published partial results: {len(df)}/{total} reviews "
+                    f"({summary['high_priority_count']} high priority)")
+
+    def finish(self, df: pd.DataFrame, output_path: Path):
+        """
+        Mark the run complete in the dashboard summary and delete the partial CSV.
+
+        Args:
+            df: All processed reviews
+            output_path: Saved processed CSV
+        """
+        if self.snapshot_path.exists():
+            self.snapshot_path.unlink()
+        if self._dashboard is None:
+            return
+
+        summary = self._dashboard.build_summary(df)
+        summary['progress'] = {
+            'classified': len(df),
+            'total': len(df),
+            'complete': True,
+            'snapshot': str(output_path),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._dashboard.save_summary(summary)
@@ -5,13 +5,16 @@ Collects user reviews from Google Play Store apps.
 
 import time
 import logging
-from typing import List, Dict, Optional
+from contextlib import nullcontext
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 from google_play_scraper import app, reviews, Sort
 from tqdm import tqdm
 
-from config.config import SCRAPER_CONFIG, RAW_DATA_DIR
-from utils import DataHandler, get_logger
+from config.config import SCRAPER_CONFIG, RAW_DATA_DIR, SCRAPE_STATE_DIR
+from utils import DataHandler, RateLimiter, ScrapeState, get_logger
 
 logger = get_logger(__name__)
 
@@ -19,19 +22,33 @@ logger = get_logger(__name__)
 class PlayStoreScraper:
     """Scrapes reviews from Google Play Store."""
     
-    def __init__(self, app_id: str = None, max_reviews: int = None):
+    def __init__(self, app_id: str = None, max_reviews: int = None, incremental: bool = None,
+                 rate_limiter: RateLimiter = None, progress_bar: tqdm = None):
         """
         Initialize the scraper.
         
         Args:
             app_id: Google Play Store app ID (e.g., 'com.unnes.myunnes')
             max_reviews: Maximum number of reviews to fetch
+            incremental: Fetch only reviews newer than the last scrape (default: SCRAPER_CONFIG)
+            rate_limiter: Host-level limiter shared with other scrapers (replaces the fixed delay)
+            progress_bar: Shared progress bar to update instead of a per-app one
         """
         self.app_id = app_id or SCRAPER_CONFIG['app_id']
         self.max_reviews = max_reviews or SCRAPER_CONFIG['max_reviews']
         self.language = SCRAPER_CONFIG['language']
         self.country = SCRAPER_CONFIG['country']
         self.delay = SCRAPER_CONFIG['delay_between_requests']
+        self.incremental = SCRAPER_CONFIG.get('incremental', False) if incremental is None else incremental
+        self.state = ScrapeState(SCRAPE_STATE_DIR / f"{self.app_id}.json")
+        self.up_to_date = False
+        self.caught_up = False
+        self.scrape_error = None
+        self.top_reviews = []
+        self._pending_state = None
+        self.rate_limiter = rate_limiter
+        self.progress_bar = progress_bar
+        self.saved_file = None
         
     def get_app_info(self) -> Optional[Dict]:
         """
@@ -42,6 +59,8 @@ class PlayStoreScraper:
         """
         try:
             logger.info(f" Fetching app info for: {self.app_id}")
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
             info = app(self.app_id, lang=self.language, country=self.country)
             
             app_data = {
@@ -59,28 +78,54 @@ class PlayStoreScraper:
             return app_data
             
         except Exception as e:
-            logger.error(f" Error fetching app info: {e}")
+            logger.error(f" Error fetching app info for {self.app_id}: {e}")
             return None
     
-    def scrape_reviews(self, continuation_token: str = None) -> List[Dict]:
+    def scrape_reviews(self, continuation_token: str = None, since: Dict = None,
+                       on_page: Callable[[List[Dict]], None] = None) -> List[Dict]:
         """
         Scrape reviews from Google Play Store.
         
+        Reviews come newest first, so with a previous scrape's state the
+        scraper stops at the first review that scrape already saw. Reviews
+        saved by an earlier run that hit `max_reviews` before getting there
+        are skipped. Afterwards `caught_up` tells whether paging reached the
+        previous high-water mark (or the end), `top_reviews` holds the newest
+        reviews seen and `scrape_error` is set if the scrape failed.
+        
         Args:
             continuation_token: Token for pagination (to continue from where left off)
+            since: Scrape state of a previous run (see ScrapeState.load)
+            on_page: Called with each page's new reviews as soon as it arrives (may block, which
+                slows the scraper down to its consumer)
             
         Returns:
-            List of review dictionaries
+            List of review dictionaries, newest first
         """
+        self.caught_up = False
+        self.scrape_error = None
+        self.top_reviews = []
         try:
-            logger.info(f" Starting to scrape reviews (max: {self.max_reviews})...")
+            since = since or {}
+            seen_id = since.get('newest_review_id')
+            seen_date = datetime.fromisoformat(since['newest_date']) if since.get('newest_date') else None
+            skip_ids = set(since.get('boundary_ids') or []) | set(since.get('saved_ids') or [])
+            caught_up = False
+            
+            if seen_id:
+                logger.info(f" Starting to scrape reviews newer than {since.get('newest_date')} (max: {self.max_reviews})...")
+            else:
+                logger.info(f" Starting to scrape reviews (max: {self.max_reviews})...")
             
             all_reviews = []
             token = continuation_token
             
-            with tqdm(total=self.max_reviews, desc="Scraping reviews") as pbar:
+            progress = nullcontext(self.progress_bar) if self.progress_bar else tqdm(total=self.max_reviews, desc="Scraping reviews")
+            with progress as pbar:
                 while len(all_reviews) < self.max_reviews:
                     # Fetch batch of reviews
+                    if self.rate_limiter:
+                        self.rate_limiter.acquire()
                     result, token = reviews(
                         self.app_id,
                         lang=self.language,
@@ -94,8 +139,21 @@ class PlayStoreScraper:
                         logger.warning(" No more reviews available")
                         break
                     
+                    if not self.top_reviews:
+                        self.top_reviews = [{'review_id': review.get('reviewId'), 'date': review.get('at')}
+                                            for review in result]
+                    
                     # Process and store reviews
+                    page_start = len(all_reviews)
                     for review in result:
+                        review_date = review.get('at')
+                        if seen_id and (review.get('reviewId') == seen_id or
+                                        (seen_date and review_date and review_date < seen_date)):
+                            caught_up = True
+                            break
+                        if review.get('reviewId') in skip_ids:
+                            continue
+                        
                         review_data = {
                             'review_id': review.get('reviewId'),
                             'author': review.get('userName'),
@@ -108,23 +166,59 @@ class PlayStoreScraper:
                         }
                         all_reviews.append(review_data)
                     
-                    pbar.update(len(result))
+                    pbar.update(len(all_reviews) - page_start)
+                    if on_page and len(all_reviews) > page_start:
+                        on_page(all_reviews[page_start:])
+                    
+                    if caught_up:
+                        logger.info(" Reached reviews already scraped by the previous run")
+                        break
                     
                     # Break if no more continuation token
                     if not token:
                         logger.info(" Reached end of available reviews")
+                        caught_up = True
                         break
                     
-                    # Rate limiting
-                    time.sleep(self.delay)
+                    # Rate limiting (a shared limiter already spaced this app's requests)
+                    if not self.rate_limiter:
+                        time.sleep(self.delay)
+            
+            # Without a previous mark there is no gap to close: older reviews are history
+            self.caught_up = caught_up or not seen_id
+            if not self.caught_up:
+                logger.warning(f" Hit max_reviews before reaching the previous run's newest review; "
+                               f"the next run continues with the older new reviews")
             
             logger.info(f" Successfully scraped {len(all_reviews)} reviews")
             return all_reviews
             
         except Exception as e:
             logger.error(f" Error scraping reviews: {e}")
+            self.scrape_error = str(e)
             return []
     
+    def commit_state(self) -> bool:
+        """
+        Save the scrape state of the last successful run.
+        
+        The high-water mark only moves when paging reached the previous one;
+        a run cut short by `max_reviews` records the IDs it saved instead, so
+        later runs skip them and keep fetching the reviews in between.
+        
+        Returns:
+            True if there was a state to save (failed runs leave none)
+        """
+        if self._pending_state is None:
+            return False
+        app_info, previous, reviews_data = self._pending_state
+        self._pending_state = None
+        if self.caught_up:
+            self.state.save(app_info, newest=self.top_reviews, previous=previous)
+        else:
+            self.state.save(app_info, previous=previous, saved_ids=[review['review_id'] for review in reviews_data])
+        return True
+    
     def save_reviews(self, reviews_data: List[Dict], filename: str = None) -> bool:
         """
         Save scraped reviews to CSV.
@@ -149,6 +243,7 @@ class PlayStoreScraper:
             success = DataHandler.save_to_csv(reviews_data, filepath)
             
             if success:
+                self.saved_file = filepath
                 logger.info(f" Reviews saved to: {filepath}")
             
             return success
@@ -157,12 +252,16 @@ class PlayStoreScraper:
             logger.error(f" Error saving reviews: {e}")
             return False
     
-    def run(self, save_file: bool = True) -> List[Dict]:
+    def run(self, save_file: bool = True, on_page: Callable[[List[Dict]], None] = None,
+            commit_state: bool = True) -> List[Dict]:
         """
         Run the complete scraping pipeline.
         
         Args:
             save_file: Whether to save results to CSV
+            on_page: Receives each page of new reviews as it is scraped (see scrape_reviews)
+            commit_state: Save the scrape state at the end; pass False to call
+                commit_state() yourself once the reviews are safely processed
             
         Returns:
             List of scraped reviews
@@ -171,22 +270,49 @@ class PlayStoreScraper:
         logger.info(" Starting Google Play Store Scraper")
         logger.info("=" * 60)
         
+        self._pending_state = None
+        
         # Get app info
         app_info = self.get_app_info()
         if not app_info:
             logger.error(" Failed to fetch app info. Aborting.")
             return []
         
+        # Skip the fetch when the review count has not moved since the last (complete) scrape
+        previous = self.state.load() if self.incremental else {}
+        last_count = (previous.get('app_info') or {}).get('reviews_count')
+        if (previous.get('newest_review_id') and not previous.get('saved_ids') and last_count is not None
+                and app_info['reviews_count'] == last_count):
+            logger.info(f" Review count unchanged since {previous.get('last_run')} ({last_count:,}); nothing to fetch")
+            self.up_to_date = True
+            self._pending_state = (app_info, previous, [])
+            if commit_state:
+                self.commit_state()
+            return []
+        
         # Scrape reviews
-        reviews_data = self.scrape_reviews()
+        reviews_data = self.scrape_reviews(since=previous, on_page=on_page)
+        
+        if self.scrape_error:
+            logger.error(f" Scrape failed ({self.scrape_error}); scrape state left unchanged")
+            return []
         
         if not reviews_data:
-            logger.error(" No reviews scraped. Aborting.")
+            if previous.get('newest_review_id'):
+                logger.info(" No new reviews since the last scrape")
+                self.up_to_date = True
+                self._pending_state = (app_info, previous, [])
+                if commit_state:
+                    self.commit_state()
+            else:
+                logger.error(" No reviews scraped. Aborting.")
             return []
         
-        # Save to file
-        if save_file:
-            self.save_reviews(reviews_data)
+        # Save to file; the scrape state only moves once the new rows are on disk
+        if save_file and self.save_reviews(reviews_data):
+            self._pending_state = (app_info, previous, reviews_data)
+            if commit_state:
+                self.commit_state()
         
         logger.info("=" * 60)
         logger.info(f" Scraping completed! Total reviews: {len(reviews_data)}")
@@ -195,6 +321,115 @@ class PlayStoreScraper:
         return reviews_data
 
 
+def read_app_ids(filepath: Path) -> List[str]:
+    """
+    Read app IDs from a text file.
+    
+    Args:
+        filepath: One app ID per line; blank lines and '#' comments are ignored
+        
+    Returns:
+        App IDs in file order, without duplicates
+    """
+    app_ids = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            app_id = line.split('#', 1)[0].strip()
+            if app_id and app_id not in app_ids:
+                app_ids.append(app_id)
+    return app_ids
+
+
+class MultiAppScraper:
+    """Scrapes several apps concurrently behind one host-level rate limiter."""
+    
+    def __init__(self, app_ids: List[str], max_reviews: int = None, incremental: bool = None,
+                 max_workers: int = None, requests_per_minute: float = None):
+        """
+        Initialize the multi-app scraper.
+        
+        Args:
+            app_ids: Google Play Store app IDs
+            max_reviews: Maximum number of reviews to fetch per app
+            incremental: Fetch only reviews newer than each app's last scrape (default: SCRAPER_CONFIG)
+            max_workers: Apps scraped at the same time (default: SCRAPER_CONFIG['max_workers'])
+            requests_per_minute: Total request rate to the Play Store across all apps
+                (default: SCRAPER_CONFIG['host_requests_per_minute'])
+        """
+        self.app_ids = app_ids
+        self.max_reviews = max_reviews or SCRAPER_CONFIG['max_reviews']
+        self.incremental = incremental
+        self.max_workers = max_workers or SCRAPER_CONFIG['max_workers']
+        self.requests_per_minute = requests_per_minute or SCRAPER_CONFIG['host_requests_per_minute']
+        self.rate_limiter = RateLimiter(self.requests_per_minute, burst=SCRAPER_CONFIG['host_burst'])
+        self.report: Dict[str, Dict] = {}
+        
+    def _scrape_app(self, app_id: str, pbar: tqdm) -> Dict:
+        """Scrape one app; errors are caught so one app never stops the others."""
+        start = time.time()
+        try:
+            scraper = PlayStoreScraper(
+                app_id=app_id,
+                max_reviews=self.max_reviews,
+                incremental=self.incremental,
+                rate_limiter=self.rate_limiter,
+                progress_bar=pbar
+            )
+            reviews_data = scraper.run(save_file=True)
+            
+            if reviews_data and scraper.saved_file:
+                status = 'scraped'
+            elif scraper.up_to_date:
+                status = 'up to date'
+            else:
+                status = 'failed'
+            result = {'status': status, 'reviews': len(reviews_data),
+                      'file': scraper.saved_file.name if scraper.saved_file else None}
+        except Exception as e:
+            logger.error(f" Scraping {app_id} failed: {e}")
+            result = {'status': 'failed', 'reviews': 0, 'file': None, 'error': str(e)}
+        
+        result['seconds'] = round(time.time() - start, 1)
+        return result
+    
+    def run(self) -> Dict[str, Dict]:
+        """
+        Scrape every app, writing one raw CSV per app with new reviews.
+        
+        Returns:
+            Per-app report: status ('scraped', 'up to date' or 'failed'), reviews, file and seconds
+        """
+        logger.info("=" * 60)
+        logger.info(f" Scraping {len(self.app_ids)} apps ({self.max_workers} at a time, "
+                    f"{self.requests_per_minute:.0f} requests/min in total)")
+        logger.info("=" * 60)
+        
+        results = {}
+        with tqdm(total=self.max_reviews * len(self.app_ids), desc="Scraping apps") as pbar:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scrape") as executor:
+                futures = {executor.submit(self._scrape_app, app_id, pbar): app_id for app_id in self.app_ids}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    pbar.set_postfix_str(f"{len(results)}/{len(self.app_ids)} apps done")
+        
+        self.report = {app_id: results[app_id] for app_id in self.app_ids}
+        
+        self.log_report()
+        return self.report
+    
+    def log_report(self):
+        """Log one line per app and the totals."""
+        for app_id, result in self.report.items():
+            detail = result.get('file') or result.get('error') or ''
+            logger.info(f"   {app_id}: {result['status']}, {result['reviews']} reviews in {result['seconds']}s {detail}")
+        
+        failed = [app_id for app_id, result in self.report.items() if result['status'] == 'failed']
+        logger.info(f" Scraped {sum(r['reviews'] for r in self.report.values())} reviews from "
+                    f"{len(self.report) - len(failed)}/{len(self.report)} apps")
+        if failed:
+            logger.warning(f" Failed apps: {', '.join(failed)}")
+
+
 def main():
     """Main entry point for the scraper."""
     from utils import setup_logging
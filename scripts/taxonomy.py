@@ -0,0 +1,130 @@
+"""
+Taxonomy versioning for Product Intelligence Engine.
+Snapshots every FEEDBACK_CATEGORIES version that processed rows are stamped
+with, and diffs two versions to find the rows a taxonomy change affects.
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import FEEDBACK_CATEGORIES, TAXONOMY_DIR
+from utils import get_logger
+
+logger = get_logger(__name__)
+
+TAXONOMY_COLUMN = 'taxonomy_version'
+# Catch-all category; re-checked on every change since new labels usually come out of it
+CATCH_ALL_CATEGORY = 'Other'
+
+
+def taxonomy_hash(categories: Dict[str, List[str]] = None) -> str:
+    """Short hash of the taxonomy, used as its version; artifacts trained on another taxonomy are not loaded."""
+    categories = categories or FEEDBACK_CATEGORIES
+    return hashlib.sha256(json.dumps(categories, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def save_taxonomy(categories: Dict[str, List[str]] = None, taxonomy_dir: Path = TAXONOMY_DIR) -> str:
+    """
+    Snapshot a taxonomy under its version so later versions can be diffed against it.
+
+    Args:
+        categories: Taxonomy (default: FEEDBACK_CATEGORIES)
+        taxonomy_dir: Snapshot folder
+
+    Returns:
+        Taxonomy version
+    """
+    categories = categories or FEEDBACK_CATEGORIES
+    version = taxonomy_hash(categories)
+    path = Path(taxonomy_dir) / f"{version}.json"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(categories, f, indent=2, ensure_ascii=False)
+        logger.info(f" Saved taxonomy version {version} to {path}")
+    return version
+
+
+def load_taxonomy(version: str, taxonomy_dir: Path = TAXONOMY_DIR) -> Optional[Dict[str, List[str]]]:
+    """Taxonomy snapshot for a version (None if it was never saved)."""
+    path = Path(taxonomy_dir) / f"{version}.json"
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def diff_taxonomies(old: Dict[str, List[str]], new: Dict[str, List[str]]) -> Dict:
+    """
+    Compare two taxonomies.
+
+    Args:
+        old: Taxonomy the rows were classified with
+        new: Current taxonomy
+
+    Returns:
+        Dictionary with 'added' and 'removed' categories, and 'changed':
+        categories in both whose subcategories were added or removed (e.g. split),
+        mapped to {'added': [...], 'removed': [...]}
+    """
+    changed = {}
+    for category in old.keys() & new.keys():
+        added = [sub for sub in new[category] if sub not in old[category]]
+        removed = [sub for sub in old[category] if sub not in new[category]]
+        if added or removed:
+            changed[category] = {'added': added, 'removed': removed}
+    return {
+        'added': [category for category in new if category not in old],
+        'removed': [category for category in old if category not in new],
+        'changed': changed,
+    }
+
+
+def describe_diff(diff: Dict) -> str:
+    """One-line summary of a taxonomy diff."""
+    parts = []
+    if diff['added']:
+        parts.append(f"added {', '.join(diff['added'])}")
+    if diff['removed']:
+        parts.append(f"removed {', '.join(diff['removed'])}")
+    for category, subs in diff['changed'].items():
+        moves = [f"+{sub}" for sub in subs['added']] + [f"-{sub}" for sub in subs['removed']]
+        parts.append(f"changed {category} ({', '.join(moves)})")
+    return "; ".join(parts) or "no changes"
+
+
+def affected_rows(df: pd.DataFrame, new: Dict[str, List[str]], old: Dict[str, List[str]] = None) -> np.ndarray:
+    """
+    Rows whose labels a taxonomy change may invalidate.
+
+    These are rows in removed or changed categories, rows in the catch-all
+    category, and any row whose category/subcategory pair is not in the new
+    taxonomy. Without the old taxonomy (no snapshot), only the last two
+    checks apply.
+
+    Args:
+        df: Processed reviews with 'category' and 'subcategory'
+        new: Current taxonomy
+        old: Taxonomy the rows were classified with
+
+    Returns:
+        Boolean mask of rows to re-classify
+    """
+    categories = df['category'].fillna('').astype(str)
+    subcategories = df['subcategory'].fillna('').astype(str)
+    valid_pairs = {(category, sub) for category, subs in new.items() for sub in subs}
+    invalid = np.array([pair not in valid_pairs for pair in zip(categories, subcategories)], dtype=bool)
+
+    if old is not None:
+        diff = diff_taxonomies(old, new)
+        if not (diff['added'] or diff['removed'] or diff['changed']):
+            return invalid
+        touched = set(diff['removed']) | set(diff['changed']) | {CATCH_ALL_CATEGORY}
+    else:
+        touched = {CATCH_ALL_CATEGORY}
+    return invalid | categories.isin(touched).to_numpy()
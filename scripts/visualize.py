@@ -7,11 +7,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import json
 
-from config.config import PROCESSED_DATA_DIR, BASE_DIR
-from utils import DataHandler, get_logger
+from config.config import PROCESSED_DATA_DIR, BASE_DIR, SAMPLING_CONFIG
+from utils import DataHandler, get_logger, estimate_proportions, is_sampled
 
 logger = get_logger(__name__)
 
@@ -213,21 +213,14 @@ class DashboardGenerator:
             df.to_csv(looker_file, index=False, encoding='utf-8-sig')
             logger.info(f" Exported for Looker Studio: {looker_file}")
             
-            # Summary statistics
-            summary = {
-                'total_reviews': len(df),
-                'average_rating': float(df['rating'].mean()) if 'rating' in df.columns else 0,
-                'positive_sentiment_pct': float((df['sentiment'] == 'positive').sum() / len(df) * 100) if 'sentiment' in df.columns else 0,
-                'negative_sentiment_pct': float((df['sentiment'] == 'negative').sum() / len(df) * 100) if 'sentiment' in df.columns else 0,
-                'high_priority_count': int((df['priority'] == 'high').sum()) if 'priority' in df.columns else 0,
-                'top_category': df['category'].mode()[0] if 'category' in df.columns and not df.empty else 'N/A',
-            }
+            # Sampled runs: population estimates with confidence intervals
+            if is_sampled(df):
+                estimates_file = self.output_dir / 'looker_studio_estimates.csv'
+                self.estimate_table(df).to_csv(estimates_file, index=False, encoding='utf-8-sig')
+                logger.info(f" Exported sample estimates: {estimates_file}")
             
-            summary_file = self.output_dir / 'dashboard_summary.json'
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                json.dump(summary, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f" Saved summary: {summary_file}")
+            # Summary statistics
+            self.save_summary(self.build_summary(df))
             
             return True
             
@@ -235,6 +228,124 @@ class DashboardGenerator:
             logger.error(f" Export error: {e}")
             return False
     
+    @staticmethod
+    def build_summary(df: pd.DataFrame, top_issues: int = 10) -> Dict:
+        """
+        Build the headline statistics written to dashboard_summary.json.
+        
+        Args:
+            df: Processed reviews
+            top_issues: Number of high-priority reviews to list
+            
+        Returns:
+            Summary dictionary
+        """
+        if is_sampled(df) and not df.empty:
+            return DashboardGenerator._build_sampled_summary(df, top_issues)
+        
+        summary = {
+            'total_reviews': len(df),
+            'average_rating': float(df['rating'].mean()) if 'rating' in df.columns and not df.empty else 0,
+            'positive_sentiment_pct': float((df['sentiment'] == 'positive').sum() / len(df) * 100) if 'sentiment' in df.columns and not df.empty else 0,
+            'negative_sentiment_pct': float((df['sentiment'] == 'negative').sum() / len(df) * 100) if 'sentiment' in df.columns and not df.empty else 0,
+            'high_priority_count': int((df['priority'] == 'high').sum()) if 'priority' in df.columns else 0,
+            'top_category': df['category'].mode()[0] if 'category' in df.columns and not df.empty else 'N/A',
+        }
+        
+        summary.update(DashboardGenerator._top_high_priority(df, top_issues))
+        return summary
+    
+    @staticmethod
+    def _top_high_priority(df: pd.DataFrame, top_issues: int) -> Dict:
+        """Most upvoted, lowest rated high-priority reviews first."""
+        summary = {}
+        if 'priority' in df.columns:
+            high = df[df['priority'] == 'high']
+            sort_columns = [c for c in ['thumbs_up', 'rating'] if c in high.columns]
+            if sort_columns:
+                high = high.sort_values(sort_columns, ascending=[c != 'thumbs_up' for c in sort_columns])
+            columns = [c for c in ['review_id', 'rating', 'thumbs_up', 'category', 'subcategory', 'summary'] if c in high.columns]
+            summary['top_high_priority'] = json.loads(high.head(top_issues)[columns].to_json(orient='records', force_ascii=False))
+        
+        return summary
+    
+    @staticmethod
+    def estimate_table(df: pd.DataFrame, fields=('category', 'sentiment', 'priority')) -> pd.DataFrame:
+        """
+        Population proportions with confidence intervals, one row per field value.
+        
+        Args:
+            df: Processed reviews from a stratified sample
+            fields: Label columns to estimate
+            
+        Returns:
+            DataFrame with field, value, proportion, ci_low, ci_high, sample_count, estimated_count
+        """
+        tables = []
+        for field in fields:
+            if field in df.columns:
+                estimates = estimate_proportions(df, field, SAMPLING_CONFIG['confidence'])
+                tables.append(estimates.rename_axis('value').reset_index().assign(field=field))
+        if not tables:
+            return pd.DataFrame()
+        table = pd.concat(tables, ignore_index=True)
+        return table[['field', 'value', 'proportion', 'ci_low', 'ci_high', 'sample_count', 'estimated_count']]
+    
+    @staticmethod
+    def _build_sampled_summary(df: pd.DataFrame, top_issues: int) -> Dict:
+        """Summary for a stratified sample: headline figures are weighted population estimates."""
+        table = DashboardGenerator.estimate_table(df)
+        estimates = {}
+        for row in table.itertuples(index=False):
+            estimates.setdefault(row.field, {})[str(row.value)] = {
+                'pct': round(row.proportion * 100, 2),
+                'ci_low_pct': round(row.ci_low * 100, 2),
+                'ci_high_pct': round(row.ci_high * 100, 2),
+                'estimated_count': int(row.estimated_count),
+            }
+        
+        def pct(field, value):
+            return estimates.get(field, {}).get(value, {}).get('pct', 0.0)
+        
+        population = int(round(df['sample_weight'].sum()))
+        categories = estimates.get('category', {})
+        summary = {
+            'total_reviews': population,
+            'average_rating': float((df['rating'] * df['sample_weight']).sum() / df['sample_weight'].sum()) if 'rating' in df.columns else 0,
+            'positive_sentiment_pct': pct('sentiment', 'positive'),
+            'negative_sentiment_pct': pct('sentiment', 'negative'),
+            'high_priority_count': estimates.get('priority', {}).get('high', {}).get('estimated_count', 0),
+            'top_category': max(categories, key=lambda c: categories[c]['pct']) if categories else 'N/A',
+            'sampling': {
+                'sample_size': len(df),
+                'population': population,
+                'strata': int(df['stratum'].nunique()),
+                'confidence': SAMPLING_CONFIG['confidence'],
+            },
+            'estimates': estimates,
+        }
+        summary.update(DashboardGenerator._top_high_priority(df, top_issues))
+        return summary
+    
+    def save_summary(self, summary: Dict) -> Path:
+        """
+        Write dashboard_summary.json atomically, so dashboards never read a partial file.
+        
+        Args:
+            summary: Summary dictionary
+            
+        Returns:
+            Path of the summary file
+        """
+        summary_file = self.output_dir / 'dashboard_summary.json'
+        tmp_file = summary_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        tmp_file.replace(summary_file)
+        
+        logger.info(f" Saved summary: {summary_file}")
+        return summary_file
+    
     def generate_all_charts(self, df: pd.DataFrame):
         """Generate all visualization charts."""
         logger.info(" Generating all charts...")
@@ -0,0 +1,93 @@
+"""
+Tests for batch jobs, using the local stand-in client.
+"""
+
+import json
+import time
+
+import pandas as pd
+
+from scripts import process_llm
+from scripts.batch_jobs import FAILED, LocalBatchJobClient, read_results, request_line, write_jsonl
+from scripts.llm_backends import LLMBackend, FakeGeminiBackend
+from scripts.process_llm import FeedbackProcessor
+
+
+class SlowBackend(LLMBackend):
+    """Backend that takes a while per request, counting the requests it answers."""
+
+    name = "slow"
+
+    def __init__(self, latency: float):
+        super().__init__("slow")
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, prompt, temperature):
+        time.sleep(self.latency)
+        self.calls += 1
+        return "{}"
+
+
+def test_request_lines_use_the_batch_api_format():
+    """Test that the static prefix becomes the system instruction of a request line."""
+    line = request_line('U0', 'ULASAN: "Bagus"', 0.1, prefix='INSTRUKSI')
+
+    assert line['key'] == 'U0'
+    assert line['request']['contents'][0]['parts'][0]['text'] == 'ULASAN: "Bagus"'
+    assert line['request']['system_instruction'] == {'parts': [{'text': 'INSTRUKSI'}]}
+    assert 'system_instruction' not in request_line('U0', 'x', 0.1)['request']
+
+
+def test_results_map_keys_to_text_or_error(tmp_path):
+    """Test that result lines yield response text, error messages, and skip malformed lines."""
+    result_file = tmp_path / 'results.jsonl'
+    result_file.write_text('\n'.join([
+        json.dumps({'key': 'U0', 'response': {'candidates': [{'content': {'parts': [{'text': '{"a": '},
+                                                                                 {'text': '1}'}]}}]}}),
+        json.dumps({'key': 'U1', 'error': {'message': 'quota exceeded'}}),
+        json.dumps({'key': 'U2', 'response': {'candidates': []}}),
+        '{"key": "U3", "resp',
+    ]), encoding='utf-8')
+
+    assert read_results(result_file) == {
+        'U0': ('{"a": 1}', None),
+        'U1': (None, 'quota exceeded'),
+        'U2': (None, 'response has no text'),
+    }
+
+
+def test_wait_cancels_a_job_still_running_at_the_timeout(tmp_path):
+    """Test that a job unfinished at the timeout is cancelled instead of left running."""
+    backend = SlowBackend(latency=0.05)
+    client = LocalBatchJobClient(backend, jobs_dir=tmp_path / 'jobs', workers=1)
+    request_file = tmp_path / 'requests.jsonl'
+    write_jsonl((request_line(str(i), f"review {i}", 0.0) for i in range(100)), request_file)
+
+    job_id = client.submit(request_file, 'test')
+    assert client.wait(job_id, timeout=0.2) != FAILED
+    assert client.status(job_id) == FAILED
+
+    # The cancelled job stops sending requests and never writes results
+    time.sleep(0.3)
+    assert backend.calls < 20
+    assert not (tmp_path / 'jobs' / job_id / 'results.jsonl').exists()
+
+
+def test_batch_job_run_matches_the_interactive_run(tmp_path, monkeypatch):
+    """Test that reviews classified through a batch job get the interactive labels."""
+    monkeypatch.setitem(process_llm.BATCH_JOB_CONFIG, 'dir', tmp_path / 'batch_jobs')
+    monkeypatch.setitem(process_llm.BATCH_JOB_CONFIG, 'local_poll_interval', 0.01)
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'batch_size', 2)
+    df = pd.DataFrame({'review_id': ['gp:0', 'gp:1', 'gp:2'],
+                                   'content': ['Login gagal', 'Sering crash', 'Desain bagus'], 'rating': [1, 1, 5]})
+    labels = {}
+    for batch_job in (False, True):
+        backend = FakeGeminiBackend(latency_ms=0, error_rate=0, rate_limit_burst_rate=0, malformed_rate=0)
+        processor = FeedbackProcessor(use_cache=False, pre_classifiers=[], backend=backend, batch_job=batch_job)
+        result = processor.process_reviews(df.copy())
+        labels[batch_job] = result[['category', 'subcategory', 'label_source']].values.tolist()
+
+    assert labels[True] == labels[False]
+    assert processor.stats['batch_job']['ingested'] == 3 and processor.stats['batch_job']['fallback'] == 0
+    assert not any((tmp_path / 'batch_jobs').iterdir())
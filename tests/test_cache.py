@@ -0,0 +1,40 @@
+"""
+Tests for the SQLite classification cache.
+"""
+
+from utils.cache import ClassificationCache
+
+
+def test_size_tracks_inserts_replacements_and_evictions(tmp_path):
+    """Test that the in-memory row count follows inserts, replacements, evictions and clear."""
+    cache = ClassificationCache(tmp_path / 'cache.db', prompt_version='v1', max_entries=10)
+    for i in range(10):
+        cache.put(f"review {i}", 5, {'category': 'Other'})
+    cache.put("review 0", 5, {'category': 'Bug Report'})
+    assert cache.stats()['size'] == 10
+    assert cache.get("review 0", 5) == {'category': 'Bug Report'}
+
+    # The 11th row goes over the cap: evict down to 90%
+    cache.put("review 10", 5, {'category': 'Other'})
+    assert cache.stats()['size'] == 9
+    assert cache.stats()['evictions'] == 2
+    cache.close()
+
+    # The count is loaded from disk when the file is reopened
+    reopened = ClassificationCache(tmp_path / 'cache.db', prompt_version='v1', max_entries=10)
+    assert reopened.stats()['size'] == 9
+    assert reopened.clear() == 9
+    assert reopened.stats()['size'] == 0
+    reopened.close()
+
+
+def test_keys_ignore_whitespace_and_case_but_not_rating(tmp_path):
+    """Test that trivially different texts share an entry while ratings and prompt versions do not."""
+    cache = ClassificationCache(tmp_path / 'cache.db', prompt_version='v1')
+    cache.put("Aplikasi  sering CRASH", 1, {'category': 'Performance'})
+
+    assert cache.get("aplikasi sering crash ", 1) == {'category': 'Performance'}
+    assert cache.get("aplikasi sering crash", 2) is None
+    assert ClassificationCache(tmp_path / 'cache.db', prompt_version='v2').get("aplikasi sering crash", 1) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    cache.close()
@@ -0,0 +1,68 @@
+"""
+Tests for review text compaction and token estimates.
+"""
+
+from utils.compaction import TextCompactor, estimate_tokens
+
+
+def test_estimate_tokens_counts_utf8_bytes():
+    """Test that emoji and non-Latin text weigh more than ASCII letters."""
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+    assert estimate_tokens('😡') == 1 and estimate_tokens('😡' * 4) == 4
+    assert estimate_tokens('abcdefgh', chars_per_token=2) == 4
+
+
+def test_invisible_characters_and_whitespace_are_removed():
+    """Test that zero-width characters, BOMs and whitespace runs are normalized away."""
+    compactor = TextCompactor()
+
+    assert compactor.normalize('\ufeff Aplikasi\u200b  bagus\n\n\tsekali ') == 'Aplikasi bagus sekali'
+
+
+def test_repetition_is_cut_to_max_repeat():
+    """Test that repeated characters, emoji and short units keep max_repeat copies but numbers survive."""
+    compactor = TextCompactor(max_repeat=3)
+
+    assert compactor.normalize('Jelek!!!!!!!! 😡😡😡😡😡😡') == 'Jelek!!! 😡😡😡'
+    assert compactor.normalize('wkwkwkwkwkwk lucu') == 'wkwkwk lucu'
+    assert compactor.normalize('crash crash crash crash crash terus') == 'crash crash crash terus'
+    assert compactor.normalize('bayar 1000000 rupiah') == 'bayar 1000000 rupiah'
+
+
+def test_long_reviews_keep_head_and_tail_within_budget():
+    """Test that a review over the token budget is cut to its head and tail on word boundaries."""
+    compactor = TextCompactor(max_tokens=20, head_fraction=0.7)
+    words = [f"kata{i}" for i in range(100)]
+
+    compacted = compactor.truncate(' '.join(words))
+
+    assert estimate_tokens(compacted) <= 20
+    head, tail = compacted.split(' … ')
+    assert head.split()[0] == 'kata0' and tail.split()[-1] == 'kata99'
+    assert all(word in words for word in head.split() + tail.split())
+    assert len(head) > len(tail)
+
+
+def test_emoji_dense_text_still_fits_the_budget():
+    """Test that uneven byte density does not overshoot the budget."""
+    compactor = TextCompactor(max_tokens=10, max_repeat=100)
+    text = 'ok ' * 20 + '😡🔥' * 30
+
+    assert estimate_tokens(compactor.truncate(text)) <= 10
+
+
+def test_compact_tracks_tokens_saved():
+    """Test that compaction counts normalized, truncated and saved tokens per run."""
+    compactor = TextCompactor(max_tokens=5)
+    assert compactor.compact('Bagus') == 'Bagus'
+    compactor.compact('Aplikasi ini sering sekali crash ketika dibuka pagi hari!!!!!!!!')
+
+    summary = compactor.summary()
+
+    assert (summary['reviews'], summary['normalized'], summary['truncated']) == (2, 1, 1)
+    assert summary['tokens_saved'] == summary['tokens_before'] - summary['tokens_after'] > 0
+
+    compactor.reset()
+    assert compactor.summary()['saved_pct'] == 0.0
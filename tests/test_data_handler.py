@@ -0,0 +1,20 @@
+"""
+Tests for DataHandler file I/O.
+"""
+
+import pandas as pd
+
+from utils.data_handler import DataHandler
+
+
+def test_save_to_csv_writes_a_dataframe_column_selection(tmp_path):
+    """Test that a DataFrame is written directly, limited to the requested columns."""
+    df = pd.DataFrame({'review_id': ['gp:1', 'gp:2'], 'content': ['Bagus', 'Lambat'], 'internal': [1, 2]})
+    filepath = tmp_path / 'out' / 'reviews.csv'
+
+    assert DataHandler.save_to_csv(df, filepath, columns=['review_id', 'content'])
+    assert DataHandler.save_to_csv(df.iloc[:1], filepath, mode='a', columns=['review_id', 'content'])
+
+    saved = pd.read_csv(filepath, encoding='utf-8-sig')
+    assert saved.columns.tolist() == ['review_id', 'content']
+    assert saved['review_id'].tolist() == ['gp:1', 'gp:2', 'gp:1']
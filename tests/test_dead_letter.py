@@ -0,0 +1,33 @@
+"""
+Tests for the dead-letter store of failed classifications.
+"""
+
+from utils.dead_letter import DeadLetterQueue
+
+
+def failure(review_id, error='transient: 503 unavailable'):
+    """A failed review as process_llm records it."""
+    return {'review_id': review_id, 'content': f"review {review_id}", 'rating': 1, 'error': error}
+
+
+def test_attempts_carry_over_and_recovered_reviews_are_dropped(tmp_path):
+    """Test that a review failing again counts another attempt and repaired ones leave the store."""
+    queue = DeadLetterQueue(tmp_path / 'dead_letter' / 'out.jsonl')
+    queue.save([failure('gp:1'), failure('gp:2')])
+
+    queue.save([failure('gp:2', error='parse: unusable response'), failure('gp:3')])
+    entries = queue.load()
+
+    assert sorted(entries) == ['gp:2', 'gp:3']
+    assert (entries['gp:2']['attempts'], entries['gp:3']['attempts']) == (2, 1)
+    assert entries['gp:2']['error'] == 'parse: unusable response'
+
+
+def test_saving_no_failures_deletes_the_store(tmp_path):
+    """Test that a clean run removes the store instead of leaving an empty file."""
+    queue = DeadLetterQueue(tmp_path / 'out.jsonl')
+    queue.save([failure('gp:1')])
+
+    assert queue.save([]) == 0
+    assert not queue.filepath.exists()
+    assert queue.load() == {}
@@ -0,0 +1,57 @@
+"""
+Tests for MinHash/LSH near-duplicate clustering.
+"""
+
+import numpy as np
+import pytest
+
+from utils.dedup import NearDuplicateClusterer
+
+
+@pytest.fixture
+def clusterer():
+    return NearDuplicateClusterer(threshold=0.8)
+
+
+def test_near_duplicates_share_a_cluster(clusterer):
+    """Test that punctuation, case and spacing variants cluster, distinct texts do not."""
+    texts = [
+        "Aplikasi sering force close saat membuka jadwal kuliah",
+        "aplikasi sering FORCE CLOSE saat membuka jadwal kuliah!!",
+        "Tampilan baru sangat bagus dan mudah digunakan",
+        "Aplikasi  sering force close, saat membuka jadwal kuliah.",
+    ]
+    cluster_ids = clusterer.cluster(texts, [1, 1, 5, 1])
+
+    assert cluster_ids.tolist() == [0, 0, 1, 0]
+
+
+def test_clusters_never_cross_rating_buckets(clusterer):
+    """Test that identical texts with different ratings stay apart."""
+    cluster_ids = clusterer.cluster(["Login gagal terus", "Login gagal terus"], [1, 5])
+    assert cluster_ids[0] != cluster_ids[1]
+
+
+def test_signature_agreement_estimates_jaccard(clusterer):
+    """Test that unrelated texts share few MinHash rows and identical ones share all."""
+    signatures = clusterer.signatures([
+        "Server sering down saat jam sibuk pagi hari",
+        "Server sering down saat jam sibuk pagi hari",
+        "Fitur notifikasi tugas sangat membantu mahasiswa",
+    ])
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+
+
+def test_empty_and_short_texts(clusterer):
+    """Test that no texts give no clusters and texts shorter than a shingle still get one."""
+    assert clusterer.cluster([], []).size == 0
+    cluster_ids = clusterer.cluster(["ok", "ok", ""], [5, 5, 5])
+    assert cluster_ids[0] == cluster_ids[1] != cluster_ids[2]
+    assert cluster_ids.dtype == np.int64
+
+
+def test_bands_must_divide_permutations():
+    """Test that an LSH layout that does not split the signature evenly is rejected."""
+    with pytest.raises(ValueError):
+        NearDuplicateClusterer(num_perm=64, bands=10)
@@ -0,0 +1,87 @@
+"""
+Tests for the fair-share scheduler.
+"""
+
+import threading
+
+from utils.fair_share import FairShareScheduler
+
+
+def drain(scheduler):
+    """Empty the request bucket so every grant has to wait for a refill."""
+    scheduler._request_bucket.tokens = 0.0
+
+
+def run_apps(requests):
+    """Acquire `count` grants per (limiter, count) from one thread per app; returns the grant order."""
+    order = []
+    lock = threading.Lock()
+
+    def worker(limiter, count):
+        for _ in range(count):
+            limiter.acquire()
+            with lock:
+                order.append(limiter.app)
+
+    threads = [threading.Thread(target=worker, args=spec) for spec in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_backlogged_apps_share_the_budget_by_weight():
+    """Test that while both apps are queued the heavier one gets its weighted share."""
+    scheduler = FairShareScheduler(requests_per_minute=6000)
+    heavy = scheduler.register('heavy', weight=3)
+    light = scheduler.register('light', weight=1)
+    drain(scheduler)
+
+    order = run_apps([(heavy, 30), (light, 30)])
+
+    assert 25 <= order[:40].count('heavy') <= 35
+    assert scheduler.summary()['heavy']['requests'] == 30
+
+
+def test_app_at_risk_of_its_deadline_jumps_the_queue():
+    """Test that an app that would miss its deadline at its fair share is served first."""
+    scheduler = FairShareScheduler(requests_per_minute=6000)
+    relaxed = scheduler.register('relaxed')
+    urgent = scheduler.register('urgent', deadline_seconds=1)
+    urgent.expect(60)
+    drain(scheduler)
+
+    order = run_apps([(relaxed, 30), (urgent, 60)])
+    summary = scheduler.summary()
+
+    assert summary['urgent']['urgent_grants'] > 0
+    assert order[:30].count('urgent') >= 25
+    assert summary['urgent']['deadline_met']
+
+
+def test_hedges_do_not_count_against_remaining_work():
+    """Test that spare grants spend budget without reducing the app's remaining work."""
+    scheduler = FairShareScheduler(requests_per_minute=600)
+    limiter = scheduler.register('com.example', deadline_seconds=60)
+    limiter.expect(5)
+
+    assert limiter.try_acquire()
+    assert scheduler.apps['com.example']['remaining'] == 5
+
+    limiter.acquire()
+    assert scheduler.apps['com.example']['remaining'] == 4
+
+    summary = scheduler.summary()['com.example']
+    # Hedges still spend budget, so they show up in the app's requests
+    assert (summary['requests'], summary['hedges']) == (2, 1)
+
+
+def test_spare_grants_wait_for_queued_apps_and_budget():
+    """Test that try_acquire refuses when the budget is spent."""
+    scheduler = FairShareScheduler(requests_per_minute=600)
+    limiter = scheduler.register('com.example')
+    drain(scheduler)
+
+    assert not limiter.try_acquire()
+    assert scheduler.summary()['com.example']['requests'] == 0
@@ -0,0 +1,98 @@
+"""
+Tests for latency-percentile request hedging.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.hedging import Hedger, percentile
+
+
+class SlowFirstCall:
+    """Callable whose first invocation is slow and later ones are fast."""
+
+    def __init__(self, slow=0.5):
+        self.slow = slow
+        self.invocations = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.invocations += 1
+            first = self.invocations == 1
+        time.sleep(self.slow if first else 0)
+        return 'slow' if first else 'fast'
+
+
+def warmed_hedger(**kwargs):
+    """Hedger that has already learned a near-zero latency threshold."""
+    hedger = Hedger(min_samples=5, **kwargs)
+    for _ in range(20):
+        hedger.call(lambda: 'ok')
+    return hedger
+
+
+def test_percentile_uses_nearest_rank():
+    """Test the nearest-rank percentile on small lists."""
+    values = [5, 1, 4, 2, 3]
+
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(values, 1) == 1
+    assert percentile([], 99) == 0.0
+
+
+def test_no_hedging_before_min_samples():
+    """Test that calls are not duplicated until a threshold has been learned."""
+    hedger = Hedger(min_samples=5, max_hedge_rate=1.0)
+    fn = SlowFirstCall(slow=0.05)
+
+    assert hedger.call(fn) == 'slow'
+    assert fn.invocations == 1 and hedger.threshold() is None
+
+
+def test_slow_call_is_hedged_and_the_faster_copy_wins():
+    """Test that a call past the learned percentile is duplicated and the first success returned."""
+    hedger = warmed_hedger(max_hedge_rate=1.0)
+    fn = SlowFirstCall()
+
+    assert hedger.call(fn) == 'fast'
+    summary = hedger.summary()
+    assert (summary['hedged'], summary['hedge_wins']) == (1, 1)
+
+
+def test_hedges_respect_the_rate_cap_and_the_caller_check():
+    """Test that hedges beyond max_hedge_rate, or refused by `allow`, are not fired."""
+    capped = warmed_hedger(max_hedge_rate=0.01)
+    assert capped.call(SlowFirstCall(slow=0.05)) == 'slow'
+
+    refused = warmed_hedger(max_hedge_rate=1.0)
+    assert refused.call(SlowFirstCall(slow=0.05), allow=lambda: False) == 'slow'
+
+    for hedger in (capped, refused):
+        assert (hedger.hedged, hedger.capped) == (0, 1)
+
+
+def test_thresholds_are_learned_per_key():
+    """Test that a slow model's latencies do not set the threshold of a fast one."""
+    hedger = Hedger(min_samples=3, percentile=50)
+    for _ in range(3):
+        hedger.call(lambda: time.sleep(0.05), key='pro')
+        hedger.call(lambda: None, key='lite')
+
+    assert hedger.threshold('pro') >= 0.05 > hedger.threshold('lite')
+
+
+def test_error_is_raised_only_when_both_copies_fail():
+    """Test that the first copy's error surfaces if the hedge fails too."""
+    hedger = warmed_hedger(max_hedge_rate=1.0)
+
+    def fail():
+        time.sleep(0.05)
+        raise TimeoutError('deadline exceeded')
+
+    with pytest.raises(TimeoutError):
+        hedger.call(fail)
+    assert hedger.hedged == 1
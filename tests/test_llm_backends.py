@@ -0,0 +1,198 @@
+"""
+Tests for the LLM backends.
+"""
+
+import sys
+import json
+import types
+
+import pytest
+
+from config.config import FEEDBACK_CATEGORIES
+from scripts import llm_backends
+from scripts.llm_backends import LLMBackend, GeminiBackend, FakeGeminiBackend, FakeAPIError, create_backend
+from utils.retry import ErrorKind, classify_error, retry_after_seconds
+
+BATCH_PROMPT = """ULASAN:
+[
+  {"id": "R0", "ulasan": "Login gagal terus", "rating": 1},
+  {"id": "R1", "ulasan": "Desainnya bagus", "rating": 5}
+]
+"""
+
+
+def quiet_backend(**overrides):
+    """Fake backend with no latency and no injected failures."""
+    config = {'latency_ms': 0, 'error_rate': 0, 'rate_limit_burst_rate': 0, 'malformed_rate': 0}
+    return FakeGeminiBackend('fake-model', **{**config, **overrides})
+
+
+def test_fake_backend_answers_every_review_in_a_batch():
+    """Test that a batched prompt gets one schema-valid classification per review ID."""
+    reply = quiet_backend().generate(BATCH_PROMPT, 0.0)
+    results = json.loads(reply.removeprefix('```json').removesuffix('```'))
+
+    assert [result['id'] for result in results] == ['R0', 'R1']
+    for result in results:
+        assert result['subcategory'] in FEEDBACK_CATEGORIES[result['category']]
+    assert [result['sentiment'] for result in results] == ['negative', 'positive']
+
+
+def test_fake_backend_answers_a_single_review_with_an_object():
+    """Test that a single-review prompt gets one classification object."""
+    reply = quiet_backend().generate('ULASAN: "Sering crash"\nRATING: 1\n', 0.0)
+    result = json.loads(reply.removeprefix('```json').removesuffix('```'))
+
+    assert result == FakeGeminiBackend.classify('Sering crash', 1)
+
+
+def test_fake_backend_injects_shaped_failures():
+    """Test that injected 5xx, 429 and truncated replies look like the real ones to the retry logic."""
+    with pytest.raises(FakeAPIError) as error:
+        quiet_backend(error_rate=1.0).generate(BATCH_PROMPT, 0.0)
+    assert classify_error(error.value) == ErrorKind.TRANSIENT
+
+    with pytest.raises(FakeAPIError) as error:
+        quiet_backend(rate_limit_burst_rate=1.0, rate_limit_retry_after=7.0).generate(BATCH_PROMPT, 0.0)
+    assert classify_error(error.value) == ErrorKind.RATE_LIMIT
+    assert retry_after_seconds(error.value) == 7.0
+
+    reply = quiet_backend(malformed_rate=1.0).generate(BATCH_PROMPT, 0.0)
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(reply.removeprefix('```json'))
+
+
+def test_fake_backend_is_reproducible_for_a_seed():
+    """Test that two backends with the same seed fail on the same calls."""
+    def outcomes(seed):
+        backend = quiet_backend(error_rate=0.3, malformed_rate=0.3, seed=seed)
+        return [backend._draw()[1] for _ in range(50)]
+
+    assert outcomes(7) == outcomes(7)
+    assert outcomes(7) != outcomes(8)
+
+
+def test_create_backend_rejects_unknown_names():
+    """Test that an unknown backend name fails with the available choices."""
+    assert isinstance(create_backend('fake'), FakeGeminiBackend)
+    with pytest.raises(ValueError, match='gemini'):
+        create_backend('openai')
+
+
+class EchoBackend(LLMBackend):
+    """Backend without system instructions that echoes its prompt."""
+
+    name = "echo"
+
+    def generate(self, prompt, temperature):
+        return prompt
+
+
+def test_prefix_is_prepended_for_backends_without_system_instructions():
+    """Test that backends without system instructions still see the full prompt."""
+    backend = EchoBackend('echo-model')
+
+    assert backend.generate_with_prefix('ULASAN: "Bagus"', 0.0, prefix='INSTRUKSI') == 'INSTRUKSI\n\nULASAN: "Bagus"'
+    assert backend.prefix_stats['calls'] == 1
+
+
+class NotFound(Exception):
+    """Stands in for google.api_core.exceptions.NotFound."""
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel, optionally built on a cached content."""
+
+    def __init__(self, genai, cache=None, system_instruction=None):
+        self.genai = genai
+        self.cache = cache
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, generation_config=None):
+        if self.cache is not None and self.cache['expired']:
+            raise NotFound(f"404 CachedContent not found: {self.cache['name']}")
+        self.genai.calls.append('cached' if self.cache is not None else 'plain')
+        return types.SimpleNamespace(text='{"ok": true}', usage_metadata=None)
+
+
+def make_genai():
+    """Stub of the google.generativeai module with a CachedContent API."""
+    genai = types.SimpleNamespace(caches=[], calls=[])
+    genai.configure = lambda api_key: None
+    genai.types = types.SimpleNamespace(GenerationConfig=lambda **kwargs: kwargs)
+
+    def create(model, system_instruction, ttl):
+        cache = {'name': f"cachedContents/{len(genai.caches)}", 'expired': False}
+        genai.caches.append(cache)
+        return cache
+
+    class GenerativeModel(StubModel):
+        def __init__(self, model_name, system_instruction=None):
+            super().__init__(genai, system_instruction=system_instruction)
+
+        @staticmethod
+        def from_cached_content(cached_content):
+            return StubModel(genai, cache=cached_content)
+
+    genai.GenerativeModel = GenerativeModel
+    genai.caching = types.SimpleNamespace(CachedContent=types.SimpleNamespace(create=create))
+    return genai
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    genai = make_genai()
+    google = types.ModuleType('google')
+    google.generativeai = genai
+    monkeypatch.setitem(sys.modules, 'google', google)
+    monkeypatch.setitem(sys.modules, 'google.generativeai', genai)
+    monkeypatch.setitem(llm_backends.LLM_CONFIG, 'context_cache_ttl', 3600)
+    return GeminiBackend('gemini-test', api_key='test-key'), genai
+
+
+def test_expired_cache_falls_back_to_system_instruction(backend):
+    """Test that a server-side expired cache falls back to a plain system instruction, then is recreated."""
+    gemini, genai = backend
+    assert gemini.generate('review', 0.0, system_instruction='PREFIX') == '{"ok": true}'
+    assert genai.calls == ['cached']
+
+    # The cache expires server-side: the call must still succeed, without the cache
+    genai.caches[0]['expired'] = True
+    assert gemini.generate('review', 0.0, system_instruction='PREFIX') == '{"ok": true}'
+    assert genai.calls == ['cached', 'plain']
+
+    # The stale entry was evicted, so the next call creates a fresh cache
+    assert gemini.generate('review', 0.0, system_instruction='PREFIX') == '{"ok": true}'
+    assert len(genai.caches) == 2
+    assert genai.calls[-1] == 'cached'
+
+
+def test_cache_renewed_before_ttl_runs_out(backend, monkeypatch):
+    """Test that a cache is replaced once 90% of its TTL has passed."""
+    gemini, genai = backend
+    now = [1000.0]
+    monkeypatch.setattr(llm_backends.time, 'monotonic', lambda: now[0])
+
+    gemini.generate('review', 0.0, system_instruction='PREFIX')
+    now[0] += 3000  # under 90% of the TTL: the cache is reused
+    gemini.generate('review', 0.0, system_instruction='PREFIX')
+    assert len(genai.caches) == 1
+
+    now[0] += 300  # past 90% of the TTL: a new cache is created before the old one expires
+    gemini.generate('review', 0.0, system_instruction='PREFIX')
+    assert len(genai.caches) == 2
+    assert genai.calls == ['cached', 'cached', 'cached']
+
+
+def test_other_errors_are_not_retried(backend):
+    """Test that only cache-missing errors trigger the fallback call."""
+    gemini, genai = backend
+
+    def fail(prompt, generation_config=None):
+        raise RuntimeError("500 internal")
+
+    gemini.generate('review', 0.0, system_instruction='PREFIX')
+    gemini._prefixed_models['PREFIX']['model'].generate_content = fail
+    with pytest.raises(RuntimeError):
+        gemini.generate('review', 0.0, system_instruction='PREFIX')
+    assert genai.calls == ['cached']
@@ -0,0 +1,96 @@
+"""
+Tests for the local Naive Bayes classifier.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts import local_model, taxonomy
+from scripts.local_model import LocalClassifier, is_holdout, llm_labeled
+
+EXAMPLES = [
+    ('aplikasi sering crash dan force close', 1, 'Crash', 'negative', 'high'),
+    ('tiba tiba keluar sendiri crash terus', 1, 'Crash', 'negative', 'high'),
+    ('tidak bisa login password selalu salah', 2, 'Login', 'negative', 'medium'),
+    ('gagal login padahal akun benar', 2, 'Login', 'negative', 'medium'),
+    ('mantap sangat membantu terima kasih', 5, 'Praise', 'positive', 'low'),
+    ('bagus sekali aplikasinya membantu', 5, 'Praise', 'positive', 'low'),
+]
+
+
+def labeled_frame(repeat=20):
+    """LLM-labeled reviews built from EXAMPLES."""
+    rows = [
+        {'review_id': f"gp:{i}-{j}", 'content': content, 'rating': rating,
+         'subcategory': sub, 'sentiment': sentiment, 'priority': priority}
+        for i in range(repeat) for j, (content, rating, sub, sentiment, priority) in enumerate(EXAMPLES)
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_model_learns_labels_and_derives_the_category():
+    """Test that a trained model predicts confidently and maps subcategories to categories."""
+    model = LocalClassifier(num_features=2 ** 12)
+    model.partial_fit(labeled_frame())
+
+    predictions = model.predict(pd.DataFrame({'content': ['crash terus keluar sendiri', 'login gagal terus'],
+                                              'rating': [1, 2]}, index=[10, 11]))
+
+    assert predictions.index.tolist() == [10, 11]
+    assert predictions['subcategory'].tolist() == ['Crash', 'Login']
+    assert predictions['category'].tolist() == ['Performance', 'Authentication']
+    assert (predictions['confidence'] > 0.9).all()
+    assert 'crash' in predictions['keywords'].iloc[0]
+
+
+def test_partial_fit_is_additive():
+    """Test that training in two parts gives the same counts as training at once."""
+    df = labeled_frame(repeat=4)
+    whole = LocalClassifier(num_features=2 ** 10)
+    whole.partial_fit(df)
+    parts = LocalClassifier(num_features=2 ** 10)
+    parts.partial_fit(df.iloc[:10])
+    parts.partial_fit(df.iloc[10:])
+
+    for target in local_model.TARGETS:
+        np.testing.assert_array_equal(whole.counts[target], parts.counts[target])
+    assert parts.trained_rows == len(df)
+
+
+def test_artifacts_are_versioned_pruned_and_tied_to_the_taxonomy(tmp_path, monkeypatch):
+    """Test that saves bump the version, old artifacts are pruned and other taxonomies are ignored."""
+    monkeypatch.setitem(local_model.LOCAL_MODEL_CONFIG, 'keep_versions', 2)
+    model = LocalClassifier(num_features=2 ** 10)
+    model.partial_fit(labeled_frame(repeat=2))
+    for _ in range(3):
+        model.save(tmp_path)
+
+    loaded = LocalClassifier.load(tmp_path)
+
+    assert [version for version, _ in LocalClassifier.list_versions(tmp_path)] == [2, 3]
+    assert loaded.version == 3 and loaded.trained_rows == model.trained_rows
+    np.testing.assert_array_equal(loaded.class_docs['sentiment'], model.class_docs['sentiment'])
+
+    monkeypatch.setattr(taxonomy, 'FEEDBACK_CATEGORIES', {'Other': ['General Feedback']})
+    assert LocalClassifier.load(tmp_path) is None
+
+
+def test_training_rows_exclude_non_llm_and_fallback_labels():
+    """Test that only LLM or cached labels with real content are learned from."""
+    df = pd.DataFrame({
+        'content': ['crash', 'crash', 'crash', 'crash', ' '],
+        'label_source': ['llm', 'cache', 'model', 'llm', 'llm'],
+        'summary': ['ok', 'ok', 'ok', local_model.FALLBACK_SUMMARY, 'ok'],
+    })
+
+    assert llm_labeled(df).tolist() == [True, True, False, False, False]
+
+
+def test_holdout_is_deterministic_per_review_id():
+    """Test that the holdout split depends only on the review ID."""
+    ids = pd.Series([f"gp:{i}" for i in range(2000)])
+
+    holdout = is_holdout(ids, fraction=0.1)
+
+    assert 100 < holdout.sum() < 300
+    assert (is_holdout(ids[::-1], fraction=0.1) == holdout[::-1]).all()
@@ -0,0 +1,107 @@
+"""
+Tests for routing reviews across model tiers.
+"""
+
+import json
+import re
+
+import pytest
+
+from scripts import process_llm
+from scripts.llm_backends import LLMBackend
+from scripts.model_router import ModelRouter
+from scripts.process_llm import FeedbackProcessor
+
+TIERS = [
+    {'name': 'lite', 'model': 'lite-model', 'input_price': 1.0, 'output_price': 2.0},
+    {'name': 'flash', 'model': 'flash-model', 'input_price': 10.0, 'output_price': 20.0},
+    {'name': 'pro', 'model': 'pro-model', 'input_price': 100.0, 'output_price': 200.0},
+]
+
+
+class TierBackend(LLMBackend):
+    """Backend whose replies depend on the model; calls are recorded per model."""
+
+    name = "tier"
+
+    def __init__(self, model_name, calls=None):
+        super().__init__(model_name)
+        self.calls = {} if calls is None else calls
+
+    def for_model(self, model_name):
+        return TierBackend(model_name, self.calls)
+
+    def generate(self, prompt, temperature):
+        ids = re.findall(r'"id": "(R\d+)"', prompt)
+        self.calls.setdefault(self.model_name, []).append(ids)
+        if self.model_name == 'lite-model':
+            # The cheapest tier only manages the first review of a batch
+            ids = ids[:1]
+        return json.dumps([
+            {'id': review_id, 'category': 'Performance', 'subcategory': 'Crash', 'sentiment': 'negative',
+             'priority': 'high', 'summary': self.model_name}
+            for review_id in ids
+        ])
+
+
+def test_difficulty_signals_raise_the_start_tier_up_to_the_cap():
+    """Test that each signal moves a review one tier up, but never past max_start_tier."""
+    router = ModelRouter(TierBackend('lite-model'), tiers=TIERS, config={'max_start_tier': 1})
+
+    assert router.initial_tier('Bagus', 5) == (0, [])
+    assert router.initial_tier('Biasa saja', 3) == (1, ['ambiguous_rating'])
+    assert router.initial_tier('x' * 600, 3, local_confidence=0.3) == \
+        (1, ['long', 'ambiguous_rating', 'uncertain_local'])
+    # A pre-classifier without an opinion is not a signal
+    assert router.initial_tier('Bagus', 5, local_confidence=0.0) == (0, [])
+
+
+def test_escalation_stops_at_the_top_tier():
+    """Test that escalation moves one tier at a time and is counted per step."""
+    router = ModelRouter(TierBackend('lite-model'), tiers=TIERS)
+
+    assert router.escalate(0, reviews=3) == 1
+    assert router.escalate(1) == 2
+    assert router.escalate(2) == 2
+    assert router.summary()['escalations'] == {'lite->flash': 3, 'flash->pro': 1}
+
+
+def test_calls_are_costed_per_tier():
+    """Test that each tier uses its own model and is billed at its own price."""
+    router = ModelRouter(TierBackend('flash-model'), tiers=TIERS)
+
+    router.generate(0, 'x' * 400, 0.0)
+    router.generate(1, 'x' * 400, 0.0)
+    summary = router.summary()
+
+    assert set(router.backends[0].calls) == {'lite-model', 'flash-model'}
+    assert summary['tiers']['lite']['input_tokens'] == 100
+    assert summary['tiers']['flash']['cost'] == pytest.approx(10 * summary['tiers']['lite']['cost'])
+    assert summary['total_cost'] == pytest.approx(summary['tiers']['lite']['cost'] + summary['tiers']['flash']['cost'])
+
+
+def test_processor_escalates_only_the_missing_reviews(monkeypatch):
+    """Test that reviews a tier failed to classify move up while the rest keep their labels."""
+    monkeypatch.setitem(process_llm.ROUTING_CONFIG, 'enabled', True)
+    monkeypatch.setitem(process_llm.ROUTING_CONFIG, 'tiers', TIERS)
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'batch_size', 3)
+    monkeypatch.setattr(process_llm.time, 'sleep', lambda seconds: None)
+    backend = TierBackend('flash-model')
+    processor = FeedbackProcessor(use_cache=False, pre_classifiers=[], backend=backend)
+    processor.clusterer = None
+
+    results = processor.classify_batch([
+        {'id': 'R0', 'content': 'Sering crash', 'rating': 1},
+        {'id': 'R1', 'content': 'Lambat', 'rating': 1},
+        {'id': 'R2', 'content': 'Macet', 'rating': 1},
+    ], tier=0)
+
+    assert backend.calls == {'lite-model': [['R0', 'R1', 'R2']], 'flash-model': [['R1', 'R2']]}
+    assert [results[review_id]['summary'] for review_id in ('R0', 'R1', 'R2')] == \
+        ['lite-model', 'flash-model', 'flash-model']
+
+
+def test_routing_is_off_by_default():
+    """Test that without opting in every review goes to the configured model."""
+    assert process_llm.ROUTING_CONFIG['enabled'] is False
+    assert FeedbackProcessor(use_cache=False, pre_classifiers=[], backend=TierBackend('flash-model')).router is None
@@ -0,0 +1,18 @@
+"""
+Tests for multi-app processing.
+"""
+
+import pytest
+
+from scripts.multi_app import parse_app_spec
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('com.whatsapp', {'app_id': 'com.whatsapp', 'weight': 1.0, 'deadline_minutes': None}),
+    ('com.whatsapp:3', {'app_id': 'com.whatsapp', 'weight': 3.0, 'deadline_minutes': None}),
+    ('com.whatsapp:3:90', {'app_id': 'com.whatsapp', 'weight': 3.0, 'deadline_minutes': 90.0}),
+    ('com.whatsapp::90', {'app_id': 'com.whatsapp', 'weight': 1.0, 'deadline_minutes': 90.0}),
+])
+def test_app_specs_parse_weight_and_deadline(spec, expected):
+    """Test that APP_ID[:WEIGHT[:DEADLINE_MINUTES]] fills in defaults."""
+    assert parse_app_spec(spec) == expected
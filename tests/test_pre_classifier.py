@@ -0,0 +1,55 @@
+"""
+Tests for the lexicon pre-classifier.
+"""
+
+import pandas as pd
+import pytest
+
+from scripts.pre_classifier import LexiconPreClassifier
+
+
+@pytest.fixture
+def classifier():
+    return LexiconPreClassifier()
+
+
+def predict(classifier, rows):
+    return classifier.predict(pd.DataFrame(rows, columns=['content', 'rating']))
+
+
+def test_short_keyword_review_is_confident(classifier):
+    """Test that a short complaint with one clear keyword is labeled with high confidence."""
+    result = predict(classifier, [("Aplikasi sering crash", 1)]).iloc[0]
+
+    assert (result['category'], result['subcategory']) == ('Performance', 'Crash')
+    assert (result['sentiment'], result['priority']) == ('negative', 'high')
+    assert result['confidence'] >= 0.85
+    assert 'crash' in result['keywords']
+
+
+def test_short_praise_and_emoji_only_reviews(classifier):
+    """Test that short praise and text-free high ratings resolve to Praise."""
+    result = predict(classifier, [("Mantap, sangat membantu", 5), ("👍👍👍", 5), ("😡", 1)])
+
+    assert result['subcategory'].tolist() == ['Praise', 'Praise', 'General Feedback']
+    assert (result['confidence'] >= 0.85).all()
+
+
+def test_ambiguous_or_long_reviews_stay_below_threshold(classifier):
+    """Test that mixed signals and long texts are left to the LLM."""
+    result = predict(classifier, [
+        ("Login gagal dan aplikasi lambat", 2),
+        ("Kemarin saya mencoba membuka menu nilai tapi aplikasinya crash lalu harus install ulang", 1),
+        ("Menurut saya menu jadwal kurang lengkap", 3),
+    ])
+
+    assert (result['confidence'] < 0.85).all()
+
+
+def test_prediction_keeps_the_input_index(classifier):
+    """Test that predictions line up with the rows they came from."""
+    df = pd.DataFrame({'content': ["error terus", None], 'rating': [1, None]}, index=[10, 20])
+    result = classifier.predict(df)
+
+    assert result.index.tolist() == [10, 20]
+    assert result.loc[20, 'confidence'] == 0.0
@@ -0,0 +1,343 @@
+"""
+Tests for FeedbackProcessor against a stub LLM backend.
+"""
+
+import re
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import process_llm
+from scripts.llm_backends import LLMBackend, FakeGeminiBackend
+from scripts.process_llm import FeedbackProcessor, ClassificationColumns
+from scripts.pre_classifier import LexiconPreClassifier
+from scripts.taxonomy import save_taxonomy, load_taxonomy
+from utils.fair_share import FairShareScheduler
+from utils.run_journal import RunJournal
+
+
+def reviews_frame(columns):
+    """Raw reviews with sequential review IDs."""
+    df = pd.DataFrame(columns)
+    df.insert(0, 'review_id', [f"gp:{i}" for i in range(len(df))])
+    return df
+
+
+def batch_reply(prompt, drop=()):
+    """Answer a batch prompt with one classification per review ID, in reverse order."""
+    ids = re.findall(r'"id": "(R\d+)"', prompt)
+    return json.dumps([
+        {'id': review_id, 'category': 'Technical', 'subcategory': 'Bug', 'sentiment': 'negative',
+         'priority': 'high', 'summary': f"summary of {review_id}"}
+        for review_id in reversed(ids) if review_id not in drop
+    ])
+
+
+def single_reply(prompt):
+    """Answer a single-review prompt."""
+    return json.dumps({'category': 'Technical', 'subcategory': 'Bug', 'sentiment': 'negative',
+                       'priority': 'high', 'summary': 'summary'})
+
+
+class StubBackend(LLMBackend):
+    """Backend answering with `reply(prompt)` and recording every prompt."""
+
+    name = "stub"
+
+    def __init__(self, reply):
+        super().__init__("stub-model")
+        self.reply = reply
+        self.prompts = []
+
+    def generate(self, prompt, temperature):
+        self.prompts.append(prompt)
+        return self.reply(prompt)
+
+
+@pytest.fixture
+def make_processor(monkeypatch, tmp_path):
+    monkeypatch.setitem(process_llm.CACHE_CONFIG, 'path', tmp_path / 'cache.db')
+    monkeypatch.setattr(process_llm.time, 'sleep', lambda seconds: None)
+    # No partial snapshots or dashboard summaries outside tmp_path
+    monkeypatch.setitem(process_llm.SCHEDULING_CONFIG, 'snapshot_every', 0)
+    monkeypatch.setattr(process_llm, 'save_taxonomy', lambda: save_taxonomy(taxonomy_dir=tmp_path / 'taxonomies'))
+    monkeypatch.setattr(process_llm, 'load_taxonomy', lambda version: load_taxonomy(version, tmp_path / 'taxonomies'))
+
+    def make(reply, batch_size=1, use_cache=False, pre_classifiers=None):
+        monkeypatch.setitem(process_llm.LLM_CONFIG, 'batch_size', batch_size)
+        backend = StubBackend(reply)
+        processor = FeedbackProcessor(use_cache=use_cache, pre_classifiers=pre_classifiers or [], backend=backend)
+        return processor, backend
+    return make
+
+
+def test_batch_results_map_back_to_row_positions(make_processor):
+    """Test that batched replies in any order land on the rows they belong to."""
+    processor, backend = make_processor(batch_reply, batch_size=3)
+    df = reviews_frame({'content': ['Login gagal', '', 'Sering crash', 'Lambat sekali'], 'rating': [1, 3, 1, 2]})
+
+    result = processor.process_reviews(df)
+
+    assert result['summary'].tolist()[0] == 'summary of R0'
+    assert result['summary'].tolist()[2:] == ['summary of R2', 'summary of R3']
+    # The empty review never reaches the model
+    assert len(backend.prompts) == 1 and '"R1"' not in backend.prompts[0]
+
+
+def test_missing_batch_ids_are_requeued(make_processor):
+    """Test that only reviews missing from a batch reply are sent again."""
+    replies = iter([lambda prompt: batch_reply(prompt, drop={'R1'}), batch_reply])
+    processor, backend = make_processor(lambda prompt: next(replies)(prompt), batch_size=3)
+
+    results = processor.classify_batch([
+        {'id': 'R0', 'content': 'Login gagal', 'rating': 1},
+        {'id': 'R1', 'content': 'Sering crash', 'rating': 1},
+    ])
+
+    assert results['R1']['summary'] == 'summary of R1'
+    assert re.findall(r'"id": "(R\d+)"', backend.prompts[1]) == ['R1']
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_second_run_is_served_from_the_cache(make_processor, batch_size):
+    """Test that a re-run of the same reviews makes no model calls, batched or not."""
+    df = reviews_frame({'content': ['Login gagal', 'Sering crash', 'Lambat sekali'], 'rating': [1, 1, 2]})
+    reply = batch_reply if batch_size > 1 else single_reply
+    processor, backend = make_processor(reply, batch_size=batch_size, use_cache=True)
+    processor.process_reviews(df.copy())
+    calls = len(backend.prompts)
+
+    processor, backend = make_processor(reply, batch_size=batch_size, use_cache=True)
+    result = processor.process_reviews(df.copy())
+
+    assert calls > 0 and backend.prompts == []
+    assert (processor.stats['cache'], processor.stats['llm']) == (3, 0)
+    assert result['label_source'].tolist() == ['cache'] * 3
+    assert result['category'].tolist() == ['Technical'] * 3
+
+
+def test_near_duplicates_are_classified_once(make_processor):
+    """Test that one representative per near-duplicate cluster is sent and its labels are copied."""
+    processor, backend = make_processor(batch_reply, batch_size=3)
+    df = reviews_frame({'content': ['Sering crash saat login', 'sering CRASH saat login!', 'Bagus'],
+                       'rating': [1, 1, 5]})
+
+    result = processor.process_reviews(df)
+
+    assert re.findall(r'"id": "(R\d+)"', backend.prompts[0]) == ['R0', 'R2']
+    assert result['summary'].tolist() == ['summary of R0', 'summary of R0', 'summary of R2']
+    assert result['cluster_id'].tolist() == [0, 0, 1]
+
+
+def test_confident_local_predictions_skip_the_llm(make_processor):
+    """Test that rows a pre-classifier is confident about never reach the model."""
+    processor, backend = make_processor(batch_reply, batch_size=3, pre_classifiers=[LexiconPreClassifier()])
+    df = reviews_frame({'content': ['Sering crash', 'Menurut saya menu jadwal kurang lengkap untuk semester ini'],
+                       'rating': [1, 3]})
+
+    result = processor.process_reviews(df)
+
+    assert re.findall(r'"id": "(R\d+)"', backend.prompts[0]) == ['R1']
+    assert result['subcategory'].tolist()[0] == 'Crash'
+    assert (processor.stats['local'], processor.stats['llm']) == (1, 1)
+
+
+def test_resume_skips_reviews_in_the_journal(make_processor, monkeypatch, tmp_path):
+    """Test that --resume reuses journaled classifications and deletes the journal after saving."""
+    for name in ('RAW_DATA_DIR', 'PROCESSED_DATA_DIR', 'CHECKPOINT_DIR'):
+        (tmp_path / name).mkdir()
+        monkeypatch.setattr(process_llm, name, tmp_path / name)
+    df = reviews_frame({'author': ['a', 'b', 'c'], 'rating': [1, 1, 2],
+                        'content': ['Login gagal', 'Sering crash', 'Lambat sekali'],
+                        'date': ['2024-01-01'] * 3, 'thumbs_up': [0, 0, 0]})
+    df.to_csv(tmp_path / 'RAW_DATA_DIR' / 'reviews.csv', index=False)
+    journal = RunJournal(tmp_path / 'CHECKPOINT_DIR' / 'reviews.jsonl')
+    journal.append([('gp:0', json.loads(single_reply('')) | {'summary': 'from journal'})])
+    journal.close()
+    processor, backend = make_processor(single_reply)
+
+    result = processor.run('reviews.csv', 'out.csv', resume=True)
+
+    assert len(backend.prompts) == 2 and all('Login gagal' not in prompt for prompt in backend.prompts)
+    assert result['summary'].tolist() == ['from journal', 'summary', 'summary']
+    assert (tmp_path / 'PROCESSED_DATA_DIR' / 'out.csv').exists()
+    assert not journal.filepath.exists()
+
+
+def test_zero_max_retries_still_makes_one_attempt(make_processor, monkeypatch):
+    """Test that max_retries=0 is clamped so each request is tried once."""
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'max_retries', 0)
+    processor, backend = make_processor(lambda prompt: 'not json')
+
+    result = processor.classify_review('Aplikasi sering keluar sendiri', 1)
+    results = processor.classify_batch([{'id': 'R0', 'content': 'Login gagal terus', 'rating': 2}])
+
+    assert result['category'] == 'Other' and results['R0']['category'] == 'Other'
+    assert len(backend.prompts) == 2
+
+
+def test_classification_columns_fill_and_propagate():
+    """Test that results stored per row, per frame and per cluster land on the right positions."""
+    results = ClassificationColumns(4)
+    results.set(0, {'category': 'Technical', 'summary': 'crash'}, 'llm')
+    results.set_many(np.array([2]), pd.DataFrame({'category': ['Other'], 'summary': ['ok']}), 'lexicon')
+    results.propagate(np.array([0, 0, 2, 3]))
+    df = pd.DataFrame(index=range(4))
+
+    results.assign_to(df)
+
+    assert df['category'].tolist() == ['Technical', 'Technical', 'Other', '']
+    assert results.sources.tolist() == ['llm', 'llm', 'lexicon', '']
+    assert results.filled.tolist() == [True, True, True, False]
+
+
+def test_high_impact_reviews_are_sent_first(make_processor, monkeypatch):
+    """Test that priority-first scheduling sends the 1-star review before earlier rows."""
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'concurrency', 1)
+    processor, backend = make_processor(single_reply)
+    df = reviews_frame({'content': ['Lumayan', 'Cukup bagus', 'Tidak bisa dibuka sama sekali'], 'rating': [4, 5, 1]})
+
+    processor.process_reviews(df)
+
+    assert 'Tidak bisa dibuka' in backend.prompts[0]
+
+
+def test_compact_responses_decode_to_the_same_labels(monkeypatch):
+    """Test that compact mode yields the same processed labels as full mode."""
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'batch_size', 4)
+    monkeypatch.setitem(process_llm.LLM_CONFIG, 'compact_details', 'all')
+    df = reviews_frame({'content': ['Login gagal', 'Sering crash', 'Desain bagus', 'Lambat sekali'],
+                        'rating': [1, 1, 5, 2]})
+    labels = {}
+    for response_format in ('full', 'compact'):
+        monkeypatch.setitem(process_llm.LLM_CONFIG, 'response_format', response_format)
+        backend = FakeGeminiBackend(latency_ms=0, error_rate=0, rate_limit_burst_rate=0, malformed_rate=0)
+        processor = FeedbackProcessor(use_cache=False, pre_classifiers=[], backend=backend)
+        result = processor.process_reviews(df.copy())
+        labels[response_format] = result[['category', 'subcategory', 'sentiment', 'priority']].values.tolist()
+
+    assert labels['compact'] == labels['full']
+
+
+def test_reprocess_failed_patches_only_failed_rows(make_processor, monkeypatch, tmp_path):
+    """Test that failed rows are re-classified in place and the dead-letter store tracks what still fails."""
+    monkeypatch.setattr(process_llm, 'PROCESSED_DATA_DIR', tmp_path)
+    monkeypatch.setattr(process_llm, 'DEAD_LETTER_DIR', tmp_path / 'dead_letter')
+    df = reviews_frame({'content': ['Login gagal', 'Sering crash', 'Desain bagus'], 'rating': [1, 1, 5]})
+    for field, values in {'category': ['Other', 'Other', 'UI/UX'], 'subcategory': ['General Feedback'] * 2 + ['Design'],
+                          'sentiment': ['negative', 'negative', 'positive'], 'priority': ['high', 'high', 'low'],
+                          'summary': ['-', '-', 'desain'], 'keywords': ['[]'] * 3,
+                          'label_source': ['default', 'default', 'llm'], 'status': ['failed', 'failed', 'ok']}.items():
+        df[field] = values
+    df.to_csv(tmp_path / 'out.csv', index=False)
+    # The first review keeps failing, the second now classifies
+    processor, backend = make_processor(lambda prompt: 'not json' if 'Login gagal' in prompt else single_reply(prompt))
+
+    processor.reprocess_failed('out.csv')
+    saved = pd.read_csv(tmp_path / 'out.csv', encoding='utf-8-sig')
+
+    assert saved['status'].tolist() == ['failed', 'ok', 'ok']
+    assert saved['label_source'].tolist() == ['default', 'llm', 'llm']
+    assert saved['summary'].tolist()[1:] == ['summary', 'desain']
+    assert all('Desain' not in prompt for prompt in backend.prompts)
+    assert list(processor.dead_letter_queue('out.csv').load()) == ['gp:0']
+
+
+def test_processed_files_keep_taxonomy_versions_as_text(make_processor, monkeypatch, tmp_path):
+    """Test that taxonomy hashes that look numeric are read back unchanged."""
+    monkeypatch.setattr(process_llm, 'PROCESSED_DATA_DIR', tmp_path)
+    (tmp_path / 'processed.csv').write_text(
+        "review_id,content,summary,status,taxonomy_version\n"
+        "1,Login gagal,Login fails,ok,0123456789e1\n"
+        "2,Bagus,Good app,ok,001234567890\n",
+        encoding='utf-8'
+    )
+    processor, _ = make_processor(single_reply)
+
+    df = processor._load_processed('processed.csv')
+
+    assert df['taxonomy_version'].tolist() == ['0123456789e1', '001234567890']
+
+
+def test_taxonomy_migration_reclassifies_only_affected_rows(make_processor, monkeypatch, tmp_path):
+    """Test that migration re-classifies rows the change touches and re-stamps the rest."""
+    monkeypatch.setattr(process_llm, 'PROCESSED_DATA_DIR', tmp_path)
+    monkeypatch.setattr(process_llm, 'DEAD_LETTER_DIR', tmp_path / 'dead_letter')
+    # The old taxonomy had a Technical/Glitch subcategory that has since been dropped
+    old = {category: list(subs) for category, subs in process_llm.FEEDBACK_CATEGORIES.items()}
+    old['Technical'].append('Glitch')
+    version = save_taxonomy(old, tmp_path / 'taxonomies')
+    df = reviews_frame({'content': ['Sering error', 'Desain bagus', 'Mantap'], 'rating': [2, 5, 5]})
+    for field, values in {'category': ['Technical', 'UI/UX', 'Other'], 'subcategory': ['Glitch', 'Design', 'Praise'],
+                          'sentiment': ['negative', 'positive', 'positive'], 'priority': ['high', 'low', 'low'],
+                          'summary': ['glitch', 'desain', 'mantap'], 'keywords': ['[]'] * 3,
+                          'label_source': ['llm'] * 3, 'status': ['ok'] * 3,
+                          'taxonomy_version': [version] * 3}.items():
+        df[field] = values
+    df.to_csv(tmp_path / 'out.csv', index=False)
+    processor, backend = make_processor(single_reply)
+
+    processor.migrate_taxonomy('out.csv')
+    saved = pd.read_csv(tmp_path / 'out.csv', encoding='utf-8-sig', dtype={'taxonomy_version': str})
+
+    assert len(backend.prompts) == 2
+    assert all('Desain' not in prompt for prompt in backend.prompts)
+    assert saved['subcategory'].tolist() == ['Bug', 'Design', 'Bug']
+    assert saved['taxonomy_version'].tolist() == [processor.taxonomy_version] * 3
+
+
+def test_app_limiter_is_told_the_remaining_work(make_processor):
+    """Test that a processor on a fair-share app limiter declares its requests and uses them up."""
+    processor, backend = make_processor(batch_reply, batch_size=2)
+    scheduler = FairShareScheduler(requests_per_minute=600)
+    processor.rate_limiter = scheduler.register('com.example', deadline_seconds=60)
+    df = reviews_frame({'content': ['Login gagal', 'Sering crash', 'Lambat sekali'], 'rating': [1, 1, 2]})
+
+    processor.process_reviews(df)
+
+    assert len(backend.prompts) == scheduler.summary()['com.example']['requests'] == 2
+    assert scheduler.apps['com.example']['remaining'] == 0
+
+
+def test_merge_page_stats_sums_counts_and_reweights_audits():
+    """Test that page counts add up, audits are weighted by rows and run-wide snapshots are replaced."""
+    totals = {}
+    FeedbackProcessor._merge_page_stats(totals, {
+        'total': 200, 'llm': 20, 'local': 5,
+        'audit': {'lexicon': {'rows': 10, 'category': 0.5, 'all_fields': 0.4}},
+        'routing': {'total_cost': 0.01},
+    })
+    FeedbackProcessor._merge_page_stats(totals, {
+        'total': 100, 'llm': 10, 'local': 1,
+        'audit': {'lexicon': {'rows': 30, 'category': 0.9, 'all_fields': 0.8}},
+        'routing': {'total_cost': 0.03},
+    })
+
+    assert (totals['total'], totals['llm'], totals['local']) == (300, 30, 6)
+    assert totals['audit']['lexicon'] == {'rows': 40, 'category': 0.8, 'all_fields': 0.7}
+    # Run-wide snapshots: the latest one covers every page
+    assert totals['routing'] == {'total_cost': 0.03}
+
+
+def test_streamed_pages_are_classified_and_saved_as_one_output(make_processor, monkeypatch, tmp_path):
+    """Test that pages are deduplicated across each other and get unique cluster IDs."""
+    monkeypatch.setattr(process_llm, 'PROCESSED_DATA_DIR', tmp_path)
+    monkeypatch.setattr(process_llm, 'CHECKPOINT_DIR', tmp_path / 'checkpoints')
+    monkeypatch.setattr(process_llm, 'DEAD_LETTER_DIR', tmp_path / 'dead_letter')
+    processor, backend = make_processor(single_reply)
+
+    def page(*contents):
+        return [{'review_id': f"gp:{content}", 'author': 'u', 'rating': 1, 'content': content,
+                 'date': '2026-10-01', 'thumbs_up': 0} for content in contents]
+
+    pages = [page('Login gagal', 'Sering crash'), page('Sering crash', 'Lambat sekali')]
+    df = processor.run_stream(iter(pages), output_file='out.csv', publish_progress=False)
+
+    assert df['content'].tolist() == ['Login gagal', 'Sering crash', 'Lambat sekali']
+    assert df['cluster_id'].is_unique
+    assert len(backend.prompts) == 3
+    assert processor.stats['pages'] == 2 and processor.stats['total'] == 3
+    assert (tmp_path / 'out.csv').exists()
+    assert not list((tmp_path / 'checkpoints').glob('*.jsonl'))
@@ -0,0 +1,76 @@
+"""
+Tests for the token-bucket rate limiter, on a fake clock.
+"""
+
+import pytest
+
+from utils import rate_limiter
+from utils.rate_limiter import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock that sleeping advances."""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(rate_limiter.time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity(clock):
+    """Test that a drained bucket refills per second and never above capacity."""
+    bucket = TokenBucket(60)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+    bucket.refill(clock[0] + 30)
+    assert bucket.tokens == pytest.approx(30)
+    bucket.refill(clock[0] + 600)
+    assert bucket.tokens == 60
+
+
+def test_limiter_paces_requests_after_the_burst(clock):
+    """Test that requests beyond the bucket wait for it to refill."""
+    limiter = RateLimiter(requests_per_minute=60)
+    waits = [limiter.acquire() for _ in range(62)]
+
+    assert waits[:60] == [0.0] * 60
+    assert waits[60:] == [pytest.approx(1.0), pytest.approx(1.0)]
+    assert limiter.total_requests == 62
+    assert limiter.total_wait == pytest.approx(2.0)
+
+
+def test_token_budget_limits_large_requests(clock):
+    """Test that the token bucket holds back a request until enough tokens refill."""
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=600)
+    assert limiter.acquire(tokens=600) == 0.0
+    assert limiter.acquire(tokens=300) == pytest.approx(30.0)
+
+
+def test_disabled_limits_never_wait(clock):
+    """Test that a limiter without limits admits everything at once."""
+    limiter = RateLimiter()
+    assert sum(limiter.acquire(tokens=10000) for _ in range(1000)) == 0.0
+
+
+def test_try_acquire_never_waits_or_overdraws(clock):
+    """Test that try_acquire admits only what is available now and consumes nothing on refusal."""
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+
+    assert limiter.try_acquire(tokens=500)
+    assert not limiter.try_acquire(tokens=200)
+    assert limiter.try_acquire(tokens=100)
+    assert not limiter.try_acquire()
+    assert (limiter.total_requests, limiter.total_wait, clock[0]) == (2, 0.0, 1000.0)
+
+    clock[0] += 30
+    assert limiter.try_acquire()
+
+
+def test_burst_caps_back_to_back_requests_below_the_minute_rate(clock):
+    """Test that a burst smaller than the per-minute rate limits requests sent at once."""
+    limiter = RateLimiter(requests_per_minute=60, burst=3)
+    waits = [limiter.acquire() for _ in range(5)]
+
+    assert waits[:3] == [0.0] * 3
+    assert waits[3:] == [pytest.approx(1.0), pytest.approx(1.0)]
@@ -0,0 +1,107 @@
+"""
+Tests for tolerant parsing and validation of LLM replies.
+"""
+
+from scripts.response_parser import ResponseParser
+
+VALID = ('"category": "Performance", "subcategory": "Crash", "sentiment": "negative", '
+         '"priority": "high", "summary": "crash"')
+
+
+def test_json_is_found_inside_prose_and_code_fences():
+    """Test that the first JSON object is extracted from chatty output."""
+    parser = ResponseParser()
+    result = parser.parse_single('Berikut hasilnya:\n```json\n{' + VALID + '}\n```\nSemoga membantu!')
+
+    assert result['subcategory'] == 'Crash'
+    assert parser.stats['repaired'] == 0
+
+
+def test_common_json_defects_are_repaired():
+    """Test that trailing commas, single quotes, Python literals and truncation are repaired."""
+    parser = ResponseParser()
+
+    assert parser.parse_single("{'category': 'Performance', 'subcategory': 'Crash', 'sentiment': 'negative', "
+                               "'priority': 'high', 'summary': 'crash', 'urgent': True,}")['urgent'] is True
+    assert parser.parse_single('{' + VALID + ', "keywords": ["crash", "log')['keywords'] == ['crash']
+    assert parser.stats['repaired'] == 2
+
+
+def test_batch_keeps_valid_items_of_a_truncated_array():
+    """Test that a batch reply cut off mid-item still yields its complete items."""
+    parser = ResponseParser()
+    text = '[{"id": "R0", ' + VALID + '}, {"id": "R1", ' + VALID + '}, {"id": "R2", "category": "Tech'
+
+    results = parser.parse_batch(text)
+
+    assert [result['id'] for result in results] == ['R0', 'R1']
+    assert parser.stats['salvaged_items'] == 2
+
+
+def test_near_miss_labels_are_coerced():
+    """Test that case, spacing and language variants map onto the taxonomy."""
+    parser = ResponseParser()
+    result = parser.validate({'category': 'performance', 'subcategory': 'crash', 'sentiment': 'Negative',
+                              'priority': 'tinggi', 'summary': ''})
+
+    assert (result['category'], result['subcategory'], result['sentiment'], result['priority']) == \
+        ('Performance', 'Crash', 'negative', 'high')
+    assert parser.stats['coerced_fields'] > 0
+
+
+def test_unknown_category_is_recovered_from_its_subcategory():
+    """Test that a known subcategory fixes an unrecognized category."""
+    result = ResponseParser().validate({'category': 'Stability', 'subcategory': 'Crash',
+                                        'sentiment': 'negative', 'priority': 'high', 'summary': ''})
+
+    assert result['category'] == 'Performance'
+
+
+def test_unusable_replies_return_nothing():
+    """Test that replies without JSON or required fields are rejected and counted."""
+    parser = ResponseParser()
+
+    assert parser.parse_single('Maaf, saya tidak bisa membantu.') is None
+    assert parser.parse_batch('[{"id": "R0", "category": "Technical"}]') == []
+    assert parser.stats['failed'] == 2
+
+
+def test_non_string_labels_fall_back_instead_of_raising():
+    """Test that list or object labels are treated as unrecognized."""
+    parser = ResponseParser()
+    result = parser.validate({'category': ['Bug Report'], 'subcategory': {'name': 'Crash'},
+                              'sentiment': 'negative', 'priority': 'high', 'summary': 'crash'})
+
+    assert result['category'] == parser.fallback_category
+    assert result['subcategory'] in parser.categories[parser.fallback_category]
+
+
+def test_fallback_category_comes_from_the_taxonomy():
+    """Test that a taxonomy without 'Other' falls back to its last category."""
+    parser = ResponseParser({'Bugs': ['Crash'], 'Misc': ['General']})
+    result = parser.validate({'category': 'Unknown', 'subcategory': 'Unknown',
+                              'sentiment': 'positive', 'priority': 'low', 'summary': ''})
+
+    assert parser.fallback_category == 'Misc'
+    assert (result['category'], result['subcategory']) == ('Misc', 'General')
+
+
+def test_compact_items_are_decoded_to_the_full_schema():
+    """Test that compact keys and enum codes expand to the usual labels."""
+    parser = ResponseParser()
+    results = parser.parse_batch('[{"i": "R0", "c": 2, "sc": 3, "s": -1, "p": "h", "m": "crash"},'
+                                 ' {"i": "R1", "c": 7, "sc": 2, "s": 1, "p": "l"}]')
+
+    assert [(r['id'], r['category'], r['subcategory'], r['sentiment'], r['priority']) for r in results] == [
+        ('R0', 'Performance', 'Crash', 'negative', 'high'),
+        ('R1', 'Other', 'Praise', 'positive', 'low'),
+    ]
+    assert (results[1]['summary'], results[1]['keywords']) == ('', [])
+
+
+def test_compact_codes_out_of_range_fall_back():
+    """Test that unknown or non-scalar codes are treated as unrecognized labels."""
+    parser = ResponseParser()
+
+    assert parser.validate({'c': 99, 'sc': 1, 's': 0, 'p': 'm'})['category'] == parser.fallback_category
+    assert parser.validate({'c': [2], 'sc': 3, 's': 0, 'p': 'm'})['category'] == parser.fallback_category
@@ -0,0 +1,96 @@
+"""
+Tests for error classification, backoff and the circuit breaker.
+"""
+
+import json
+
+import pytest
+
+from utils import retry
+from utils.retry import ErrorKind, RetryPolicy, CircuitBreaker, classify_error, retry_after_seconds
+
+
+class ApiError(Exception):
+    """Stands in for a google.api_core exception carrying an HTTP code."""
+
+    def __init__(self, code, message=''):
+        super().__init__(message)
+        self.code = code
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class PermissionDenied(Exception):
+    pass
+
+
+@pytest.mark.parametrize('error, kind', [
+    (ApiError(429), ErrorKind.RATE_LIMIT),
+    (ApiError(503), ErrorKind.TRANSIENT),
+    (ApiError(408), ErrorKind.TRANSIENT),
+    (ApiError(400), ErrorKind.PERMANENT),
+    (ServiceUnavailable(), ErrorKind.TRANSIENT),
+    (PermissionDenied(), ErrorKind.PERMANENT),
+    (TimeoutError(), ErrorKind.TRANSIENT),
+    (json.JSONDecodeError('bad', '', 0), ErrorKind.PARSE),
+    (RuntimeError('Quota exceeded for this project'), ErrorKind.RATE_LIMIT),
+    (RuntimeError('something odd'), ErrorKind.TRANSIENT),
+])
+def test_classify_error(error, kind):
+    """Test that failures are sorted by HTTP code first, then class name, then message."""
+    assert classify_error(error) == kind
+
+
+def test_retry_after_is_read_from_gemini_messages():
+    """Test that the retry hint in a Gemini 429 message is honored."""
+    assert retry_after_seconds(ApiError(429, 'Please retry in 41.3s.')) == 41.3
+    assert retry_after_seconds(ApiError(429, 'retry_delay { seconds: 12 }')) == 12
+    assert retry_after_seconds(ApiError(500)) is None
+
+
+def test_policy_never_retries_permanent_errors_and_caps_attempts():
+    """Test that permanent errors stop at once and other kinds stop at max_retries."""
+    policy = RetryPolicy(max_retries=3)
+
+    assert not policy.should_retry(ErrorKind.PERMANENT, 0)
+    assert policy.should_retry(ErrorKind.TRANSIENT, 1)
+    assert not policy.should_retry(ErrorKind.TRANSIENT, 2)
+
+
+def test_backoff_is_jittered_doubled_for_rate_limits_and_capped():
+    """Test that delays stay within the equal-jitter band and respect the server hint."""
+    policy = RetryPolicy(base_delay=2.0, max_delay=60.0)
+
+    for _ in range(20):
+        assert 2.0 <= policy.delay(ErrorKind.TRANSIENT, 1) <= 4.0
+        assert 4.0 <= policy.delay(ErrorKind.RATE_LIMIT, 1) <= 8.0
+        assert 30.0 <= policy.delay(ErrorKind.TRANSIENT, 10) <= 60.0
+        assert policy.delay(ErrorKind.PARSE, 5) <= 0.5
+    assert policy.delay(ErrorKind.TRANSIENT, 0, retry_after=45) == 45
+    assert policy.delay(ErrorKind.TRANSIENT, 0, retry_after=600) == 60.0
+
+
+def test_breaker_opens_on_error_rate_and_ignores_parse_errors(monkeypatch):
+    """Test that the breaker pauses callers only once API failures fill the window."""
+    now = [100.0]
+    waits = []
+    monkeypatch.setattr(retry.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(retry.time, 'sleep', waits.append)
+    breaker = CircuitBreaker(error_rate=0.5, window=4, cooldown=30.0)
+
+    for _ in range(10):
+        breaker.record_failure(ErrorKind.PARSE)
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure(ErrorKind.TRANSIENT)
+    breaker.before_call()
+    assert waits == []
+
+    breaker.record_failure(ErrorKind.RATE_LIMIT)
+    now[0] += 10
+    breaker.before_call()
+
+    assert waits == [20.0]
+    assert breaker.stats.as_dict()['breaker_trips'] == 1
@@ -0,0 +1,44 @@
+"""
+Tests for the run journal checkpoint.
+"""
+
+from utils.run_journal import RunJournal
+
+
+def test_appended_entries_are_loaded_back(tmp_path):
+    """Test that classifications appended in one run are read by the next."""
+    journal = RunJournal(tmp_path / 'checkpoints' / 'reviews.jsonl')
+    journal.append([('gp:1', {'category': 'Technical'}), ('gp:2', {'category': 'Content'})])
+    journal.append([('gp:3', {'category': 'UI/UX'})])
+    journal.close()
+
+    completed = RunJournal(journal.filepath).load()
+
+    assert completed == {'gp:1': {'category': 'Technical'}, 'gp:2': {'category': 'Content'},
+                         'gp:3': {'category': 'UI/UX'}}
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    """Test that a line cut off by a crash mid-write does not break loading."""
+    journal = RunJournal(tmp_path / 'reviews.jsonl')
+    journal.append([('gp:1', {'category': 'Technical'})])
+    journal.close()
+    with open(journal.filepath, 'a', encoding='utf-8') as f:
+        f.write('{"review_id": "gp:2", "classif')
+
+    assert RunJournal(journal.filepath).load() == {'gp:1': {'category': 'Technical'}}
+
+
+def test_missing_journal_loads_empty(tmp_path):
+    """Test that a first run starts with no completed classifications."""
+    assert RunJournal(tmp_path / 'reviews.jsonl').load() == {}
+
+
+def test_remove_deletes_the_file(tmp_path):
+    """Test that remove closes and deletes the journal."""
+    journal = RunJournal(tmp_path / 'reviews.jsonl')
+    journal.append([('gp:1', {'category': 'Technical'})])
+
+    journal.remove()
+
+    assert not journal.filepath.exists()
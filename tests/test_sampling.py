@@ -0,0 +1,73 @@
+"""
+Tests for stratified sampling and proportion estimates.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sampling import add_strata, estimate_proportions, required_sample_size, stratified_sample
+
+
+def reviews(count=10000, seed=0):
+    """Synthetic reviews whose category depends partly on the rating."""
+    rng = np.random.default_rng(seed)
+    rating = rng.choice([1, 2, 3, 4, 5], size=count, p=[0.4, 0.1, 0.1, 0.1, 0.3])
+    return pd.DataFrame({
+        'rating': rating,
+        'category': np.where(rating <= 2, 'Technical', np.where(rng.random(count) < 0.5, 'Other', 'UI/UX')),
+    })
+
+
+def test_sample_size_matches_cochran_with_finite_population_correction():
+    """Test the textbook sizes: 1068 for +/-3% on a large population, capped by small ones."""
+    assert required_sample_size(10 ** 9, 0.03) == 1068
+    assert required_sample_size(10000, 0.03) == 965
+    assert required_sample_size(50, 0.03) == 48
+    assert required_sample_size(0, 0.03) == 0
+
+
+def test_strata_combine_rating_and_month():
+    """Test that stratum labels are rating x month, with unknown dates kept apart."""
+    df = pd.DataFrame({'rating': [1, 5], 'date': ['2025-09-01', None]})
+
+    assert add_strata(df, ['rating', 'month']).tolist() == ['1|2025-09', '5|unknown']
+
+
+def test_allocation_is_proportional_with_a_minimum_per_stratum():
+    """Test that strata get their share of the sample, small ones at least the minimum."""
+    df = pd.DataFrame({'rating': [1] * 900 + [5] * 99 + [3], 'date': '2025-09-01'})
+
+    sample = stratified_sample(df, 100, ['rating'], min_per_stratum=2)
+    counts = sample['stratum'].value_counts()
+
+    assert (counts['1'], counts['5'], counts['3']) == (90, 10, 1)
+    assert sample['sample_weight'].groupby(sample['stratum']).first().to_dict() == {'1': 10.0, '3': 1.0, '5': 9.9}
+    assert sample.index.is_monotonic_increasing
+
+
+def test_confidence_intervals_reach_nominal_coverage():
+    """Test that 95% CIs from repeated samples contain the true category shares about 95% of the time."""
+    df = reviews()
+    truth = df['category'].value_counts(normalize=True)
+    size = required_sample_size(len(df), 0.03)
+    covered = pd.Series(0, index=truth.index)
+
+    for seed in range(50):
+        sample = stratified_sample(df, size, ['rating'], seed=seed)
+        estimates = estimate_proportions(sample, 'category').reindex(truth.index)
+        # Technical is fixed by rating, so its interval has zero width
+        covered += (estimates['ci_low'] - 1e-9 <= truth) & (truth <= estimates['ci_high'] + 1e-9)
+
+    assert sample['sample_weight'].sum() == pytest.approx(len(df))
+    assert (estimates['ci_high'] - estimates['ci_low']).max() < 0.07
+    assert (covered >= 45).all()
+
+
+def test_unsampled_frames_are_a_census():
+    """Test that a full run gets exact shares with zero-width intervals."""
+    estimates = estimate_proportions(pd.DataFrame({'category': ['A', 'A', 'B']}), 'category')
+
+    assert estimates['proportion'].tolist() == pytest.approx([2 / 3, 1 / 3])
+    assert (estimates['ci_low'] == estimates['proportion']).all()
+    assert estimates['estimated_count'].tolist() == [2, 1]
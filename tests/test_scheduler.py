@@ -0,0 +1,69 @@
+"""
+Tests for impact-ordered scheduling and partial result publishing.
+"""
+
+import pandas as pd
+
+from scripts.scheduler import ProgressPublisher, impact_scores, order_units
+
+
+class StubDashboard:
+    """Records the summaries a publisher saves."""
+
+    def __init__(self):
+        self.saved = []
+
+    def build_summary(self, df):
+        return {'total_reviews': len(df), 'high_priority_count': 0}
+
+    def save_summary(self, summary):
+        self.saved.append(summary)
+
+
+def test_low_ratings_upvotes_and_recent_dates_score_higher():
+    """Test that each impact signal raises a review's score."""
+    df = pd.DataFrame({
+        'rating': [5, 1, 5, 5],
+        'thumbs_up': [0, 0, 100, 0],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-01', '2024-03-01'],
+    })
+
+    scores = impact_scores(df)
+
+    assert scores[1] > scores[0] and scores[2] > scores[0] and scores[3] > scores[0]
+    assert ((scores >= 0) & (scores <= 1)).all()
+
+
+def test_missing_optional_columns_score_by_rating_alone():
+    """Test that reviews without thumbs_up or date are still ranked by rating."""
+    scores = impact_scores(pd.DataFrame({'rating': [4, 2, None]}))
+
+    assert scores[1] > scores[2] > scores[0]
+
+
+def test_units_are_ordered_by_their_highest_impact_item():
+    """Test that a unit holding one urgent review runs before uniformly mild ones."""
+    mild = [{'id': 'R0', 'impact': 0.3}, {'id': 'R1', 'impact': 0.3}]
+    mixed = [{'id': 'R2', 'impact': 0.1}, {'id': 'R3', 'impact': 0.9}]
+
+    assert order_units([mild, mixed]) == [mixed, mild]
+
+
+def test_publisher_snapshots_every_n_completions_and_cleans_up(tmp_path):
+    """Test that partial CSVs are written when due and removed when the run finishes."""
+    publisher = ProgressPublisher(tmp_path / 'partial' / 'out.csv', columns=['review_id', 'category'], every=3)
+    publisher._dashboard = StubDashboard()
+    df = pd.DataFrame({'review_id': ['gp:1', 'gp:2'], 'category': ['Other', 'Technical'], 'extra': [1, 2]})
+
+    assert not publisher.due(2)
+    assert publisher.due(1)
+    publisher.publish(df, total=10)
+
+    assert pd.read_csv(publisher.snapshot_path, encoding='utf-8-sig').columns.tolist() == ['review_id', 'category']
+    assert not publisher.due(1)
+    assert publisher._dashboard.saved[-1]['progress']['classified'] == 2
+
+    publisher.finish(df, tmp_path / 'out.csv')
+
+    assert not publisher.snapshot_path.exists()
+    assert publisher._dashboard.saved[-1]['progress']['complete'] is True
@@ -0,0 +1,50 @@
+"""
+Tests for the per-app scrape state.
+"""
+
+from datetime import datetime
+
+from utils.scrape_state import ScrapeState
+
+NOON = datetime(2026, 10, 1, 12, 0)
+
+
+def test_state_round_trips_with_boundary_ids(tmp_path):
+    """Test that the newest review and all reviews sharing its timestamp are recorded."""
+    state = ScrapeState(tmp_path / 'app.json')
+    newest = [{'review_id': 'a', 'date': NOON}, {'review_id': 'b', 'date': NOON},
+              {'review_id': 'c', 'date': datetime(2026, 10, 1, 11, 0)}]
+
+    state.save({'reviews_count': 3}, newest=newest)
+    loaded = state.load()
+
+    assert loaded['newest_review_id'] == 'a'
+    assert datetime.fromisoformat(loaded['newest_date']) == NOON
+    assert loaded['boundary_ids'] == ['a', 'b']
+    assert loaded['app_info'] == {'reviews_count': 3}
+
+
+def test_saved_ids_accumulate_until_the_mark_moves(tmp_path):
+    """Test that capped runs add their IDs and reaching the mark clears them."""
+    state = ScrapeState(tmp_path / 'app.json')
+    previous = state.save({}, newest=[{'review_id': 'a', 'date': NOON}])
+
+    previous = state.save({}, previous=previous, saved_ids=['x', 'y'])
+    previous = state.save({}, previous=previous, saved_ids=['y', 'z'])
+    assert previous['saved_ids'] == ['x', 'y', 'z']
+    assert previous['newest_review_id'] == 'a'
+
+    moved = state.save({}, newest=[{'review_id': 'x', 'date': datetime(2026, 10, 2)}], previous=previous)
+    assert moved['saved_ids'] == [] and state.load()['newest_review_id'] == 'x'
+
+
+def test_missing_or_unreadable_state_loads_empty(tmp_path):
+    """Test that a never-scraped app and a corrupt file both start from scratch."""
+    state = ScrapeState(tmp_path / 'app.json')
+    assert state.load() == {}
+
+    (tmp_path / 'app.json').write_text('{"newest_review_id": ', encoding='utf-8')
+    assert state.load() == {}
+
+    state.remove()
+    assert not (tmp_path / 'app.json').exists()
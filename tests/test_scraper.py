@@ -0,0 +1,149 @@
+"""
+Tests for incremental scraping against a stubbed Play Store.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from scripts import scraper as scraper_module
+from scripts.scraper import PlayStoreScraper, MultiAppScraper, read_app_ids
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """Newest-first list of fake reviews served by the stubbed Play Store."""
+    reviews = []
+
+    def fetch(app_id, lang, country, sort, count, continuation_token):
+        start = continuation_token or 0
+        end = start + count
+        return reviews[start:end], (end if end < len(reviews) else None)
+
+    monkeypatch.setattr(scraper_module, 'reviews', fetch)
+    monkeypatch.setattr(scraper_module, 'app', lambda app_id, lang, country: {
+        'appId': app_id, 'title': 'Test', 'score': 4.0, 'reviews': len(reviews)
+    })
+    monkeypatch.setattr(scraper_module, 'RAW_DATA_DIR', tmp_path / 'raw')
+    monkeypatch.setattr(scraper_module, 'SCRAPE_STATE_DIR', tmp_path / 'state')
+    monkeypatch.setitem(scraper_module.SCRAPER_CONFIG, 'delay_between_requests', 0)
+    (tmp_path / 'raw').mkdir()
+    return reviews
+
+
+def add_reviews(reviews, n):
+    """Publish n newer reviews, one hour after the previous batch."""
+    base = datetime(2026, 10, 1) + timedelta(hours=len(reviews))
+    new = [{'reviewId': f"r{len(reviews) + i}", 'userName': 'u', 'score': 5, 'content': f"c{len(reviews) + i}",
+            'at': base + timedelta(minutes=i), 'thumbsUpCount': 0, 'replyContent': None, 'repliedAt': None}
+           for i in range(n)]
+    reviews[:0] = sorted(new, key=lambda r: r['at'], reverse=True)
+
+
+def scrape(max_reviews):
+    """Run an incremental scrape; returns the scraper and the reviews it saved."""
+    scraper = PlayStoreScraper(app_id='com.test', max_reviews=max_reviews, incremental=True)
+    return scraper, scraper.run()
+
+
+def test_second_run_fetches_only_new_reviews(store):
+    """Test that a run after new reviews arrive saves only those and moves the mark."""
+    add_reviews(store, 30)
+    scrape(100)
+    add_reviews(store, 5)
+
+    scraper, reviews_data = scrape(100)
+
+    assert [review['review_id'] for review in reviews_data] == [f"r{i}" for i in range(34, 29, -1)]
+    assert scraper.state.load()['newest_review_id'] == 'r34'
+
+
+def test_unchanged_review_count_skips_the_fetch(store, monkeypatch):
+    """Test that no reviews are requested when the app's review count has not moved."""
+    add_reviews(store, 10)
+    scrape(100)
+    monkeypatch.setattr(scraper_module, 'reviews', lambda *args, **kwargs: pytest.fail("fetched reviews"))
+
+    scraper, reviews_data = scrape(100)
+
+    assert reviews_data == [] and scraper.up_to_date
+
+
+def test_capped_run_keeps_the_mark_until_the_gap_is_filled(store):
+    """Test that runs cut short by max_reviews fill the gap over later runs without duplicates."""
+    add_reviews(store, 300)
+    scrape(100)
+    add_reviews(store, 250)
+
+    fetched = []
+    for _ in range(3):
+        scraper, reviews_data = scrape(100)
+        fetched += [review['review_id'] for review in reviews_data]
+    assert sorted(fetched) == sorted(f"r{i}" for i in range(300, 550))
+    assert scraper.state.load()['newest_review_id'] == 'r549'
+
+    scraper, reviews_data = scrape(100)
+    assert reviews_data == [] and scraper.up_to_date
+
+
+def test_failed_scrape_is_not_up_to_date(store, monkeypatch):
+    """Test that a scrape that raises leaves the state alone and is not reported as up to date."""
+    add_reviews(store, 10)
+    scrape(100)
+    add_reviews(store, 5)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("503 Service Unavailable")
+
+    monkeypatch.setattr(scraper_module, 'reviews', fail)
+    scraper, reviews_data = scrape(100)
+    assert reviews_data == [] and not scraper.up_to_date
+    assert scraper.scrape_error
+    assert scraper.state.load()['newest_review_id'] == 'r9'
+
+
+def test_streaming_run_pushes_pages_and_defers_the_mark(store):
+    """Test that each page goes to on_page and the state moves only on commit_state()."""
+    add_reviews(store, 10)
+    scrape(1000)
+    add_reviews(store, 250)
+    pages = []
+
+    scraper = PlayStoreScraper(app_id='com.test', max_reviews=1000, incremental=True)
+    reviews_data = scraper.run(on_page=pages.append, commit_state=False)
+
+    assert [len(page) for page in pages] == [200, 50]
+    assert sum(pages, []) == reviews_data
+    assert scraper.state.load()['newest_review_id'] == 'r9'
+    assert scraper.commit_state()
+    assert scraper.state.load()['newest_review_id'] == 'r259'
+
+
+def test_app_id_files_skip_comments_and_duplicates(tmp_path):
+    """Test that app ID files ignore blank lines, comments and repeats."""
+    path = tmp_path / 'apps.txt'
+    path.write_text("# banking apps\ncom.a\n\ncom.b  # main app\ncom.a\n", encoding='utf-8')
+
+    assert read_app_ids(path) == ['com.a', 'com.b']
+
+
+def test_multi_app_scrape_reports_each_app(store, monkeypatch):
+    """Test that one failing app does not stop the others and each gets a status."""
+    add_reviews(store, 10)
+    scrape(100)
+    add_reviews(store, 5)
+    app_info = scraper_module.app
+
+    def app(app_id, lang, country):
+        if app_id == 'com.broken':
+            raise RuntimeError("404 Not Found")
+        return app_info(app_id, lang, country)
+
+    monkeypatch.setattr(scraper_module, 'app', app)
+    report = MultiAppScraper(['com.test', 'com.broken', 'com.fresh'], max_reviews=100, incremental=True,
+                             max_workers=2, requests_per_minute=6000).run()
+
+    assert list(report) == ['com.test', 'com.broken', 'com.fresh']
+    assert (report['com.test']['status'], report['com.test']['reviews']) == ('scraped', 5)
+    assert report['com.broken']['status'] == 'failed'
+    assert (report['com.fresh']['status'], report['com.fresh']['reviews']) == ('scraped', 15)
@@ -0,0 +1,59 @@
+"""
+Tests for taxonomy snapshots, diffs and the selection of rows to migrate.
+"""
+
+import pandas as pd
+
+from scripts.taxonomy import (
+    taxonomy_hash, save_taxonomy, load_taxonomy, diff_taxonomies, describe_diff, affected_rows
+)
+
+OLD = {
+    'Technical': ['Bug', 'Crash'],
+    'Pricing': ['Too Expensive'],
+    'UI/UX': ['Design'],
+    'Other': ['General Feedback'],
+}
+# Crash split into Crash on Launch / Crash on Payment, Pricing dropped, Payment added
+NEW = {
+    'Technical': ['Bug', 'Crash on Launch', 'Crash on Payment'],
+    'UI/UX': ['Design'],
+    'Payment': ['Failed Payment'],
+    'Other': ['General Feedback'],
+}
+
+
+def test_snapshots_round_trip_under_their_hash(tmp_path):
+    """Test that a saved taxonomy loads back under its version and unknown versions load as None."""
+    version = save_taxonomy(OLD, tmp_path)
+
+    assert version == taxonomy_hash(OLD) != taxonomy_hash(NEW)
+    assert load_taxonomy(version, tmp_path) == OLD
+    assert load_taxonomy(taxonomy_hash(NEW), tmp_path) is None
+
+
+def test_diff_reports_added_removed_and_split_categories():
+    """Test that the diff lists added and removed categories and subcategory changes."""
+    diff = diff_taxonomies(OLD, NEW)
+
+    assert diff == {
+        'added': ['Payment'],
+        'removed': ['Pricing'],
+        'changed': {'Technical': {'added': ['Crash on Launch', 'Crash on Payment'], 'removed': ['Crash']}},
+    }
+    assert describe_diff(diff_taxonomies(OLD, OLD)) == "no changes"
+    assert describe_diff(diff).startswith("added Payment; removed Pricing; changed Technical")
+
+
+def test_only_rows_touched_by_the_change_are_selected():
+    """Test that rows in removed, changed or catch-all categories and invalid pairs are selected."""
+    df = pd.DataFrame({
+        'category': ['Technical', 'Pricing', 'UI/UX', 'Other', 'UI/UX', None],
+        'subcategory': ['Bug', 'Too Expensive', 'Design', 'General Feedback', 'Colors', None],
+    })
+
+    assert affected_rows(df, NEW, OLD).tolist() == [True, True, False, True, True, True]
+    # Without a snapshot only the catch-all and labels outside the new taxonomy are re-checked
+    assert affected_rows(df, NEW).tolist() == [False, True, False, True, True, True]
+    # An unchanged taxonomy only re-checks invalid labels
+    assert affected_rows(df, OLD, OLD).tolist() == [False, False, False, False, True, True]
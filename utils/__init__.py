@@ -4,5 +4,20 @@ Utility modules for Product Intelligence Engine.
 
 from .data_handler import DataHandler
 from .logger import setup_logging, get_logger
+from .rate_limiter import RateLimiter
+from .cache import ClassificationCache
+from .dedup import NearDuplicateClusterer
+from .run_journal import RunJournal
+from .dead_letter import DeadLetterQueue
+from .scrape_state import ScrapeState
+from .retry import ErrorKind, RetryPolicy, RetryStats, CircuitBreaker, classify_error, retry_after_seconds
+from .compaction import TextCompactor, estimate_tokens
+from .hedging import Hedger
+from .fair_share import FairShareScheduler, AppLimiter
+from .sampling import required_sample_size, stratified_sample, estimate_proportions, is_sampled
 
-__all__ = ['DataHandler', 'setup_logging', 'get_logger']
+__all__ = ['DataHandler', 'setup_logging', 'get_logger', 'RateLimiter', 'ClassificationCache',
+           'NearDuplicateClusterer', 'RunJournal', 'DeadLetterQueue', 'ErrorKind', 'RetryPolicy', 'RetryStats',
+           'CircuitBreaker', 'classify_error', 'retry_after_seconds', 'required_sample_size',
+           'stratified_sample', 'estimate_proportions', 'is_sampled', 'TextCompactor', 'estimate_tokens',
+           'Hedger', 'FairShareScheduler', 'AppLimiter', 'ScrapeState']
@@ -0,0 +1,170 @@
+"""
+Classification cache for Product Intelligence Engine.
+Persists LLM classifications in SQLite so re-runs skip reviews already seen.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ClassificationCache:
+    """SQLite-backed cache of classifications keyed by content, rating and prompt version."""
+
+    def __init__(self, db_path: Path, prompt_version: str, max_entries: int = 200000):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path: Path to the SQLite file
+            prompt_version: Hash of prompt template, taxonomy and model
+            max_entries: Maximum rows kept before least-recently-used eviction
+        """
+        self.db_path = Path(db_path)
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON classifications(last_access)"
+        )
+        self._conn.commit()
+        # Row count kept in memory so inserts don't scan the table
+        self._size = self._count()
+
+    def _count(self) -> int:
+        """Count the rows on disk."""
+        return self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    @staticmethod
+    def normalize_content(content: str) -> str:
+        """Normalize review text so trivial whitespace/case changes share a key."""
+        return " ".join(str(content).lower().split())
+
+    def make_key(self, content: str, rating: int) -> str:
+        """Build the cache key for a review."""
+        raw = f"{self.prompt_version}\x1f{int(rating)}\x1f{self.normalize_content(content)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, content: str, rating: int) -> Optional[Dict]:
+        """
+        Look up a cached classification.
+
+        Args:
+            content: Review text
+            rating: Star rating
+
+        Returns:
+            Cached classification or None on a miss
+        """
+        key = self.make_key(content, rating)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM classifications WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE classifications SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+        return json.loads(row[0])
+
+    def put(self, content: str, rating: int, classification: Dict):
+        """
+        Store a classification, evicting the least recently used rows when full.
+
+        Args:
+            content: Review text
+            rating: Star rating
+            classification: Classification results
+        """
+        key = self.make_key(content, rating)
+        value = json.dumps(classification, ensure_ascii=False)
+        now = time.time()
+
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO classifications (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            ).rowcount
+            if inserted:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE classifications SET value = ?, created_at = ?, last_access = ? WHERE key = ?",
+                    (value, now, now, key)
+                )
+
+            if self.max_entries and self._size > self.max_entries:
+                # Evict down to 90% of the cap so we don't evict on every insert
+                excess = self._size - int(self.max_entries * 0.9)
+                evicted = self._conn.execute(
+                    "DELETE FROM classifications WHERE key IN ("
+                    "SELECT key FROM classifications ORDER BY last_access ASC LIMIT ?)",
+                    (excess,)
+                ).rowcount
+                self.evictions += evicted
+                # Resync in case another process wrote to the same file
+                self._size = self._count()
+                logger.debug(f"Evicted {evicted} cache entries")
+
+            self._conn.commit()
+
+    def clear(self) -> int:
+        """
+        Remove every cached classification.
+
+        Returns:
+            Number of rows removed
+        """
+        with self._lock:
+            count = self._count()
+            self._conn.execute("DELETE FROM classifications")
+            self._conn.commit()
+            self._size = 0
+        self._conn.execute("VACUUM")
+        logger.info(f" Cleared {count} cached classifications from {self.db_path}")
+        return count
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            size = self._size
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'size': size,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,140 @@
+"""
+Input compaction for Product Intelligence Engine.
+Normalizes review text and trims it to a token budget before it is
+embedded in a prompt, and estimates token counts locally.
+"""
+
+import re
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Zero-width, BOM and control characters other than tab/newline
+_INVISIBLE = re.compile(r'[\u200b-\u200f\u2060\ufeff\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_WHITESPACE = re.compile(r'\s+')
+_ELLIPSIS = " … "
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Estimate the token count of a text without calling a tokenizer.
+
+    Counts UTF-8 bytes rather than characters, so emoji and non-Latin
+    scripts (which tokenizers split into several tokens) weigh more than
+    plain ASCII letters.
+
+    Args:
+        text: Text to measure
+        chars_per_token: Average ASCII characters per token
+
+    Returns:
+        Estimated number of tokens
+    """
+    if not text:
+        return 0
+    return int(-(-len(text.encode('utf-8')) // chars_per_token))
+
+
+class TextCompactor:
+    """Normalizes and truncates review text, tracking the tokens saved."""
+
+    def __init__(self, max_tokens: int = 300, head_fraction: float = 0.7, max_repeat: int = 3,
+                 chars_per_token: float = 4.0):
+        """
+        Initialize the compactor.
+
+        Args:
+            max_tokens: Token budget per review; longer texts keep their head and tail
+            head_fraction: Share of the budget given to the start of the text
+            max_repeat: Runs of a repeated character or short unit are cut to this many copies
+            chars_per_token: Average ASCII characters per token for estimate_tokens
+        """
+        self.max_tokens = max_tokens
+        self.head_fraction = head_fraction
+        self.max_repeat = max_repeat
+        self.chars_per_token = chars_per_token
+
+        # Backreferences are unrolled: several times faster than \1{n,} in re
+        repeats = r'\1' * max_repeat + r'(?:\1)*'
+        # "!!!!!!" / "😡😡😡😡" -> 3 copies; digits are left alone so numbers survive
+        self._repeated_char = re.compile(r'(\D)' + repeats)
+        # "wkwkwkwkwk" / "crash crash crash crash " -> 3 copies
+        self._repeated_unit = re.compile(r'(\D{2,12}?)' + repeats)
+
+        self.reset()
+
+    def reset(self):
+        """Clear the savings counters (once per run)."""
+        self.stats = {'reviews': 0, 'normalized': 0, 'truncated': 0, 'tokens_before': 0, 'tokens_after': 0}
+
+    def normalize(self, text: str) -> str:
+        """Strip invisible characters and collapse whitespace and repetition."""
+        text = _INVISIBLE.sub('', text)
+        text = _WHITESPACE.sub(' ', text).strip()
+        text = self._repeated_char.sub(lambda m: m.group(1) * self.max_repeat, text)
+        return self._repeated_unit.sub(lambda m: m.group(1) * self.max_repeat, text)
+
+    def truncate(self, text: str) -> str:
+        """
+        Cut a text over the token budget down to its head and tail.
+
+        Args:
+            text: Normalized text
+
+        Returns:
+            Text within `max_tokens`, with " … " marking the cut
+        """
+        tokens = estimate_tokens(text, self.chars_per_token)
+        if tokens <= self.max_tokens:
+            return text
+
+        # Scale the budget to characters using this text's own density
+        budget = self.max_tokens - estimate_tokens(_ELLIPSIS, self.chars_per_token)
+        keep = int(len(text) * budget / tokens)
+        while True:
+            result = self._head_tail(text, keep)
+            if keep <= 0 or estimate_tokens(result, self.chars_per_token) <= self.max_tokens:
+                return result
+            # Density is uneven (emoji clusters): shrink until it fits
+            keep = int(keep * 0.9)
+
+    def _head_tail(self, text: str, keep: int) -> str:
+        """Keep `keep` characters split between the head and the tail of a text."""
+        head_chars = int(keep * self.head_fraction)
+        tail_chars = keep - head_chars
+
+        head = text[:head_chars]
+        tail = text[len(text) - tail_chars:] if tail_chars > 0 else ''
+        # Cut on word boundaries where one is close by
+        if ' ' in head[-20:]:
+            head = head[:head.rindex(' ')]
+        if ' ' in tail[:20]:
+            tail = tail[tail.index(' ') + 1:]
+        return head + _ELLIPSIS + tail
+
+    def compact(self, text: str) -> str:
+        """
+        Normalize and truncate one review, updating the savings counters.
+
+        Args:
+            text: Raw review text
+
+        Returns:
+            Compacted text
+        """
+        normalized = self.normalize(text)
+        compacted = self.truncate(normalized)
+
+        self.stats['reviews'] += 1
+        self.stats['normalized'] += normalized != text
+        self.stats['truncated'] += compacted != normalized
+        self.stats['tokens_before'] += estimate_tokens(text, self.chars_per_token)
+        self.stats['tokens_after'] += estimate_tokens(compacted, self.chars_per_token)
+        return compacted
+
+    def summary(self) -> Dict:
+        """Counters plus tokens saved and the saved share of review tokens."""
+        saved = self.stats['tokens_before'] - self.stats['tokens_after']
+        before = self.stats['tokens_before']
+        return {**self.stats, 'tokens_saved': saved, 'saved_pct': round(saved / before * 100, 1) if before else 0.0}
@@ -6,7 +6,7 @@ Handles CSV operations, data validation, and cleaning.
 import pandas as pd
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -16,29 +16,32 @@ class DataHandler:
     """Handles data operations for reviews."""
     
     @staticmethod
-    def save_to_csv(data: List[Dict], filepath: Path, mode: str = 'w') -> bool:
+    def save_to_csv(data: Union[List[Dict], pd.DataFrame], filepath: Path, mode: str = 'w',
+                    columns: List[str] = None) -> bool:
         """
         Save data to CSV file.
         
         Args:
-            data: List of dictionaries containing review data
+            data: List of dictionaries or a DataFrame containing review data
             filepath: Path to save the CSV file
             mode: Write mode ('w' for overwrite, 'a' for append)
+            columns: Columns to write, in order (default: all)
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            df = pd.DataFrame(data)
+            # DataFrames are written as-is, without copying or converting to records
+            df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
             
             # Ensure parent directory exists
             filepath.parent.mkdir(parents=True, exist_ok=True)
             
             # Save to CSV
             if mode == 'a' and filepath.exists():
-                df.to_csv(filepath, mode='a', header=False, index=False, encoding='utf-8-sig')
+                df.to_csv(filepath, mode='a', header=False, index=False, columns=columns, encoding='utf-8-sig')
             else:
-                df.to_csv(filepath, index=False, encoding='utf-8-sig')
+                df.to_csv(filepath, index=False, columns=columns, encoding='utf-8-sig')
             
             logger.info(f" Saved {len(data)} records to {filepath}")
             return True
@@ -48,12 +51,13 @@ class DataHandler:
             return False
     
     @staticmethod
-    def load_from_csv(filepath: Path) -> Optional[pd.DataFrame]:
+    def load_from_csv(filepath: Path, dtype: Dict = None) -> Optional[pd.DataFrame]:
         """
         Load data from CSV file.
         
         Args:
             filepath: Path to the CSV file
+            dtype: Column types to read as, instead of inferring them
             
         Returns:
             DataFrame or None if error occurs
@@ -63,7 +67,7 @@ class DataHandler:
                 logger.warning(f" File not found: {filepath}")
                 return None
             
-            df = pd.read_csv(filepath, encoding='utf-8-sig')
+            df = pd.read_csv(filepath, encoding='utf-8-sig', dtype=dtype)
             logger.info(f" Loaded {len(df)} records from {filepath}")
             return df
             
@@ -0,0 +1,92 @@
+"""
+Dead-letter store for Product Intelligence Engine.
+JSONL file of reviews whose classification failed after all retries, with
+the error reason, so they can be re-processed without re-running a file.
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterQueue:
+    """Failed reviews of one processed output, keyed by review_id."""
+
+    def __init__(self, filepath: Path):
+        """
+        Initialize the store.
+
+        Args:
+            filepath: Path to the JSONL dead-letter file
+        """
+        self.filepath = Path(filepath)
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Read the failed reviews.
+
+        Returns:
+            Mapping of review_id to entry ('review_id', 'content', 'rating',
+            'error', 'attempts', 'last_failed')
+        """
+        entries = {}
+        if not self.filepath.exists():
+            return entries
+
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[str(entry['review_id'])] = entry
+                except (json.JSONDecodeError, KeyError):
+                    logger.debug(f"Skipping malformed dead-letter line in {self.filepath}")
+        return entries
+
+    def save(self, failed: List[Dict]) -> int:
+        """
+        Replace the store with the reviews that are failing now.
+
+        Attempt counts carry over for reviews already in the store; reviews
+        no longer in `failed` are dropped. The file is deleted when nothing failed.
+
+        Args:
+            failed: Dicts with 'review_id', 'content', 'rating' and 'error'
+
+        Returns:
+            Number of entries stored
+        """
+        previous = self.load()
+        if not failed:
+            self.remove()
+            return 0
+
+        now = datetime.now().isoformat(timespec='seconds')
+        lines = []
+        for item in failed:
+            review_id = str(item['review_id'])
+            entry = {
+                'review_id': review_id,
+                'content': item.get('content', ''),
+                'rating': item.get('rating'),
+                'error': item.get('error', ''),
+                'attempts': previous.get(review_id, {}).get('attempts', 0) + 1,
+                'last_failed': now,
+            }
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+        # Written aside and swapped in, so a crash never leaves a half-written store
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.filepath.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        tmp_path.replace(self.filepath)
+        return len(lines)
+
+    def remove(self):
+        """Delete the store."""
+        if self.filepath.exists():
+            self.filepath.unlink()
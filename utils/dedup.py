@@ -0,0 +1,179 @@
+"""
+Near-duplicate detection for Product Intelligence Engine.
+Groups near-identical reviews with MinHash signatures and LSH banding.
+"""
+
+import re
+import logging
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class NearDuplicateClusterer:
+    """Clusters near-duplicate texts within the same rating bucket."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 42):
+        """
+        Initialize the clusterer.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity to merge two reviews
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (num_perm must be divisible by bands)
+            shingle_size: Character n-gram size
+            seed: Seed for the hash permutations
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        # Odd 64-bit multipliers and offsets for multiply-shift hashing
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase and strip punctuation/whitespace runs."""
+        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+        return ' '.join(text.split())
+
+    def _shingle_hashes(self, texts: Sequence[str]):
+        """
+        Hash the character shingles of many normalized texts in one pass.
+
+        Args:
+            texts: Normalized texts
+
+        Returns:
+            Tuple of (hashes, offsets) where the shingles of text i are
+            hashes[offsets[i]:offsets[i + 1]]
+        """
+        k = self.shingle_size
+        # Pad short texts so every text yields at least one shingle
+        padded = [t.ljust(k) for t in texts]
+        lengths = np.fromiter((len(t) for t in padded), dtype=np.int64, count=len(padded))
+
+        # Unicode code points of all texts, separated by one NUL character
+        joined = '\x00'.join(padded)
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+        # Polynomial rolling hash over every window of k code points
+        windows = len(codes) - k + 1
+        hashes = np.zeros(windows, dtype=np.uint64)
+        for i in range(k):
+            hashes = hashes * np.uint64(0x10FFFF + 1) + codes[i:i + windows]
+        hashes = (hashes ^ (hashes >> np.uint64(32))) & _MAX_HASH
+
+        # Keep only windows that lie entirely inside one text
+        starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        counts = lengths - k + 1
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        window_index = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+
+        return hashes[window_index], offsets
+
+    def signatures(self, texts: Sequence[str], chunk_size: int = 2048) -> np.ndarray:
+        """
+        Compute MinHash signatures for many texts at once.
+
+        Args:
+            texts: Raw texts
+            chunk_size: Texts hashed per vectorized chunk (bounds peak memory)
+
+        Returns:
+            Array of shape (len(texts), num_perm)
+        """
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint64)
+
+        for start in range(0, len(texts), chunk_size):
+            chunk = [self.normalize(t) for t in texts[start:start + chunk_size]]
+            hashes, offsets = self._shingle_hashes(chunk)
+
+            # Multiply-shift hashing: one random permutation per row, no division
+            permuted = np.outer(self._a, hashes)
+            permuted += self._b[:, None]
+            permuted >>= np.uint64(32)
+            result[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets[:-1], axis=1).T
+
+        return result
+
+    def cluster(self, texts: Sequence[str], buckets: Sequence) -> np.ndarray:
+        """
+        Assign a cluster ID to every text.
+
+        Only texts in the same bucket (e.g. star rating) can share a cluster.
+        Candidate pairs come from LSH banding, so the cost grows roughly
+        linearly with the number of texts.
+
+        Args:
+            texts: Review texts
+            buckets: Bucket key per text
+
+        Returns:
+            Integer array of cluster IDs numbered in order of first appearance
+        """
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        signatures = self.signatures(list(texts))
+        _, bucket_codes = np.unique(np.asarray([str(b) for b in buckets]), return_inverse=True)
+        bucket_codes = bucket_codes.ravel().astype(np.uint64)
+        parent = list(range(n))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                # Keep the earliest row as root so it becomes the representative
+                parent[max(ri, rj)] = min(ri, rj)
+
+        min_matches = int(np.ceil(self.threshold * self.num_perm))
+
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            # Combine rating bucket and band rows into one 64-bit LSH key;
+            # rare key collisions only add candidates, which are verified below
+            band_keys = bucket_codes.copy()
+            for column in range(start, start + self.rows_per_band):
+                band_keys = band_keys * np.uint64(0x100000001B3) ^ signatures[:, column]
+
+            # Walk rows sorted by LSH key; only keys shared by 2+ rows yield candidates
+            order = np.argsort(band_keys, kind='stable')
+            sorted_keys = band_keys[order]
+            boundaries = np.concatenate(([0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1, [n]))
+            for group in np.flatnonzero(np.diff(boundaries) > 1):
+                members = order[boundaries[group]:boundaries[group + 1]].tolist()
+                # Compare against a few anchors instead of every pair
+                anchors: List[int] = [members[0]]
+                for i in members[1:]:
+                    root = find(i)
+                    if any(find(anchor) == root for anchor in anchors):
+                        continue
+                    matches = (signatures[anchors] == signatures[i]).sum(axis=1)
+                    hits = np.flatnonzero(matches >= min_matches)
+                    if hits.size:
+                        union(i, anchors[hits[0]])
+                    elif len(anchors) < 8:
+                        anchors.append(i)
+
+        roots = np.array([find(i) for i in range(n)])
+        _, cluster_ids = np.unique(roots, return_inverse=True)
+        return cluster_ids.astype(np.int64)
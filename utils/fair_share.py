@@ -0,0 +1,264 @@
+"""
+Fair-share quota scheduling for Product Intelligence Engine.
+Splits one global requests/tokens-per-minute budget among per-app queues
+with weighted fair queuing, giving apps at risk of missing a deadline priority.
+"""
+
+import time
+import itertools
+import threading
+import logging
+from typing import Dict, Optional
+
+from .rate_limiter import TokenBucket
+from .hedging import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class AppLimiter:
+    """One app's handle on a FairShareScheduler, used in place of its RateLimiter."""
+
+    def __init__(self, scheduler: 'FairShareScheduler', app: str):
+        self.scheduler = scheduler
+        self.app = app
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until this app's next request is granted; returns seconds spent queued."""
+        return self.scheduler.acquire(self.app, tokens)
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take a spare (hedge) request only if nothing is queued and the budget allows it right now."""
+        return self.scheduler.try_acquire(self.app, tokens)
+
+    def expect(self, requests: int):
+        """Declare how many more requests this app will make (used for deadline urgency)."""
+        self.scheduler.expect(self.app, requests)
+
+    @property
+    def total_wait(self) -> float:
+        return self.scheduler.apps[self.app]['wait_seconds']
+
+    @property
+    def total_requests(self) -> int:
+        return self.scheduler.apps[self.app]['requests']
+
+
+class FairShareScheduler:
+    """
+    Self-clocked weighted fair queuing over a shared token-bucket budget.
+
+    Each request gets a virtual finish tag: the later of the current virtual
+    time and the app's previous tag, plus its cost (share of the per-minute
+    budget) divided by the app's weight. The lowest tag is granted next, so
+    backlogged apps receive budget in proportion to their weights and an
+    idle app cannot bank credit. An app whose remaining requests would not
+    finish by its deadline at its fair share jumps the queue (earliest
+    deadline first among such apps).
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Initialize the scheduler. A limit of None or 0 disables that budget.
+
+        Args:
+            requests_per_minute: Global request budget shared by all apps
+            tokens_per_minute: Global (estimated) token budget shared by all apps
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self.started = time.monotonic()
+        self.apps: Dict[str, Dict] = {}
+
+    def register(self, app: str, weight: float = 1.0, deadline_seconds: float = None) -> AppLimiter:
+        """
+        Add an app queue.
+
+        Args:
+            app: App name (e.g. its Play Store ID)
+            weight: Relative share of the budget while the app is backlogged
+            deadline_seconds: Seconds from now by which the app's work should be done
+
+        Returns:
+            AppLimiter to use as the app's rate limiter
+        """
+        with self._cond:
+            self.apps[app] = {
+                'weight': float(weight),
+                'deadline': time.monotonic() + deadline_seconds if deadline_seconds else None,
+                'last_tag': 0.0,
+                'remaining': 0,
+                'requests': 0,
+                'tokens': 0,
+                'urgent_grants': 0,
+                'hedges': 0,
+                'wait_seconds': 0.0,
+                'waits': [],
+                'first_grant': None,
+                'last_grant': None,
+            }
+        return AppLimiter(self, app)
+
+    def expect(self, app: str, requests: int):
+        """Add to the number of requests an app still has to make."""
+        with self._cond:
+            self.apps[app]['remaining'] += requests
+
+    def _cost(self, tokens: int) -> float:
+        """Share of the per-minute budget one request uses (its binding resource)."""
+        costs = []
+        if self.requests_per_minute:
+            costs.append(1.0 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            costs.append(tokens / self.tokens_per_minute)
+        return max(costs) if costs else 1.0
+
+    def _urgent(self, app: str, now: float) -> bool:
+        """Whether an app would miss its deadline at its current fair share of the request budget."""
+        state = self.apps[app]
+        if not state['deadline'] or not state['remaining'] or not self.requests_per_minute:
+            return False
+        queued = {ticket['app'] for ticket in self._queue}
+        active_weight = sum(self.apps[name]['weight'] for name in queued) or state['weight']
+        fair_rate = self.requests_per_minute / 60.0 * state['weight'] / active_weight
+        return now + state['remaining'] / fair_rate > state['deadline']
+
+    def _next(self, now: float) -> Dict:
+        """Ticket to grant next: urgent apps by deadline, then the lowest virtual finish tag."""
+        def key(ticket):
+            if self._urgent(ticket['app'], now):
+                return (0, self.apps[ticket['app']]['deadline'], ticket['tag'], ticket['seq'])
+            return (1, 0.0, ticket['tag'], ticket['seq'])
+        return min(self._queue, key=key)
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self._request_bucket:
+            self._request_bucket.refill(now)
+            wait = max(wait, self._request_bucket.wait_time(1))
+        if self._token_bucket:
+            self._token_bucket.refill(now)
+            wait = max(wait, self._token_bucket.wait_time(tokens))
+        return wait
+
+    def _grant(self, ticket: Dict, now: float, urgent: bool = False, spare: bool = False):
+        if self._request_bucket:
+            self._request_bucket.consume(1)
+        if self._token_bucket:
+            self._token_bucket.consume(ticket['tokens'])
+        self._virtual_time = max(self._virtual_time, ticket['tag'] - ticket['cost'] / self.apps[ticket['app']]['weight'])
+
+        state = self.apps[ticket['app']]
+        waited = now - ticket['enqueued']
+        state['requests'] += 1
+        state['tokens'] += ticket['tokens']
+        if spare:
+            # A duplicate of work already granted: it uses budget but does not finish a request
+            state['hedges'] += 1
+        else:
+            state['remaining'] = max(0, state['remaining'] - 1)
+        state['urgent_grants'] += urgent
+        state['wait_seconds'] += waited
+        state['waits'].append(waited)
+        state['first_grant'] = state['first_grant'] or now
+        state['last_grant'] = now
+        return waited
+
+    def acquire(self, app: str, tokens: int = 0) -> float:
+        """
+        Queue one request for an app and block until it is granted.
+
+        Args:
+            app: Registered app name
+            tokens: Estimated token count of the request
+
+        Returns:
+            Seconds spent queued
+        """
+        with self._cond:
+            state = self.apps[app]
+            cost = self._cost(tokens)
+            tag = max(self._virtual_time, state['last_tag']) + cost / state['weight']
+            state['last_tag'] = tag
+            ticket = {'app': app, 'tokens': tokens, 'cost': cost, 'tag': tag, 'seq': next(self._seq),
+                      'enqueued': time.monotonic()}
+            self._queue.append(ticket)
+            self._cond.notify_all()
+
+            while True:
+                now = time.monotonic()
+                head = self._next(now)
+                wait = self._wait_time(head['tokens'], now)
+                if head is ticket and wait <= 0:
+                    # Urgency is judged against the queue the ticket was granted from
+                    urgent = self._urgent(app, now)
+                    self._queue.remove(ticket)
+                    waited = self._grant(ticket, now, urgent)
+                    self._cond.notify_all()
+                    return waited
+                # Everyone re-checks when the budget refills, since urgency can reorder the queue
+                self._cond.wait(timeout=max(wait, 0.01))
+
+    def try_acquire(self, app: str, tokens: int = 0) -> bool:
+        """
+        Grant a request for an app only if no app is queued and the budget allows it now.
+
+        Used for hedged duplicates, which only ever take idle budget. The
+        grant counts toward the app's requests and virtual finish tag (it
+        spends budget) but not against its remaining work, so hedging does
+        not make an app look closer to its deadline than it is.
+
+        Args:
+            app: Registered app name
+            tokens: Estimated token count of the request
+
+        Returns:
+            True if the request was admitted
+        """
+        with self._cond:
+            now = time.monotonic()
+            if self._queue or self._wait_time(tokens, now) > 0:
+                return False
+            state = self.apps[app]
+            cost = self._cost(tokens)
+            ticket = {'app': app, 'tokens': tokens, 'cost': cost, 'enqueued': now,
+                      'tag': max(self._virtual_time, state['last_tag']) + cost / state['weight']}
+            state['last_tag'] = ticket['tag']
+            self._grant(ticket, now, spare=True)
+            return True
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Per-app share of the budget, throughput and queue wait.
+
+        Returns:
+            Mapping of app to weight, requests (hedges included), tokens, share,
+            requests_per_minute (over the time the app was served), mean/p95
+            queue wait, urgent grants, hedges and, for apps with a deadline,
+            whether it was met
+        """
+        with self._cond:
+            total = sum(state['requests'] for state in self.apps.values())
+            result = {}
+            for app, state in self.apps.items():
+                active = (state['last_grant'] - self.started) if state['last_grant'] else 0.0
+                result[app] = {
+                    'weight': state['weight'],
+                    'requests': state['requests'],
+                    'tokens': state['tokens'],
+                    'share': round(state['requests'] / total, 3) if total else 0.0,
+                    'requests_per_minute': round(state['requests'] / active * 60, 1) if active > 0 else 0.0,
+                    'mean_wait_seconds': round(state['wait_seconds'] / state['requests'], 3) if state['requests'] else 0.0,
+                    'p95_wait_seconds': round(percentile(state['waits'], 95), 3),
+                    'urgent_grants': state['urgent_grants'],
+                    'hedges': state['hedges'],
+                    'deadline_met': (state['last_grant'] or self.started) <= state['deadline'] if state['deadline'] else None,
+                }
+            return result
@@ -0,0 +1,159 @@
+"""
+Request hedging for Product Intelligence Engine.
+Fires a duplicate of a call that runs past a latency percentile learned from
+recent calls and returns whichever copy finishes first.
+"""
+
+import math
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Hedger:
+    """Latency-percentile hedging with a global cap on the share of hedged calls."""
+
+    def __init__(self, percentile: float = 95, min_samples: int = 20, window: int = 200,
+                 max_hedge_rate: float = 0.05, min_delay: float = 0.0, max_workers: int = 8):
+        """
+        Initialize the hedger.
+
+        Args:
+            percentile: Latency percentile of recent calls after which a duplicate is fired
+            min_samples: Calls observed before hedging starts
+            window: Number of recent call latencies the threshold is learned from (per key)
+            max_hedge_rate: Maximum share of calls that may be hedged
+            min_delay: Never hedge before this many seconds
+            max_workers: Threads running calls (at least twice the callers' concurrency)
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.min_delay = min_delay
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self.window = window
+        self._recent = {}
+        self.reset()
+
+    def reset(self):
+        """Clear the counters and latency samples (once per run); the learned window is kept."""
+        with self._lock:
+            self.calls = 0
+            self.hedged = 0
+            self.hedge_wins = 0
+            self.capped = 0
+            self._primary_latencies = []
+            self._latencies = []
+
+    def threshold(self, key=None) -> Optional[float]:
+        """Seconds after which a call with this key is hedged (None until `min_samples` calls were seen)."""
+        with self._lock:
+            recent = list(self._recent.get(key, ()))
+        if len(recent) < self.min_samples:
+            return None
+        return max(self.min_delay, percentile(recent, self.percentile))
+
+    def _record_primary(self, key, start: float):
+        # Runs when the first copy finishes, even if the hedge already won: the
+        # latency the caller would have seen without hedging
+        latency = time.monotonic() - start
+        with self._lock:
+            self._recent.setdefault(key, deque(maxlen=self.window)).append(latency)
+            self._primary_latencies.append(latency)
+
+    def _claim_hedge(self, allow: Callable[[], bool] = None) -> bool:
+        """Reserve one hedge under the global rate cap and the caller's own check."""
+        with self._lock:
+            if self.hedged + 1 > self.max_hedge_rate * self.calls:
+                self.capped += 1
+                return False
+        if allow is not None and not allow():
+            with self._lock:
+                self.capped += 1
+            return False
+        with self._lock:
+            self.hedged += 1
+        return True
+
+    def call(self, fn: Callable, key=None, allow: Callable[[], bool] = None):
+        """
+        Run `fn`, duplicating it once if it is slower than the learned threshold.
+
+        Args:
+            fn: Call without arguments; both copies must be safe to run
+            key: Calls with different latency profiles (e.g. models) learn separate thresholds
+            allow: Extra check before hedging, e.g. a non-blocking rate limiter acquire
+
+        Returns:
+            Result of the first copy to succeed (an error is raised only if both fail)
+        """
+        start = time.monotonic()
+        with self._lock:
+            self.calls += 1
+        threshold = self.threshold(key)
+
+        primary = self._executor.submit(fn)
+        primary.add_done_callback(lambda _: self._record_primary(key, start))
+        try:
+            if threshold is None:
+                return primary.result()
+
+            done, _ = wait([primary], timeout=threshold)
+            if done or not self._claim_hedge(allow):
+                return primary.result()
+
+            logger.debug(f"Hedging call still running after {threshold:.2f}s")
+            pending = {primary, self._executor.submit(fn)}
+            while True:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                succeeded = [future for future in done if future.exception() is None]
+                if succeeded:
+                    if primary not in succeeded:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return succeeded[0].result()
+                if not pending:
+                    # Both copies failed: surface the first copy's error
+                    return primary.result()
+        finally:
+            with self._lock:
+                self._latencies.append(time.monotonic() - start)
+
+    def summary(self) -> Dict:
+        """
+        Hedge counts and tail latency with and without hedging.
+
+        Latency without hedging is measured on the first copy of each call,
+        which runs to completion even when its hedge wins.
+        """
+        with self._lock:
+            primary, effective = list(self._primary_latencies), list(self._latencies)
+            calls, hedged, wins, capped = self.calls, self.hedged, self.hedge_wins, self.capped
+        p99_without, p99 = percentile(primary, 99), percentile(effective, 99)
+        return {
+            'calls': calls,
+            'hedged': hedged,
+            'hedge_rate': round(hedged / calls, 4) if calls else 0.0,
+            'hedge_wins': wins,
+            'capped': capped,
+            'p50_seconds': round(percentile(effective, 50), 3),
+            'p99_seconds': round(p99, 3),
+            'p50_seconds_unhedged': round(percentile(primary, 50), 3),
+            'p99_seconds_unhedged': round(p99_without, 3),
+            'p99_reduction_pct': round((1 - p99 / p99_without) * 100, 1) if p99_without else 0.0,
+        }
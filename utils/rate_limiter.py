@@ -0,0 +1,129 @@
+"""
+Rate limiting utilities for Product Intelligence Engine.
+Token-bucket limiter shared by concurrent workers calling external APIs.
+"""
+
+import time
+import threading
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket that refills continuously up to its capacity."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Burst capacity (default: one minute's worth)
+        """
+        self.capacity = float(capacity or rate_per_minute)
+        self.refill_rate = float(rate_per_minute) / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+    def refill(self, now: float):
+        """Add the tokens accumulated since the last refill."""
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        self.last_refill = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float):
+        """Remove tokens from the bucket."""
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Thread-safe requests-per-minute / tokens-per-minute limiter."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, burst: Optional[float] = None):
+        """
+        Initialize the limiter. A limit of None or 0 disables that bucket.
+
+        Args:
+            requests_per_minute: Maximum requests per minute
+            tokens_per_minute: Maximum (estimated) tokens per minute
+            burst: Requests allowed back to back (default: a minute's worth)
+        """
+        self._lock = threading.Lock()
+        self._request_bucket = TokenBucket(requests_per_minute, burst) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.total_wait = 0.0
+        self.total_requests = 0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request carrying `tokens` tokens may be sent.
+
+        Args:
+            tokens: Estimated token count of the request
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+
+                if self._request_bucket:
+                    self._request_bucket.refill(now)
+                    wait = max(wait, self._request_bucket.wait_time(1))
+                if self._token_bucket:
+                    self._token_bucket.refill(now)
+                    wait = max(wait, self._token_bucket.wait_time(tokens))
+
+                if wait <= 0:
+                    if self._request_bucket:
+                        self._request_bucket.consume(1)
+                    if self._token_bucket:
+                        self._token_bucket.consume(tokens)
+                    self.total_wait += waited
+                    self.total_requests += 1
+                    return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """
+        Take one request carrying `tokens` tokens only if it may be sent right now.
+
+        Args:
+            tokens: Estimated token count of the request
+
+        Returns:
+            True if the request was admitted, False if it would have to wait
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._request_bucket:
+                self._request_bucket.refill(now)
+                if self._request_bucket.wait_time(1) > 0:
+                    return False
+            if self._token_bucket:
+                self._token_bucket.refill(now)
+                if self._token_bucket.wait_time(tokens) > 0:
+                    return False
+
+            if self._request_bucket:
+                self._request_bucket.consume(1)
+            if self._token_bucket:
+                self._token_bucket.consume(tokens)
+            self.total_requests += 1
+            return True
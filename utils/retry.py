@@ -0,0 +1,249 @@
+"""
+Retry utilities for Product Intelligence Engine.
+Error classification, exponential backoff with jitter, and a shared circuit breaker.
+"""
+
+import re
+import json
+import time
+import random
+import threading
+import logging
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorKind:
+    """Categories of LLM call failures that need different retry handling."""
+
+    RATE_LIMIT = "rate_limit"  # 429 / quota exhausted: back off, honor retry-after
+    TRANSIENT = "transient"    # 5xx, timeouts, connection drops: back off and retry
+    PERMANENT = "permanent"    # bad request, auth, not found: retrying will not help
+    PARSE = "parse"            # the call succeeded but the reply was unusable
+
+
+_RATE_LIMIT_NAMES = ('ResourceExhausted', 'TooManyRequests', 'RateLimit')
+_TRANSIENT_NAMES = ('ServiceUnavailable', 'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout',
+                    'BadGateway', 'Aborted', 'Timeout', 'ConnectionError', 'RemoteDisconnected')
+_PERMANENT_NAMES = ('InvalidArgument', 'BadRequest', 'PermissionDenied', 'Unauthenticated',
+                    'Unauthorized', 'Forbidden', 'NotFound', 'FailedPrecondition')
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Map an exception raised by an LLM call to an ErrorKind.
+
+    Works on google.api_core exceptions (which carry an HTTP `code`) without
+    importing them, and falls back to the exception class name.
+
+    Args:
+        error: Exception raised by the call or while parsing its reply
+
+    Returns:
+        One of the ErrorKind constants
+    """
+    if isinstance(error, json.JSONDecodeError):
+        return ErrorKind.PARSE
+
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        if code == 429:
+            return ErrorKind.RATE_LIMIT
+        if code >= 500 or code == 408:
+            return ErrorKind.TRANSIENT
+        if 400 <= code < 500:
+            return ErrorKind.PERMANENT
+
+    name = type(error).__name__
+    if any(n in name for n in _RATE_LIMIT_NAMES):
+        return ErrorKind.RATE_LIMIT
+    if any(n in name for n in _TRANSIENT_NAMES) or isinstance(error, (TimeoutError, ConnectionError)):
+        return ErrorKind.TRANSIENT
+    if any(n in name for n in _PERMANENT_NAMES):
+        return ErrorKind.PERMANENT
+    if isinstance(error, ValueError):
+        return ErrorKind.PARSE
+
+    message = str(error).lower()
+    if '429' in message or 'quota' in message or 'rate limit' in message:
+        return ErrorKind.RATE_LIMIT
+
+    # Unknown errors are treated as transient so they still get a bounded retry
+    return ErrorKind.TRANSIENT
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extract a server-provided retry hint from an exception, if any.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        Seconds to wait, or None if the error carries no hint
+    """
+    hint = getattr(error, 'retry_after', None)
+    if isinstance(hint, (int, float)):
+        return float(hint)
+
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers and headers.get('Retry-After'):
+        try:
+            return float(headers['Retry-After'])
+        except ValueError:
+            pass
+
+    # Gemini puts the hint in the message: "Please retry in 41.3s" / "retry_delay { seconds: 41 }"
+    message = str(error)
+    match = re.search(r'retry in ([\d.]+)\s*s', message) or \
+        re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', message)
+    if match:
+        return float(match.group(1))
+
+    return None
+
+
+class RetryStats:
+    """Thread-safe counters for retries, backoff and circuit breaker activity."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = {}
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.breaker_trips = 0
+        self.breaker_wait_seconds = 0.0
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def record_failure(self, kind: str):
+        with self._lock:
+            self.failures[kind] = self.failures.get(kind, 0) + 1
+
+    def record_backoff(self, seconds: float):
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += seconds
+
+    def record_breaker_trip(self):
+        with self._lock:
+            self.breaker_trips += 1
+
+    def record_breaker_wait(self, seconds: float):
+        with self._lock:
+            self.breaker_wait_seconds += seconds
+
+    def as_dict(self) -> Dict:
+        """Snapshot of all counters."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'failures': dict(self.failures),
+                'retries': self.retries,
+                'backoff_seconds': round(self.backoff_seconds, 2),
+                'breaker_trips': self.breaker_trips,
+                'breaker_wait_seconds': round(self.breaker_wait_seconds, 2),
+            }
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, tuned per error kind."""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 2.0, max_delay: float = 60.0):
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries: Total attempts per request
+            base_delay: Delay before the first retry, doubled on every attempt
+            max_delay: Upper bound on any single delay
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        """Whether another attempt is worthwhile after `attempt` (0-based) failed."""
+        return kind != ErrorKind.PERMANENT and attempt < self.max_retries - 1
+
+    def delay(self, kind: str, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            kind: ErrorKind of the failure
+            attempt: 0-based attempt number that failed
+            retry_after: Server-provided hint, honored as a minimum
+
+        Returns:
+            Delay in seconds
+        """
+        if kind == ErrorKind.PARSE:
+            # The API is healthy; retry almost immediately
+            return random.uniform(0, 0.5)
+
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        if kind == ErrorKind.RATE_LIMIT:
+            backoff = min(self.max_delay, backoff * 2)
+
+        # Equal jitter: keep half the backoff, randomize the rest
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Pauses every worker when the recent API error rate spikes."""
+
+    def __init__(self, error_rate: float = 0.5, window: int = 20, cooldown: float = 30.0,
+                 stats: RetryStats = None):
+        """
+        Initialize the breaker.
+
+        Args:
+            error_rate: Failure ratio over the window that opens the breaker
+            window: Number of recent calls considered
+            cooldown: Seconds the breaker stays open
+            stats: Counters to report trips and waits to
+        """
+        self.error_rate = error_rate
+        self.window = window
+        self.cooldown = cooldown
+        self.stats = stats or RetryStats()
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Block while the breaker is open."""
+        with self._lock:
+            wait = self._open_until - time.monotonic()
+        if wait > 0:
+            self.stats.record_breaker_wait(wait)
+            time.sleep(wait)
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+
+    def record_failure(self, kind: str):
+        """Record an API failure; parse errors do not count against API health."""
+        if kind == ErrorKind.PARSE:
+            return
+
+        with self._lock:
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.window and failures / len(self._outcomes) >= self.error_rate:
+                self._open_until = time.monotonic() + self.cooldown
+                self._outcomes.clear()
+                self.stats.record_breaker_trip()
+                logger.warning(f" Circuit breaker open: {failures}/{self.window} recent calls failed, "
+                               f"pausing all workers for {self.cooldown:.0f}s")
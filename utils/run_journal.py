@@ -0,0 +1,86 @@
+"""
+Run journal for Product Intelligence Engine.
+Append-only JSONL checkpoint of completed classifications, keyed by review_id.
+"""
+
+import json
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """Append-only checkpoint file so interrupted runs can be resumed."""
+
+    def __init__(self, filepath: Path):
+        """
+        Initialize the journal.
+
+        Args:
+            filepath: Path to the JSONL journal file
+        """
+        self.filepath = Path(filepath)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Read completed classifications from a previous run.
+
+        A truncated last line (from a crash mid-write) is ignored.
+
+        Returns:
+            Mapping of review_id to classification
+        """
+        completed = {}
+        if not self.filepath.exists():
+            return completed
+
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    completed[str(entry['review_id'])] = entry['classification']
+                except (json.JSONDecodeError, KeyError):
+                    logger.debug(f"Skipping malformed journal line in {self.filepath}")
+
+        logger.info(f" Loaded {len(completed)} completed classifications from {self.filepath}")
+        return completed
+
+    def append(self, entries: Iterable[Tuple[str, Dict]]):
+        """
+        Append completed classifications and flush them to disk.
+
+        Args:
+            entries: (review_id, classification) pairs
+        """
+        lines = ''.join(
+            json.dumps({'review_id': str(review_id), 'classification': classification},
+                       ensure_ascii=False, default=str) + '\n'
+            for review_id, classification in entries
+        )
+        if not lines:
+            return
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.filepath, 'a', encoding='utf-8')
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        """Close and delete the journal (after results are safely saved)."""
+        self.close()
+        if self.filepath.exists():
+            self.filepath.unlink()
@@ -0,0 +1,169 @@
+"""
+Sampling utilities for Product Intelligence Engine.
+Stratified sampling sized by a target margin of error, and stratified
+proportion estimates with confidence intervals.
+"""
+
+import math
+import logging
+from statistics import NormalDist
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STRATUM_COLUMN = 'stratum'
+WEIGHT_COLUMN = 'sample_weight'
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided standard normal critical value (1.96 for 0.95)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def required_sample_size(population: int, margin_of_error: float, confidence: float = 0.95,
+                         proportion: float = 0.5) -> int:
+    """
+    Sample size for estimating a proportion within a margin of error.
+
+    Cochran's formula with finite population correction; proportion 0.5 is
+    the worst case, so every category share is covered.
+
+    Args:
+        population: Number of reviews available
+        margin_of_error: Target half-width of the confidence interval (e.g. 0.03)
+        confidence: Confidence level
+        proportion: Expected proportion
+
+    Returns:
+        Number of reviews to classify (at most `population`)
+    """
+    if population <= 0:
+        return 0
+    n0 = z_score(confidence) ** 2 * proportion * (1 - proportion) / margin_of_error ** 2
+    return min(population, math.ceil(n0 / (1 + (n0 - 1) / population)))
+
+
+def add_strata(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Stratum label per review, e.g. '1|2025-09' for rating x month.
+
+    Args:
+        df: Reviews
+        columns: Stratification keys; 'month' is derived from 'date'
+
+    Returns:
+        Stratum label per row
+    """
+    parts = []
+    for column in columns:
+        if column == 'month':
+            months = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m') if 'date' in df.columns \
+                else pd.Series(np.nan, index=df.index)
+            parts.append(months.fillna('unknown'))
+        else:
+            parts.append(df[column].astype(str))
+    label = parts[0]
+    for part in parts[1:]:
+        label = label + '|' + part
+    return label
+
+
+def stratified_sample(df: pd.DataFrame, sample_size: int, strata: List[str], min_per_stratum: int = 2,
+                      seed: int = 42) -> pd.DataFrame:
+    """
+    Draw a proportionally allocated stratified random sample.
+
+    Allocation uses the largest remainder method, then tops every stratum up
+    to `min_per_stratum` (or its size), so the result can be slightly larger
+    than `sample_size`.
+
+    Args:
+        df: Reviews
+        sample_size: Target number of reviews
+        strata: Stratification keys (see add_strata)
+        min_per_stratum: Minimum reviews drawn from each stratum
+        seed: Random seed
+
+    Returns:
+        Sampled rows in original order, with 'stratum' and 'sample_weight'
+        (stratum size / stratum sample size) columns
+    """
+    labels = add_strata(df, strata)
+    sizes = labels.value_counts().sort_index()
+
+    quotas = sample_size * sizes / sizes.sum()
+    allocation = np.floor(quotas).astype(int)
+    shortfall = int(min(sample_size, sizes.sum()) - allocation.sum())
+    if shortfall > 0:
+        remainders = (quotas - allocation).sort_values(ascending=False)
+        allocation[remainders.index[:shortfall]] += 1
+    allocation = np.minimum(np.maximum(allocation, np.minimum(sizes, min_per_stratum)), sizes)
+
+    rng = np.random.default_rng(seed)
+    positions = np.arange(len(df))
+    chosen = []
+    for stratum, members in labels.groupby(labels, sort=True).indices.items():
+        chosen.append(rng.choice(positions[members], size=int(allocation[stratum]), replace=False))
+    chosen = np.sort(np.concatenate(chosen)) if chosen else np.zeros(0, dtype=int)
+
+    sample = df.iloc[chosen].copy()
+    sample[STRATUM_COLUMN] = labels.iloc[chosen].to_numpy()
+    sample[WEIGHT_COLUMN] = (sizes / allocation)[sample[STRATUM_COLUMN]].to_numpy()
+    return sample
+
+
+def is_sampled(df: pd.DataFrame) -> bool:
+    """Whether a processed frame comes from a stratified sample."""
+    return STRATUM_COLUMN in df.columns and WEIGHT_COLUMN in df.columns
+
+
+def estimate_proportions(df: pd.DataFrame, column: str, confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Estimate population proportions of each value of `column` from a stratified sample.
+
+    Uses the stratified estimator sum(W_h * p_h) with variance
+    sum(W_h^2 * (1 - n_h/N_h) * p_h(1 - p_h) / (n_h - 1)). Unsampled frames
+    (no weights) are treated as a census and get zero-width intervals.
+
+    Args:
+        df: Processed reviews, optionally with 'stratum' and 'sample_weight'
+        column: Column to estimate, e.g. 'category'
+        confidence: Confidence level
+
+    Returns:
+        DataFrame indexed by value with proportion, ci_low, ci_high,
+        sample_count and estimated_count, sorted by proportion
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['proportion', 'ci_low', 'ci_high', 'sample_count', 'estimated_count'])
+
+    if is_sampled(df):
+        strata = df[STRATUM_COLUMN].astype(str)
+        weights = df[WEIGHT_COLUMN].astype(float)
+    else:
+        strata = pd.Series('all', index=df.index)
+        weights = pd.Series(1.0, index=df.index)
+
+    n_h = strata.value_counts()
+    N_h = weights.groupby(strata).sum()
+    population = N_h.sum()
+    W_h = N_h / population
+    fpc = (1 - n_h / N_h).clip(lower=0)
+
+    # Share of each value within each stratum
+    p_h = pd.crosstab(strata, df[column]).div(n_h, axis=0).reindex(n_h.index)
+    proportion = p_h.mul(W_h, axis=0).sum()
+    variance = (p_h * (1 - p_h)).mul(W_h ** 2 * fpc / (n_h - 1).clip(lower=1), axis=0).sum()
+
+    margin = z_score(confidence) * np.sqrt(variance)
+    result = pd.DataFrame({
+        'proportion': proportion,
+        'ci_low': (proportion - margin).clip(lower=0),
+        'ci_high': (proportion + margin).clip(upper=1),
+        'sample_count': df[column].value_counts().reindex(proportion.index).fillna(0).astype(int),
+        'estimated_count': (proportion * population).round().astype(int),
+    })
+    return result.sort_values('proportion', ascending=False)
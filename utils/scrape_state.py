@@ -0,0 +1,90 @@
+"""
+Scrape state for Product Intelligence Engine.
+Per-app JSON high-water mark (newest review seen, app metadata at the last
+run) that lets the scraper fetch only reviews newer than the previous run.
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeState:
+    """High-water mark of one app's scrapes, stored as a JSON file."""
+
+    def __init__(self, filepath: Path):
+        """
+        Initialize the state.
+
+        Args:
+            filepath: Path to the app's JSON state file
+        """
+        self.filepath = Path(filepath)
+
+    def load(self) -> Dict:
+        """
+        Read the state of the previous run.
+
+        Returns:
+            Dictionary with 'newest_review_id', 'newest_date' (ISO format),
+            'boundary_ids' (reviews sharing the newest date), 'saved_ids'
+            (reviews newer than the mark already saved by runs that stopped
+            short of it), 'app_info' and 'last_run'; empty if the app was
+            never scraped or the file is unreadable
+        """
+        if not self.filepath.exists():
+            return {}
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f" Ignoring unreadable scrape state {self.filepath}: {e}")
+            return {}
+
+    def save(self, app_info: Optional[Dict], newest: List[Dict] = None, previous: Dict = None,
+             saved_ids: List[str] = None) -> Dict:
+        """
+        Record a run.
+
+        Args:
+            app_info: App metadata fetched this run
+            newest: Newest reviews seen this run, newest first; moves the high-water
+                mark, so pass it only when paging reached the previous mark
+            previous: State loaded before the run
+            saved_ids: Reviews saved by a run that stopped short of the mark
+
+        Returns:
+            The saved state
+        """
+        state = dict(previous or {})
+        state['app_info'] = app_info
+        state['last_run'] = datetime.now().isoformat(timespec='seconds')
+        if newest:
+            newest_date = newest[0].get('date')
+            boundary_ids = [review.get('review_id') for review in newest if review.get('date') == newest_date]
+            if state.get('newest_date') == str(newest_date):
+                # Same timestamp as last time: the reviews seen then are still at the boundary
+                boundary_ids += [rid for rid in state.get('boundary_ids', []) if rid not in boundary_ids]
+            state['newest_review_id'] = newest[0].get('review_id')
+            state['newest_date'] = str(newest_date) if newest_date is not None else None
+            state['boundary_ids'] = boundary_ids
+            state['saved_ids'] = []
+        elif saved_ids:
+            state['saved_ids'] = list(dict.fromkeys(list(state.get('saved_ids') or []) + list(saved_ids)))
+
+        # Written aside and swapped in, so a crash never leaves a half-written state
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.filepath.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False, default=str)
+        tmp_path.replace(self.filepath)
+        return state
+
+    def remove(self):
+        """Delete the state (the next scrape starts from scratch)."""
+        if self.filepath.exists():
+            self.filepath.unlink()